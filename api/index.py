@@ -1,11 +1,46 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from datetime import datetime, timedelta
 from bson import ObjectId
+import atexit
+import base64
+import bisect
+import click
+import csv
+import io
+import functools
+import hashlib
+import heapq
+import json
+import logging
+import logging.handlers
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import random
 import re
 import os
+import socket
+import sys
+import threading
+import time
+import uuid
 import urllib.parse
+import zlib
+
+# 선택 의존성 - 있으면 출석 매트릭스 합계를 벡터 연산으로 계산
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 선택 의존성 - 있으면 목록 응답 JSON 직렬화에 사용 (없으면 표준 json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Flask 앱 생성
 app = Flask(__name__)
@@ -14,6 +49,294 @@ CORS(app)
 # Vercel에서 인식할 수 있도록 application 변수 추가
 application = app
 
+# ===== 로깅 =====
+# 로그는 JSON 한 줄로 남기고 실제 출력은 QueueListener 스레드가 맡아 요청 스레드가 stdout I/O 를 기다리지 않음
+# LOG_LEVEL: 기본 레벨, LOG_LEVELS: 모듈별 레벨 (예: "attendance.checkin=DEBUG,attendance.db=WARNING")
+# LOG_DEBUG_SAMPLE_RATE: 대량 DEBUG 이벤트 중 기록할 비율 (0~1), LOG_ASYNC=0 이면 바로 출력
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "1"))
+LOG_ASYNC = os.environ.get("LOG_ASYNC", "1") == "1"
+
+class JsonLogFormatter(logging.Formatter):
+    """로그 레코드를 JSON 한 줄로 변환 (extra={"fields": {...}} 는 최상위 키로 펼침)"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """요청 스레드에서는 메시지/예외만 문자열로 고정하고 JSON 변환은 리스너 스레드에 맡김"""
+
+    def prepare(self, record):
+        # attendance 로거에는 이 핸들러 하나뿐이므로 레코드를 복사하지 않고 그대로 넘김
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+log_stream_handler = logging.StreamHandler(sys.stdout)
+log_stream_handler.setFormatter(JsonLogFormatter())
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+
+def start_log_listener():
+    """큐를 비우는 리스너 스레드 시작 (fork 된 자식 프로세스에서도 다시 호출됨)"""
+    global _log_listener
+    _log_listener = logging.handlers.QueueListener(_log_queue, log_stream_handler)
+    _log_listener.start()
+
+def stop_log_listener():
+    """종료 시 큐에 남은 로그를 모두 출력"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def configure_logging():
+    root_logger = logging.getLogger("attendance")
+    root_logger.setLevel(LOG_LEVEL)
+    root_logger.propagate = False
+    for spec in LOG_LEVELS.split(","):
+        name, _, level = spec.partition("=")
+        if name.strip() and level.strip():
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    if not LOG_ASYNC:
+        root_logger.addHandler(log_stream_handler)
+        return
+    root_logger.addHandler(DeferredQueueHandler(_log_queue))
+    start_log_listener()
+    atexit.register(stop_log_listener)
+    os.register_at_fork(after_in_child=start_log_listener)
+
+configure_logging()
+
+def get_logger(name):
+    return logging.getLogger(f"attendance.{name}")
+
+def log_event(logger, level, event, **fields):
+    """구조화 로그 한 건 기록 (레벨이 꺼져 있으면 레코드를 만들지 않음)"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+def debug_enabled(logger):
+    """DEBUG 가 켜져 있고 샘플링에 뽑힌 경우에만 True - 디버그 필드를 만들기 전에 확인"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    return LOG_DEBUG_SAMPLE_RATE >= 1 or random.random() < LOG_DEBUG_SAMPLE_RATE
+
+db_log = get_logger("db")
+checkin_log = get_logger("checkin")
+auto_absent_log = get_logger("auto_absent")
+scheduler_log = get_logger("scheduler")
+
+# ===== 메트릭 (/metrics) =====
+# Prometheus 텍스트 형식으로 내보내는 프로세스 내 카운터/히스토그램 (외부 의존성 없음)
+# 기록은 bisect 한 번 + 락 안에서 리스트 원소 증가뿐이라 요청/명령당 수 µs 이내이며
+# 값은 프로세스(인스턴스)별로 따로 쌓이므로 수집기에서 인스턴스 라벨로 합쳐 봄
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def render_gauge(name, help_text, label_names, samples):
+    """스크레이프 시점에 계산한 값 [(라벨 값 튜플, 값), ...] 을 gauge 로 출력"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+    return lines
+
+class CounterMetric:
+    """라벨 조합별 누적 카운터"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+class HistogramMetric:
+    """라벨 조합별 히스토그램 - 기록할 때는 해당 버킷 개수만 올리고 누적 값은 출력할 때 계산"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # 라벨 → [버킷별 개수..., +Inf 개수, 합계]
+        self._series = {}
+
+    def observe(self, labels, value):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[position] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            items = sorted(((labels, list(series)) for labels, series in self._series.items()),
+                           key=lambda item: tuple(map(str, item[0])))
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+request_count = CounterMetric(
+    "http_requests_total", "처리한 요청 수", ("method", "route", "status"))
+request_latency = HistogramMetric(
+    "http_request_duration_seconds", "요청 처리 시간 (스트리밍 응답은 본문 전송 전까지)",
+    ("method", "route"), REQUEST_LATENCY_BUCKETS)
+mongo_command_latency = HistogramMetric(
+    "mongodb_command_duration_seconds", "MongoDB 명령 왕복 시간", ("collection", "command"), MONGO_LATENCY_BUCKETS)
+mongo_command_failures = CounterMetric(
+    "mongodb_command_failures_total", "실패한 MongoDB 명령 수", ("collection", "command"))
+mongo_checkout_failures = CounterMetric(
+    "mongodb_pool_checkout_failures_total", "연결 풀에서 연결을 얻지 못한 횟수", ("address", "reason"))
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo 명령 시간을 (컬렉션, 명령) 별로 기록
+
+    완료 이벤트에는 명령 본문이 없으므로 시작 이벤트에서 컬렉션 이름을 request_id 로 잠깐 보관함
+    """
+    # 컬렉션 이름이 명령 값이 아닌 다른 필드에 있는 명령
+    COLLECTION_FIELDS = {"getMore": "collection"}
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get(self.COLLECTION_FIELDS.get(event.command_name, event.command_name))
+        self._collections[event.request_id] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        collection = self._collections.pop(event.request_id, "")
+        mongo_command_latency.observe((collection, event.command_name), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._collections.pop(event.request_id, "")
+        mongo_command_latency.observe((collection, event.command_name), event.duration_micros / 1e6)
+        mongo_command_failures.inc((collection, event.command_name))
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """서버 주소별 연결 풀 상태 (열린 연결, 사용 중인 연결, 연결을 기다리는 요청 수)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = {}
+
+    def _add(self, address, **deltas):
+        key = f"{address[0]}:{address[1]}"
+        with self._lock:
+            pool = self._pools.setdefault(key, {"open": 0, "in_use": 0, "waiting": 0})
+            for state, delta in deltas.items():
+                pool[state] += delta
+
+    def snapshot(self):
+        with self._lock:
+            return {address: dict(pool) for address, pool in self._pools.items()}
+
+    def pool_created(self, event):
+        self._add(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._add(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(event.address, waiting=-1)
+        mongo_checkout_failures.inc((f"{event.address[0]}:{event.address[1]}", event.reason))
+
+    def connection_checked_out(self, event):
+        self._add(event.address, waiting=-1, in_use=1)
+
+    def connection_checked_in(self, event):
+        self._add(event.address, in_use=-1)
+
+mongo_command_metrics = MongoCommandMetrics()
+mongo_pool_metrics = MongoPoolMetrics()
+
+@app.before_request
+def start_request_timer():
+    if METRICS_ENABLED:
+        request.environ["attendance.started_at"] = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # 프록시(request) 조회를 한 번만 하도록 실제 요청 객체를 꺼내 씀
+    current = request._get_current_object()
+    started_at = current.environ.get("attendance.started_at")
+    if started_at is not None:
+        # 경로 값 대신 라우트 패턴으로 묶음 (없는 경로는 하나로 모아 라벨 수가 늘지 않게 함)
+        rule = current.url_rule
+        route = rule.rule if rule is not None else "unmatched"
+        request_latency.observe((current.method, route), time.perf_counter() - started_at)
+        request_count.inc((current.method, route, response.status_code))
+    return response
+
 # MongoDB 연결
 def get_mongodb_uri():
     """MongoDB URI 생성"""
@@ -27,33 +350,131 @@ def get_mongodb_uri():
 
 MONGODB_URI = get_mongodb_uri()
 
+# 커넥션 풀 설정 (환경변수로 조정 가능)
+MONGODB_MAX_POOL_SIZE = int(os.environ.get("MONGODB_MAX_POOL_SIZE", "20"))
+MONGODB_MIN_POOL_SIZE = int(os.environ.get("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.environ.get("MONGODB_MAX_IDLE_TIME_MS", "60000"))
+MONGODB_HEARTBEAT_FREQUENCY_MS = int(os.environ.get("MONGODB_HEARTBEAT_FREQUENCY_MS", "10000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+# 저장소 선택: mongo(기본) | memory (storage.py 의 프로세스 내 저장소 - 테스트/벤치마크용, 재시작하면 비워짐)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "mongo")
+if STORAGE_BACKEND == "memory":
+    # 메모리 저장소의 bulk_write 는 필드를 공개하는 자체 요청 객체만 받음
+    from storage import UpdateOne
+else:
+    from pymongo import UpdateOne
+
+# 프로세스 전역 클라이언트 - warm 서버리스 호출 간에 재사용됨
+_mongo_client = None
+_mongo_client_pid = None
+_mongo_client_lock = threading.Lock()
+
+def get_mongo_client():
+    """프로세스 전역 MongoClient 반환 (지연 생성, fork 안전)
+
+    STORAGE_BACKEND=memory 이면 같은 인터페이스의 storage.MemoryClient 를 반환함
+    """
+    global _mongo_client, _mongo_client_pid
+
+    pid = os.getpid()
+    if _mongo_client is not None and _mongo_client_pid == pid:
+        return _mongo_client
+
+    with _mongo_client_lock:
+        if STORAGE_BACKEND == "memory":
+            # 메모리 저장소는 fork 후에도 그대로 씀 (프로세스마다 따로인 것은 같음)
+            if _mongo_client is None:
+                from storage import MemoryClient
+                _mongo_client = MemoryClient()
+            _mongo_client_pid = pid
+        elif _mongo_client is None or _mongo_client_pid != pid:
+            # fork 된 자식 프로세스는 부모의 소켓을 공유하면 안 되므로 새로 생성
+            _mongo_client = MongoClient(
+                MONGODB_URI,
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+                heartbeatFrequencyMS=MONGODB_HEARTBEAT_FREQUENCY_MS,
+                serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                event_listeners=[mongo_command_metrics, mongo_pool_metrics] if METRICS_ENABLED else None,
+                connect=False
+            )
+            _mongo_client_pid = pid
+    return _mongo_client
+
 def get_db():
+    # 요청마다 ping 하지 않음 - 서버 상태는 드라이버의 heartbeat 모니터가 확인함
     try:
-        client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-        client.admin.command('ismaster')
-        return client.attendance_db
+        return get_mongo_client().attendance_db
     except Exception as e:
-        print(f"MongoDB 연결 실패: {e}")
+        log_event(db_log, logging.ERROR, "mongodb_connect_failed", error=str(e))
         return None
 
+# ===== 학번 키 =====
+# 학번은 DB에 항상 int 로 저장하고 같은 타입으로 조회함 (문자열로 조회하면 인덱스에서 다른 타입 구간이라 찾지 못함)
+# URL 경로 변수, JSON 본문, 가져오기 파일 등 학번이 들어오는 모든 곳에서 parse_student_id 로 변환
+
+def parse_student_id(value):
+    """학번 값을 저장 타입(int)으로 변환 - 정수, 숫자 문자열(앞뒤 공백 허용), 소수부가 없는 실수만 허용
+
+    변환할 수 없으면 ValueError
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"학번이 아닙니다: {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if text.isascii() and text.isdigit():
+            return int(text)
+    raise ValueError(f"학번이 아닙니다: {value!r}")
+
+def invalid_student_id_response():
+    return jsonify({
+        "success": False,
+        "error": "VALIDATION_ERROR",
+        "message": "학번은 숫자여야 합니다"
+    }), 400
+
+def with_student_id(view):
+    """<student_id> 경로 변수를 parse_student_id 로 변환해 넘김 (숫자가 아니면 400)"""
+    @functools.wraps(view)
+    def wrapper(*args, student_id, **kwargs):
+        try:
+            student_id = parse_student_id(student_id)
+        except ValueError:
+            return invalid_student_id_response()
+        return view(*args, student_id=student_id, **kwargs)
+    return wrapper
+
 def validate_student_data(data, is_update=False):
     """학생 데이터 검증"""
     errors = []
     
+    if not is_update and not data.get('student_id'):
+        errors.append("학번은 필수 항목입니다")
+    elif 'student_id' in data:
+        try:
+            parse_student_id(data['student_id'])
+        except ValueError:
+            errors.append("학번은 숫자여야 합니다")
     if not is_update:
-        if not data.get('student_id'):
-            errors.append("학번은 필수 항목입니다")
-        else:
-            try:
-                student_id = int(data['student_id'])
-            except ValueError:
-                errors.append("학번은 숫자여야 합니다")
         if not data.get('name'):
             errors.append("이름은 필수 항목입니다")
         if not data.get('major'):
             errors.append("학과는 필수 항목입니다")
     
-    if data.get('email') and not re.match(r'^[^@]+@[^@]+\.[^@]+$', data.get('email', '')):
+    # JSON 본문/NDJSON 행은 타입이 자유로우므로 문자열 필드를 확인 (dict/list 가 저장되거나 집계 키가 되지 않도록)
+    # 선택 항목(이메일/전화번호)은 기존 클라이언트가 보내던 null 도 허용
+    for field, label, optional in (('name', "이름은", False), ('major', "학과는", False),
+                                   ('email', "이메일은", True), ('phone', "전화번호는", True)):
+        if field in data and not isinstance(data[field], str) and not (optional and data[field] is None):
+            errors.append(f"{label} 문자열이어야 합니다")
+    
+    if isinstance(data.get('email'), str) and data['email'] and not re.match(r'^[^@]+@[^@]+\.[^@]+$', data['email']):
         errors.append("유효한 이메일 형식이 아닙니다")
     
     return errors
@@ -67,8 +488,8 @@ def validate_attendance_data(data):
         errors.append("학번은 필수 항목입니다")
     else:
         try:
-            int(data['student_id'])
-        except (ValueError, TypeError):
+            parse_student_id(data['student_id'])
+        except ValueError:
             errors.append("학번은 숫자여야 합니다")
             
     if not data.get('week'):
@@ -86,6 +507,778 @@ def validate_attendance_data(data):
         
     return errors
 
+# ===== 컬렉션 버전 =====
+# meta 컬렉션의 버전 카운터 - 쓰기마다 올려서 여러 인스턴스의 캐시를 함께 무효화함
+# 출석 스캔처럼 자주 일어나는 쓰기는 공유 meta 문서 대신 주차 집계 문서의 writes 카운터를
+# 집계 쓰기와 함께 올리고, attendance 버전은 "meta 카운터.writes 합계" 로 읽음
+COLLECTION_VERSION_CHECK_SECONDS = float(os.environ.get("COLLECTION_VERSION_CHECK_SECONDS", "1"))
+
+def get_collection_version(db, name):
+    doc = db.meta.find_one({"_id": "collection_versions"}, {name: 1})
+    return doc.get(name, 0) if doc else 0
+
+def bump_collection_version(db, name):
+    return collection_versions.bump(db, name)[name]
+
+def fetch_attendance_write_count(db):
+    """주차 집계 문서에 누적된 출석 쓰기 횟수 합계"""
+    result = list(db.attendance_rollups.aggregate([
+        {"$match": {"scope": "week"}},
+        {"$group": {"_id": None, "writes": {"$sum": "$writes"}}}
+    ]))
+    return result[0]["writes"] if result else 0
+
+class CollectionVersionTracker:
+    """전체 컬렉션 버전을 프로세스 안에 잠깐 보관
+
+    snapshot() 은 check_seconds 안에서는 DB 를 읽지 않으므로 다른 인스턴스의 쓰기는
+    최대 check_seconds 늦게 보이고, 이 인스턴스의 쓰기(bump/expire)는 바로 반영됨
+    derived: {컬렉션 이름: 함수(db)} - meta 카운터 뒤에 붙여 읽는 다른 카운터
+    """
+
+    def __init__(self, check_seconds=COLLECTION_VERSION_CHECK_SECONDS, derived=None):
+        self.check_seconds = check_seconds
+        self.derived = derived or {}
+        self._lock = threading.Lock()
+        self._versions = None
+        self._checked_at = float("-inf")
+
+    def _store(self, db, doc, checked_at):
+        versions = {key: value for key, value in (doc or {}).items() if key != "_id"}
+        for name, read in self.derived.items():
+            versions[name] = f"{versions.get(name, 0)}.{read(db)}"
+        with self._lock:
+            self._versions = versions
+            self._checked_at = checked_at
+        return versions
+
+    def snapshot(self, db):
+        """{컬렉션 이름: 버전} 반환"""
+        now = time.monotonic()
+        versions = self._versions
+        if versions is not None and now - self._checked_at < self.check_seconds:
+            return versions
+        return self._store(db, db.meta.find_one({"_id": "collection_versions"}), now)
+
+    def bump(self, db, *names):
+        """컬렉션 버전을 올리고 갱신된 전체 버전 반환"""
+        doc = db.meta.find_one_and_update(
+            {"_id": "collection_versions"},
+            {"$inc": {name: 1 for name in names}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return self._store(db, doc, time.monotonic())
+
+    def expire(self):
+        """다음 snapshot() 이 DB 를 다시 읽게 함 (meta 를 쓰지 않고 derived 카운터만 올린 쓰기 뒤에 호출)"""
+        with self._lock:
+            self._checked_at = float("-inf")
+
+collection_versions = CollectionVersionTracker(derived={"attendance": fetch_attendance_write_count})
+
+# ===== 학생 명단 캐시 =====
+ROSTER_CACHE_TTL_SECONDS = float(os.environ.get("ROSTER_CACHE_TTL_SECONDS", "300"))
+ROSTER_CACHE_MAX_SIZE = int(os.environ.get("ROSTER_CACHE_MAX_SIZE", "50000"))
+ROSTER_CACHE_VERSION_CHECK_SECONDS = float(os.environ.get("ROSTER_CACHE_VERSION_CHECK_SECONDS", "2"))
+
+class RosterCache:
+    """프로세스 내 학생 명단 캐시
+
+    - 학번별 조회: LRU + TTL, 없는 학번도 음성 캐시로 기억함
+    - 전체 명단: 학번순 정렬 + 번호(number)를 미리 계산해 둠 (명단이 max_size 이하일 때만,
+      넘으면 그 사실도 TTL 동안 기억해 요청마다 다시 읽지 않음)
+    - students 버전이 바뀌면 (다른 인스턴스의 수정 포함) version_check_seconds 안에 전부 비움
+    - 조회를 시작한 뒤 버전이 바뀌었으면 읽은 결과를 저장하지 않음 (비운 뒤 옛 데이터가 들어가지 않도록)
+    캐시된 문서는 여러 요청이 공유하므로 호출하는 쪽에서 수정하면 안 됨
+    """
+
+    def __init__(self, ttl_seconds=ROSTER_CACHE_TTL_SECONDS, max_size=ROSTER_CACHE_MAX_SIZE,
+                 version_check_seconds=ROSTER_CACHE_VERSION_CHECK_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.version_check_seconds = version_check_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._roster = None
+        self._oversized_at = None
+        self._version = None
+        self._version_checked_at = float("-inf")
+
+    def _clear(self):
+        self._entries.clear()
+        self._roster = None
+        self._oversized_at = None
+
+    def _sync_version(self, db):
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_seconds:
+            return
+        version = get_collection_version(db, "students")
+        with self._lock:
+            if version != self._version:
+                self._clear()
+                self._version = version
+            self._version_checked_at = now
+
+    def _fresh_roster(self, now):
+        roster = self._roster
+        if roster is not None and now - roster["loaded_at"] < self.ttl_seconds:
+            return roster
+        return None
+
+    def get(self, db, student_id):
+        """학번으로 학생 조회 (없으면 None)"""
+        self._sync_version(db)
+        now = time.monotonic()
+        with self._lock:
+            roster = self._fresh_roster(now)
+            if roster is not None:
+                return roster["by_id"].get(student_id)
+            entry = self._entries.get(student_id)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(student_id)
+                return entry[0]
+            version = self._version
+
+        student = db.students.find_one({"student_id": student_id})
+        with self._lock:
+            if version != self._version:
+                return student
+            self._entries[student_id] = (student, now)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return student
+
+    def get_many(self, db, student_ids):
+        """여러 학번을 한 번에 조회 - 캐시에 없는 학번만 $in 한 번으로 읽음. 반환값: {학번: 학생}"""
+        self._sync_version(db)
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            roster = self._fresh_roster(now)
+            for student_id in student_ids:
+                if roster is not None:
+                    student = roster["by_id"].get(student_id)
+                else:
+                    entry = self._entries.get(student_id)
+                    if entry is None or now - entry[1] >= self.ttl_seconds:
+                        missing.append(student_id)
+                        continue
+                    student = entry[0]
+                if student is not None:
+                    found[student_id] = student
+            version = self._version
+
+        if missing:
+            loaded = {student["student_id"]: student for student in db.students.find({"student_id": {"$in": missing}})}
+            with self._lock:
+                store = version == self._version
+                for student_id in missing:
+                    student = loaded.get(student_id)
+                    if student is not None:
+                        found[student_id] = student
+                    if store:
+                        self._entries[student_id] = (student, now)
+                        self._entries.move_to_end(student_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return found
+
+    def roster(self, db):
+        """학번순 전체 명단 {"rows": [(number, student), ...], "by_id": {...}} - 명단이 max_size 보다 크면 None"""
+        self._sync_version(db)
+        now = time.monotonic()
+        with self._lock:
+            roster = self._fresh_roster(now)
+            if roster is not None:
+                return roster
+            if self._oversized_at is not None and now - self._oversized_at < self.ttl_seconds:
+                return None
+            version = self._version
+
+        # 컬렉션 메타데이터로 먼저 걸러 큰 명단을 max_size 건이나 읽고 버리지 않음
+        students = None
+        if db.students.estimated_document_count() <= self.max_size:
+            students = list(db.students.find().sort("student_id", 1).limit(self.max_size + 1))
+        oversized = students is None or len(students) > self.max_size
+        roster = None if oversized else {
+            "rows": list(enumerate(students, 1)),
+            "by_id": {student["student_id"]: student for student in students},
+            "loaded_at": now
+        }
+        with self._lock:
+            if version == self._version:
+                if oversized:
+                    self._oversized_at = now
+                else:
+                    self._roster = roster
+        return roster
+
+    def invalidate(self, db):
+        """학생 데이터가 바뀌었을 때 호출 - 버전을 올려 다른 인스턴스도 비우게 함"""
+        version = bump_collection_version(db, "students")
+        with self._lock:
+            self._clear()
+            self._version = version
+            self._version_checked_at = time.monotonic()
+
+roster_cache = RosterCache()
+
+# ===== 출석 체크 (타임어택) 규칙 =====
+# recheck_count 가 짝수(2,4,6...)이면 TIMELOCK_MINUTES 안에 재인식해야 함
+TIMELOCK_MINUTES = 15
+
+def build_checkin_pipeline(now):
+    """출석 체크용 파이프라인 업데이트 생성
+
+    재인식 횟수 증가, 첫 인식 시각 보존, 짝/홀 타임어택 결정을
+    서버에서 한 번에 계산하므로 동시 스캔에도 횟수가 어긋나지 않음
+    """
+    has_record = {"$ne": [{"$type": "$status"}, "missing"]}
+    is_even = {"$eq": [{"$mod": ["$recheck_count", 2]}, 0]}
+    return [
+        {"$set": {
+            "recheck_count": {"$add": [{"$ifNull": ["$recheck_count", 0]}, 1]},
+            "first_check_time": {"$ifNull": ["$first_check_time", now]},
+            "recheck_time": {"$cond": [has_record, now, None]},
+            "status": "출석",
+            "date": now.strftime("%Y-%m-%d"),
+            "timestamp": now,
+            "is_auto_absent_processed": False,
+            "last_updated": now
+        }},
+        # 두 번째 단계는 증가된 recheck_count 를 기준으로 계산
+        # 이력은 attendance_events 에 남기므로 예전 notes 필드는 지움
+        {"$set": {
+            "expires_at": {"$cond": [is_even, now + timedelta(minutes=TIMELOCK_MINUTES), "$$REMOVE"]},
+            "notes": "$$REMOVE"
+        }}
+    ]
+
+def compute_checkin_state(previous, now):
+    """직전 기록으로 출석 체크 결과 계산 (build_checkin_pipeline 과 같은 규칙)"""
+    if previous is not None:
+        recheck_count = (previous.get("recheck_count") or 0) + 1
+        first_check_time = previous.get("first_check_time") or now
+    else:
+        recheck_count = 1
+        first_check_time = now
+
+    has_time_limit = recheck_count % 2 == 0
+    return {
+        "recheck_count": recheck_count,
+        "first_check_time": first_check_time,
+        "expires_at": now + timedelta(minutes=TIMELOCK_MINUTES) if has_time_limit else None,
+        "has_time_limit": has_time_limit
+    }
+
+def describe_checkin(recheck_count, has_time_limit):
+    """출석 체크 결과 메시지
+
+    recheck_count 기준:
+    1: 첫 인식 완료 → 타임어택 ❌ 없음
+    2: 재인식 1회 → 타임어택 ⏰ 있음 (짝수, 15분)
+    3: 재인식 2회 → 타임어택 ❌ 없음 (홀수)
+    4: 재인식 3회 → 타임어택 ⏰ 있음 (짝수, 15분)
+    5: 재인식 4회 → 타임어택 ❌ 없음 (홀수)
+    """
+    if recheck_count == 1:
+        return "출석이 체크되었습니다 (첫 인식)"
+    if has_time_limit:
+        return f"재인식되었습니다 (재인식 #{recheck_count}회) - 🚨 15분 내 재인식 필요!"
+    return f"재인식되었습니다 (재인식 #{recheck_count}회) - 타임어택 해제됨"
+
+def log_checkin(student_id, week_id, existing_record, checkin, message):
+    """출석 체크 결과 디버그 로그 (DEBUG 가 꺼져 있으면 필드를 만들지 않음)"""
+    if not debug_enabled(checkin_log):
+        return
+    checkin_log.debug("checkin", extra={"fields": {
+        "student_id": student_id,
+        "week_id": week_id,
+        "had_record": existing_record is not None,
+        "previous_recheck_count": existing_record.get("recheck_count") if existing_record else None,
+        "recheck_count": checkin["recheck_count"],
+        "has_time_limit": checkin["has_time_limit"],
+        "expires_at": checkin["expires_at"],
+        "message": message
+    }})
+
+def apply_checkin(db, student_id, week_id, now):
+    """출석 체크를 원자적으로 적용하고 변경 전 기록 반환 (없었으면 None)"""
+    return apply_checkins(db, student_id, week_id, [now])
+
+def apply_checkins(db, student_id, week_id, times):
+    """같은 (학생, 주차)의 스캔 여러 건을 시각 순서대로 한 번의 원자적 갱신으로 적용하고 변경 전 기록 반환
+
+    스캔별 파이프라인을 이어 붙이므로 각 단계는 앞 스캔이 반영된 문서를 기준으로 계산함
+    """
+    query = {"student_id": student_id, "week_id": week_id}
+    pipeline = [stage for now in times for stage in build_checkin_pipeline(now)]
+    try:
+        return db.attendance.find_one_and_update(
+            query, pipeline,
+            upsert=True, return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # 같은 (학생, 주차)의 첫 스캔이 동시에 upsert 된 경우 - 이제 기록이 있으므로 갱신됨
+        return db.attendance.find_one_and_update(
+            query, pipeline,
+            return_document=ReturnDocument.BEFORE
+        )
+
+# ===== 출석 이벤트 로그 =====
+# 스캔과 상태 전이는 attendance_events 컬렉션에 짧은 기록으로 추가만 하고
+# attendance 문서에는 현재 상태만 둠 (ObjectId _id 가 시간순이므로 이력 정렬/커서로 사용)
+# 문서 형식: {"student_id", "week_id", "type": "scan"|"auto_absent", "at", "from", "to", "recheck_count", "expires_at"}
+ATTENDANCE_EVENT_TTL_DAYS = int(os.environ.get("ATTENDANCE_EVENT_TTL_DAYS", "365"))
+MAX_HISTORY_PAGE_SIZE = 200
+
+def make_attendance_event(event_type, student_id, week_id, at, old_status, new_status,
+                          recheck_count=None, expires_at=None):
+    """이벤트 문서 하나 생성 (값이 없는 필드는 넣지 않음)"""
+    event = {
+        "student_id": student_id,
+        "week_id": week_id,
+        "type": event_type,
+        "at": at,
+        "from": old_status,
+        "to": new_status
+    }
+    if recheck_count is not None:
+        event["recheck_count"] = recheck_count
+    if expires_at is not None:
+        event["expires_at"] = expires_at
+    return event
+
+def record_attendance_events(db, events):
+    """이벤트를 한 번에 추가 - 이력 기록 실패가 출석 처리 자체를 막지 않도록 오류는 로그만 남김"""
+    if not events:
+        return
+    try:
+        db.attendance_events.insert_many(events, ordered=False)
+    except Exception as e:
+        log_event(db_log, logging.WARNING, "attendance_events_write_failed", count=len(events), error=str(e))
+
+# ===== 출석 집계(rollup) =====
+# attendance_rollups 컬렉션에 주차별/학생별/학과별 상태 건수와 전체 학생 수를 미리 집계해 두고
+# 출석 데이터를 바꾸는 모든 경로에서 증감분($inc)만 반영함
+# 문서 형식: {"_id": "week:1", "scope": "week", "key": 1, "counts": {"출석": 3}, "total": 3}
+# "roster" 문서는 rebuild_rollups 만 만들며, 이 문서가 없으면 집계가 아직 만들어지지 않은 것으로 보고
+# 통계는 원본 데이터로 계산함 (기존 데이터가 있는 DB는 데이터 마이그레이션 2 가 집계를 만듦)
+ROLLUP_REBUILD_COLLECTION = "attendance_rollups_rebuild"
+ROLLUP_REBUILD_LEASE_SECONDS = int(os.environ.get("ROLLUP_REBUILD_LEASE_SECONDS", "600"))
+
+def rollup_id(scope, key):
+    return f"{scope}:{key}"
+
+def add_status_change(deltas, student_id, week_id, major, old_status, new_status):
+    """출석 상태 변경 하나를 집계 증감분에 누적 (old/new 가 None 이면 생성/삭제)"""
+    if old_status == new_status:
+        return
+    for scope, key in (("week", week_id), ("student", student_id), ("major", major)):
+        if key is None:
+            continue
+        if old_status is not None:
+            deltas[(scope, key, old_status)] = deltas.get((scope, key, old_status), 0) - 1
+        if new_status is not None:
+            deltas[(scope, key, new_status)] = deltas.get((scope, key, new_status), 0) + 1
+
+def apply_rollup_deltas(db, deltas, roster_delta=0, written_weeks=()):
+    """누적된 집계 증감분을 한 번의 bulk_write 로 반영
+
+    written_weeks: 출석 기록을 쓴 주차 - 상태가 그대로여도 주차 문서의 writes 를 올려 응답 캐시를 무효화함
+    """
+    increments = {}
+    for (scope, key, status), count in deltas.items():
+        if count == 0:
+            continue
+        inc = increments.setdefault((scope, key), {})
+        inc[f"counts.{status}"] = inc.get(f"counts.{status}", 0) + count
+        inc["total"] = inc.get("total", 0) + count
+    for week_id in written_weeks:
+        inc = increments.setdefault(("week", week_id), {})
+        inc["writes"] = inc.get("writes", 0) + 1
+
+    operations = [
+        UpdateOne(
+            {"_id": rollup_id(scope, key)},
+            {"$inc": inc, "$setOnInsert": {"scope": scope, "key": key}},
+            upsert=True
+        )
+        for (scope, key), inc in increments.items()
+    ]
+    if roster_delta:
+        # upsert 하지 않음 - 집계를 만들기 전의 증감분으로 roster 문서가 생기면 완성된 집계처럼 보임
+        operations.append(UpdateOne({"_id": "roster"}, {"$inc": {"total": roster_delta}}))
+    if operations:
+        db.attendance_rollups.bulk_write(operations, ordered=False)
+
+def move_student_major_rollup(db, student_id, old_major, new_major):
+    """학생의 학과가 바뀌거나 명단에서 빠질 때 학과별 집계를 옮김"""
+    move_student_major_rollups(db, [(student_id, old_major, new_major)])
+
+def move_student_major_rollups(db, moves):
+    """[(student_id, old_major, new_major), ...] 를 한 번의 조회와 한 번의 bulk_write 로 반영"""
+    moves = {
+        rollup_id("student", student_id): (old_major, new_major)
+        for student_id, old_major, new_major in moves if old_major != new_major
+    }
+    if not moves:
+        return
+    deltas = {}
+    for student_rollup in db.attendance_rollups.find({"_id": {"$in": list(moves)}}):
+        old_major, new_major = moves[student_rollup["_id"]]
+        for status, count in student_rollup.get("counts", {}).items():
+            if old_major is not None:
+                deltas[("major", old_major, status)] = deltas.get(("major", old_major, status), 0) - count
+            if new_major is not None:
+                deltas[("major", new_major, status)] = deltas.get(("major", new_major, status), 0) + count
+    apply_rollup_deltas(db, deltas)
+
+def compute_rollups_from_raw(db):
+    """원본 attendance/students 로부터 집계 문서 전체를 다시 계산"""
+    docs = {}
+
+    def add(scope, key, status, count):
+        doc = docs.setdefault(rollup_id(scope, key), {
+            "_id": rollup_id(scope, key), "scope": scope, "key": key, "counts": {}, "total": 0
+        })
+        doc["counts"][status] = doc["counts"].get(status, 0) + count
+        doc["total"] += count
+
+    for group in db.attendance.aggregate([
+        {"$group": {"_id": {"week_id": "$week_id", "status": "$status"}, "count": {"$sum": 1}}}
+    ], allowDiskUse=True):
+        add("week", group["_id"]["week_id"], group["_id"]["status"], group["count"])
+
+    # 학생 단위로 먼저 묶은 뒤 학과를 붙임 (명단에 없는 학생의 기록은 학과 집계에서 제외)
+    for group in db.attendance.aggregate([
+        {"$group": {"_id": {"student_id": "$student_id", "status": "$status"}, "count": {"$sum": 1}}},
+        {"$lookup": {"from": "students", "localField": "_id.student_id", "foreignField": "student_id", "as": "student"}},
+        {"$project": {"count": 1, "major": {"$arrayElemAt": ["$student.major", 0]}}}
+    ], allowDiskUse=True):
+        add("student", group["_id"]["student_id"], group["_id"]["status"], group["count"])
+        if group.get("major") is not None:
+            add("major", group["major"], group["_id"]["status"], group["count"])
+
+    docs["roster"] = {"_id": "roster", "scope": "roster", "key": None, "total": db.students.count_documents({})}
+    return docs
+
+def normalize_rollup(doc):
+    """비교용 집계 문서 정규화 (0건 상태 제거)"""
+    if doc is None:
+        return None
+    counts = {status: count for status, count in doc.get("counts", {}).items() if count}
+    return {"counts": counts, "total": doc.get("total", 0)}
+
+def rebuild_rollups(db):
+    """집계 컬렉션을 원본 데이터로 다시 만듦 (CLI/시드/데이터 마이그레이션에서만 호출 - 자동으로 실행하지 않음)
+
+    임시 컬렉션에 채운 뒤 rename(dropTarget=True) 로 한 번에 바꾸므로 교체 중에 집계가 비거나
+    증감분 upsert 가 중복 키로 실패하지 않음. 락을 잡고 실행하며 다른 프로세스가 실행 중이면 RuntimeError
+    계산과 교체 사이에 반영된 증감분은 새 집계에 빠지므로 쓰기가 많은 시간에는 피하고,
+    필요하면 `flask rollups verify --fix` 로 확인함
+    """
+    owner = make_lease_owner()
+    if acquire_lease(db, "rollups_rebuild", owner, ROLLUP_REBUILD_LEASE_SECONDS) is None:
+        raise RuntimeError("다른 프로세스가 집계를 다시 만드는 중입니다")
+    try:
+        docs = compute_rollups_from_raw(db)
+        db.drop_collection(ROLLUP_REBUILD_COLLECTION)
+        staging = db[ROLLUP_REBUILD_COLLECTION]
+        # rename 은 대상 컬렉션의 인덱스를 버리므로 임시 컬렉션에 미리 만들어 둠 (빈 집계여도 컬렉션이 생김)
+        for (collection, _), (keys, options) in expected_indexes().items():
+            if collection == "attendance_rollups":
+                staging.create_index(keys, **options)
+        if docs:
+            staging.insert_many(list(docs.values()))
+        staging.rename("attendance_rollups", dropTarget=True)
+    finally:
+        release_lease(db, "rollups_rebuild", owner)
+    # 집계를 읽는 응답 캐시 무효화
+    collection_versions.bump(db, "attendance")
+    return len(docs)
+
+def verify_rollups(db):
+    """저장된 집계와 원본 데이터로 계산한 집계를 비교해 어긋난 항목 반환"""
+    expected = compute_rollups_from_raw(db)
+    drift = []
+    seen = set()
+    for doc in db.attendance_rollups.find():
+        seen.add(doc["_id"])
+        actual = normalize_rollup(doc)
+        wanted = normalize_rollup(expected.get(doc["_id"]))
+        # 모든 건수가 0이 된 문서는 없는 것과 같음
+        if wanted is None and not actual["counts"] and not actual["total"]:
+            continue
+        if actual != wanted:
+            drift.append({"_id": doc["_id"], "expected": wanted, "actual": actual})
+    for rollup_key, doc in expected.items():
+        if rollup_key not in seen:
+            drift.append({"_id": rollup_key, "expected": normalize_rollup(doc), "actual": None})
+    return drift
+
+# ===== 스키마/인덱스 마이그레이션 =====
+# 조회 경로가 쓰는 인덱스를 버전별로 정의하고 적용한 버전은 schema_migrations 컬렉션에 기록함
+# create_index 는 같은 키/옵션이면 아무 일도 하지 않으므로 여러 인스턴스가 동시에 실행하거나
+# 중간에 실패한 뒤 다시 실행해도 안전함 (그래서 SCHEMA_MIGRATE_ON_STARTUP 으로 첫 요청에서 적용할 수 있음)
+# 인덱스만 다루며, 문서를 고쳐 쓰는 단계는 아래 DATA_MIGRATIONS 로 따로 둠
+# 이미 배포된 버전의 목록은 바꾸지 말고 새 버전을 추가할 것
+SCHEMA_MIGRATE_ON_STARTUP = os.environ.get("SCHEMA_MIGRATE_ON_STARTUP", "0") == "1"
+SCHEMA_MIGRATE_RETRY_SECONDS = 60
+
+# 학번이 저장된 필드 (컬렉션, 필드, 추가 조건) - 학생 집계 문서는 key 에 학번을 둠
+STUDENT_ID_KEY_FIELDS = [
+    ("students", "student_id", {}),
+    ("attendance", "student_id", {}),
+    ("attendance_events", "student_id", {}),
+    ("attendance_rollups", "key", {"scope": "student"}),
+]
+STUDENT_ID_MIGRATION_BATCH_SIZE = 1000
+
+def write_student_id_updates(collection, operations, counts):
+    """변환 묶음 하나를 순서 없이 반영 - 유니크 인덱스 충돌만 세고 다른 오류는 다시 던짐"""
+    try:
+        counts["converted"] += collection.bulk_write(operations, ordered=False).modified_count
+    except BulkWriteError as e:
+        write_errors = e.details["writeErrors"]
+        if any(write_error.get("code") != 11000 for write_error in write_errors):
+            raise
+        counts["converted"] += e.details.get("nModified", 0)
+        counts["conflicts"] += len(write_errors)
+
+def normalize_student_id_keys(db, batch_size=STUDENT_ID_MIGRATION_BATCH_SIZE):
+    """문자열로 저장된 학번(학번 키 변환 도입 전 기록)을 int 로 일괄 변환
+
+    같은 int 학번 문서가 이미 있어 유니크 인덱스와 충돌하는 문서와 숫자가 아닌 값은 그대로 두고 건수만 보고함.
+    문자열 학번만 대상으로 하므로 다시 실행해도 안전함
+    반환값: {컬렉션: {"converted", "conflicts", "invalid"}}
+    """
+    report = {}
+    for name, field, condition in STUDENT_ID_KEY_FIELDS:
+        counts = {"converted": 0, "conflicts": 0, "invalid": 0}
+        operations = []
+        for doc in db[name].find({**condition, field: {"$type": "string"}}, {field: 1}):
+            try:
+                student_id = parse_student_id(doc[field])
+            except ValueError:
+                counts["invalid"] += 1
+                continue
+            operations.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: student_id}}))
+            if len(operations) >= batch_size:
+                write_student_id_updates(db[name], operations, counts)
+                operations = []
+        if operations:
+            write_student_id_updates(db[name], operations, counts)
+        report[name] = counts
+    
+    if any(counts["converted"] for counts in report.values()):
+        roster_cache.invalidate(db)
+        collection_versions.bump(db, "attendance")
+    return report
+
+# (버전, 설명, [(컬렉션, 키, 옵션), ...])
+SCHEMA_MIGRATIONS = [
+    (1, "기본 인덱스 (학번/주차 유니크, 타임어택 만료 조회, 학생 목록 정렬, 출석 이력)", [
+        ("attendance", [("student_id", 1), ("week_id", 1)], {"unique": True}),
+        ("attendance", [("expires_at", 1)], {}),
+        ("attendance", [("is_auto_absent_processed", 1)], {}),
+        ("attendance", [("status", 1), ("is_auto_absent_processed", 1), ("expires_at", 1)], {}),
+        ("students", [("student_id", 1)], {"unique": True}),
+        ("students", [("name", 1), ("_id", 1)], {}),
+        ("students", [("major", 1), ("_id", 1)], {}),
+        ("attendance_events", [("student_id", 1), ("week_id", 1), ("_id", -1)], {}),
+    ]),
+    # 주차별 명단/기록, 내보내기/매트릭스 주차 필터, distinct("week_id")
+    (2, "주차별 출석 조회 인덱스", [
+        ("attendance", [("week_id", 1), ("student_id", 1)], {}),
+    ]),
+    # 보관 기간은 ATTENDANCE_EVENT_TTL_DAYS 로 정함 (0 이하면 영구 보관 - 인덱스 없음)
+    (3, "출석 이력 보관 기간 TTL 인덱스", [
+        ("attendance_events", [("at", 1)], {"expireAfterSeconds": ATTENDANCE_EVENT_TTL_DAYS * 86400}),
+    ] if ATTENDANCE_EVENT_TTL_DAYS > 0 else []),
+    # 쿼리 플랜 점검에서 찾은 전체 스캔: 학번순 목록의 (student_id, _id) 정렬, 통계의 scope 조건
+    (4, "학생 목록 학번 정렬/집계 문서 scope 인덱스", [
+        ("students", [("student_id", 1), ("_id", 1)], {}),
+        ("attendance_rollups", [("scope", 1)], {}),
+    ]),
+]
+
+# ===== 데이터 마이그레이션 =====
+# 기존 문서를 고쳐 쓰는 단계 - 자동 시작 경로(SCHEMA_MIGRATE_ON_STARTUP)에서는 실행하지 않고
+# 배포 때 `flask schema migrate-data` 로 실행함 (인덱스 마이그레이션을 먼저 적용할 것)
+# 여러 인스턴스가 동시에 실행하지 않도록 락(lease)을 잡고, 적용한 버전과 결과는 data_migrations 컬렉션에 기록함
+DATA_MIGRATION_LEASE_SECONDS = int(os.environ.get("DATA_MIGRATION_LEASE_SECONDS", "900"))
+
+# (버전, 설명, 함수(db) -> 기록할 결과)
+DATA_MIGRATIONS = [
+    (1, "문자열로 저장된 학번을 int 로 변환", normalize_student_id_keys),
+    # 집계 도입 전부터 데이터가 있던 DB는 집계 문서가 없으므로 원본으로 한 번 만듦
+    (2, "기존 데이터로 출석 집계 생성", lambda db: {"rollups": rebuild_rollups(db)}),
+]
+
+def index_name(keys):
+    """create_index 기본 이름과 같은 규칙 (예: student_id_1_week_id_1)"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+def expected_indexes():
+    """모든 마이그레이션이 만드는 인덱스 {(컬렉션, 이름): (키, 옵션)}"""
+    return {
+        (collection, index_name(keys)): (keys, options)
+        for _, _, indexes in SCHEMA_MIGRATIONS
+        for collection, keys, options in indexes
+    }
+
+def record_schema_migration(db, version, description, indexes, seconds, result=None):
+    db.schema_migrations.update_one(
+        {"_id": version},
+        {"$setOnInsert": {
+            "description": description,
+            "indexes": [f"{collection}.{index_name(keys)}" for collection, keys, _ in indexes],
+            "result": result,
+            "applied_at": datetime.now(),
+            "seconds": round(seconds, 3)
+        }},
+        upsert=True
+    )
+
+def apply_schema_migrations(db, target=None):
+    """아직 적용하지 않은 인덱스 버전을 순서대로 적용하고 적용한 버전 목록 반환 (데이터는 바꾸지 않음)"""
+    applied = {doc["_id"] for doc in db.schema_migrations.find({}, {"_id": 1})}
+    done = []
+    for version, description, indexes in SCHEMA_MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        started = time.perf_counter()
+        for collection, keys, options in indexes:
+            db[collection].create_index(keys, **options)
+        record_schema_migration(db, version, description, indexes, time.perf_counter() - started)
+        log_event(db_log, logging.INFO, "schema_migration_applied", version=version, description=description)
+        done.append(version)
+    return done
+
+def record_data_migration(db, version, description, seconds, result=None):
+    db.data_migrations.update_one(
+        {"_id": version},
+        {"$setOnInsert": {
+            "description": description,
+            "result": result,
+            "applied_at": datetime.now(),
+            "seconds": round(seconds, 3)
+        }},
+        upsert=True
+    )
+
+def apply_data_migrations(db, target=None):
+    """아직 적용하지 않은 데이터 마이그레이션을 락을 잡고 순서대로 적용한 뒤 적용한 버전 목록 반환
+
+    다른 프로세스가 락을 잡고 있으면 RuntimeError
+    """
+    owner = make_lease_owner()
+    if acquire_lease(db, "data_migrations", owner, DATA_MIGRATION_LEASE_SECONDS) is None:
+        raise RuntimeError("다른 프로세스가 데이터 마이그레이션을 실행 중입니다")
+    try:
+        applied = {doc["_id"] for doc in db.data_migrations.find({}, {"_id": 1})}
+        done = []
+        for version, description, migrate in DATA_MIGRATIONS:
+            if version in applied or (target is not None and version > target):
+                continue
+            started = time.perf_counter()
+            result = migrate(db)
+            record_data_migration(db, version, description, time.perf_counter() - started, result)
+            log_event(db_log, logging.INFO, "data_migration_applied", version=version, description=description, result=result)
+            done.append(version)
+            if not renew_lease(db, "data_migrations", owner, DATA_MIGRATION_LEASE_SECONDS):
+                raise RuntimeError("데이터 마이그레이션 락을 잃었습니다 (DATA_MIGRATION_LEASE_SECONDS 를 늘려 다시 실행)")
+        return done
+    finally:
+        release_lease(db, "data_migrations", owner)
+
+def create_collection_indexes(db):
+    """기록과 관계없이 모든 버전의 인덱스를 만들고 인덱스/데이터 마이그레이션을 적용됨으로 기록
+
+    컬렉션을 비우고 다시 채운 뒤 사용 - 새로 채운 데이터는 이미 현재 형식이므로 데이터 마이그레이션은 실행하지 않음
+    """
+    for version, description, indexes in SCHEMA_MIGRATIONS:
+        started = time.perf_counter()
+        for collection, keys, options in indexes:
+            db[collection].create_index(keys, **options)
+        record_schema_migration(db, version, description, indexes, time.perf_counter() - started)
+    for version, description, _ in DATA_MIGRATIONS:
+        record_data_migration(db, version, description, 0)
+
+def schema_migration_status(db, migrations=SCHEMA_MIGRATIONS, collection="schema_migrations"):
+    """버전별 적용 여부 목록 (데이터 마이그레이션은 DATA_MIGRATIONS, "data_migrations")"""
+    applied = {doc["_id"]: doc for doc in db[collection].find()}
+    return [
+        {
+            "version": version,
+            "description": description,
+            "applied": version in applied,
+            "applied_at": applied[version]["applied_at"].isoformat() if version in applied else None
+        }
+        for version, description, _ in migrations
+    ]
+
+def audit_indexes(db):
+    """코드가 기대하는 인덱스와 실제 인덱스 비교
+
+    missing: 없는 인덱스, mismatched: 이름은 같은데 키/유니크/TTL 이 다른 인덱스,
+    unexpected: 관리 대상 컬렉션에 있지만 코드가 쓰지 않는 인덱스 (삭제는 하지 않고 보고만 함)
+    """
+    expected = expected_indexes()
+    report = {"missing": [], "mismatched": [], "unexpected": []}
+    for collection in sorted({collection for collection, _ in expected}):
+        existing = db[collection].index_information()
+        for name, info in sorted(existing.items()):
+            if name == "_id_":
+                continue
+            actual_keys = [(field, int(direction) if isinstance(direction, float) else direction)
+                           for field, direction in info["key"]]
+            spec = expected.get((collection, name))
+            if spec is None:
+                report["unexpected"].append({"collection": collection, "name": name, "keys": actual_keys})
+                continue
+            keys, options = spec
+            wanted = {"keys": keys, "unique": bool(options.get("unique")),
+                      "expireAfterSeconds": options.get("expireAfterSeconds")}
+            actual = {"keys": actual_keys, "unique": bool(info.get("unique")),
+                      "expireAfterSeconds": info.get("expireAfterSeconds")}
+            if actual != wanted:
+                report["mismatched"].append({"collection": collection, "name": name, "expected": wanted, "actual": actual})
+        for (expected_collection, name), (keys, _) in expected.items():
+            if expected_collection == collection and name not in existing:
+                report["missing"].append({"collection": collection, "name": name, "keys": keys})
+    return report
+
+_schema_migrated_pid = None
+_schema_migrate_retry_at = 0.0
+_schema_migrate_lock = threading.Lock()
+
+@app.before_request
+def ensure_schema_migrations():
+    """SCHEMA_MIGRATE_ON_STARTUP=1 이면 프로세스의 첫 요청에서 인덱스 마이그레이션을 한 번 적용 (실패하면 잠시 뒤 다시 시도)
+
+    데이터 마이그레이션은 여기서 실행하지 않음
+    """
+    global _schema_migrated_pid, _schema_migrate_retry_at
+    if not SCHEMA_MIGRATE_ON_STARTUP or _schema_migrated_pid == os.getpid():
+        return
+    with _schema_migrate_lock:
+        if _schema_migrated_pid == os.getpid() or time.monotonic() < _schema_migrate_retry_at:
+            return
+        try:
+            db = get_db()
+            if db is None:
+                raise RuntimeError("데이터베이스 연결 실패")
+            apply_schema_migrations(db)
+            _schema_migrated_pid = os.getpid()
+        except Exception as e:
+            _schema_migrate_retry_at = time.monotonic() + SCHEMA_MIGRATE_RETRY_SECONDS
+            log_event(db_log, logging.ERROR, "schema_migration_failed", error=str(e))
+
 def initialize_database():
     """데이터베이스 초기화"""
     try:
@@ -167,8 +1360,7 @@ def initialize_database():
                 "last_updated": now,
                 "recheck_count": 0,
                 "first_check_time": None,
-                "recheck_time": None,
-                "notes": "샘플 데이터 - 첫 인식"
+                "recheck_time": None
             },
             {
                 "student_id": 2022322035, 
@@ -182,8 +1374,7 @@ def initialize_database():
                 "last_updated": now,
                 "recheck_count": 0,
                 "first_check_time": None,
-                "recheck_time": None,
-                "notes": "샘플 데이터 - 첫 인식"
+                "recheck_time": None
             },
             {
                 "student_id": 2023205106, 
@@ -197,8 +1388,7 @@ def initialize_database():
                 "last_updated": now,
                 "recheck_count": 0,
                 "first_check_time": None,
-                "recheck_time": None,
-                "notes": "샘플 데이터 - 첫 인식"
+                "recheck_time": None
             },
             {
                 "student_id": 2023321012, 
@@ -212,8 +1402,7 @@ def initialize_database():
                 "last_updated": now,
                 "recheck_count": 0,
                 "first_check_time": None,
-                "recheck_time": None,
-                "notes": "샘플 데이터 - 첫 인식"
+                "recheck_time": None
             },
             {
                 "student_id": 2024405040, 
@@ -227,8 +1416,7 @@ def initialize_database():
                 "last_updated": now,
                 "recheck_count": 0,
                 "first_check_time": None,
-                "recheck_time": None,
-                "notes": "샘플 데이터 - 첫 인식"
+                "recheck_time": None
             }
         ]
         
@@ -236,6 +1424,7 @@ def initialize_database():
         db.students.delete_many({})
         db.weeks.delete_many({})
         db.attendance.delete_many({})
+        db.attendance_events.delete_many({})
         
         # 새 데이터 삽입
         db.students.insert_many(sample_students)
@@ -243,16 +1432,385 @@ def initialize_database():
         db.attendance.insert_many(sample_attendance)
 
         # 인덱스 생성
-        db.attendance.create_index([("student_id", 1), ("week_id", 1)], unique=True)
-        db.attendance.create_index([("expires_at", 1)])
-        db.attendance.create_index([("is_auto_absent_processed", 1)])
+        create_collection_indexes(db)
+
+        # 집계 컬렉션 재생성(응답 캐시도 무효화) + 명단 캐시 무효화
+        rebuild_rollups(db)
+        roster_cache.invalidate(db)
 
-        print("✅ 데이터베이스 초기화 완료 ")
+        log_event(db_log, logging.INFO, "database_initialized")
         return True
     except Exception as e:
-        print(f"데이터베이스 초기화 실패: {e}")
+        db_log.exception("database_initialize_failed")
         return False
 
+# ===== 대량 시드 데이터 =====
+# 운영 규모 재현용 데이터 생성 (initialize_database 의 5명 샘플 대신 사용)
+# 청크마다 seed 에서 파생한 난수를 쓰므로 같은 seed 면 항상 같은 데이터가 만들어지고,
+# 만든 청크는 여러 스레드가 insert_many 로 나눠 넣은 뒤 인덱스/집계를 한 번에 만듦
+SEED_CHUNK_SIZE = int(os.environ.get("SEED_CHUNK_SIZE", "10000"))
+SEED_WORKERS = int(os.environ.get("SEED_WORKERS", "4"))
+SEED_MAX_ROWS = int(os.environ.get("SEED_MAX_ROWS", "2000000"))  # API 로 만들 수 있는 최대 출석 기록 수
+SEED_COLLECTIONS = ("students", "weeks", "attendance", "attendance_events", "attendance_rollups")
+SEED_ADMISSION_YEARS = (2019, 2020, 2021, 2022, 2023, 2024)
+# (학과, 비중)
+SEED_MAJORS = [
+    ("소프트웨어학부", 14), ("컴퓨터공학과", 12), ("정보융합학부", 8), ("로봇학부", 6),
+    ("전자공학과", 10), ("기계공학과", 9), ("화학공학과", 6), ("건축학과", 5),
+    ("경영학부", 12), ("경제학과", 6), ("영어산업학과", 5), ("미디어커뮤니케이션학과", 7)
+]
+# 주차별 스캔 횟수 분포 (0 = 스캔 없음 → 결석, 짝수 = 마지막 스캔 후 타임어택)
+SEED_SCAN_WEIGHTS = [(0, 8), (1, 70), (2, 12), (3, 8), (4, 2)]
+SEED_SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+SEED_NAME_SYLLABLES = "민서지현수준우연은하윤도영예진유채성재희주원태건시아"
+
+def _seed_rng(seed, kind, chunk):
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+def seed_week_starts(weeks, now):
+    """주차별 수업 시작 시각 - 마지막 주차가 한 시간 전에 시작한 이번 주 수업"""
+    current = now - timedelta(hours=1)
+    return {week: current - timedelta(weeks=weeks - week) for week in range(1, weeks + 1)}
+
+def seed_student_id(index):
+    """입학년도 + 일련번호 학번 (index 마다 겹치지 않음)"""
+    year = SEED_ADMISSION_YEARS[index % len(SEED_ADMISSION_YEARS)]
+    return year * 1000000 + index // len(SEED_ADMISSION_YEARS)
+
+def generate_seed_students(seed, chunk, first, count, now):
+    """first 번째부터 count 명의 학생 문서 생성"""
+    rng = _seed_rng(seed, "students", chunk)
+    majors, weights = zip(*SEED_MAJORS)
+    students = []
+    for index in range(first, first + count):
+        student_id = seed_student_id(index)
+        students.append({
+            "student_id": student_id,
+            "name": rng.choice(SEED_SURNAMES) + "".join(rng.choices(SEED_NAME_SYLLABLES, k=2)),
+            "major": rng.choices(majors, weights)[0],
+            "email": f"s{student_id}@school.ac.kr",
+            "phone": f"010-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "created_at": now,
+            "updated_at": now
+        })
+    return students
+
+def generate_seed_attendance(seed, chunk, student_ids, week_starts, now, with_events=False):
+    """학생별 주차 출석 기록 (및 이벤트) 생성 - check_attendance 의 짝/홀 규칙을 따름
+
+    - 재스캔은 항상 직전 스캔 후 TIMELOCK_MINUTES 안에 함 (중간 결석 처리 없음)
+    - 마지막 스캔이 짝수번째면 expires_at 이 남고, 지난 주차의 만료 기록은 cron(5분 주기)이
+      이미 결석 처리한 상태로, 이번 주차는 아직 미처리(대기/만료) 상태로 만듦
+    """
+    rng = _seed_rng(seed, "attendance", chunk)
+    scan_counts, scan_weights = zip(*SEED_SCAN_WEIGHTS)
+    current_week = max(week_starts)
+    weeks = [(week_id, start, start.strftime("%Y-%m-%d")) for week_id, start in week_starts.items()]
+    records = []
+    events = []
+    for student_id in student_ids:
+        for (week_id, start, date), count in zip(weeks, rng.choices(scan_counts, scan_weights, k=len(weeks))):
+            if count == 0:
+                records.append({
+                    "student_id": student_id, "week_id": week_id, "status": "결석", "date": date,
+                    "timestamp": start, "is_auto_absent_processed": False, "last_updated": start,
+                    "recheck_count": 0
+                })
+                continue
+
+            scans = [start + timedelta(seconds=rng.randint(0, 600))]
+            for _ in range(count - 1):
+                scans.append(scans[-1] + timedelta(seconds=rng.randint(60, TIMELOCK_MINUTES * 60 - 60)))
+            last = scans[-1]
+            record = {
+                "student_id": student_id, "week_id": week_id, "status": "출석", "date": date,
+                "timestamp": last, "is_auto_absent_processed": False, "last_updated": last,
+                "recheck_count": count, "first_check_time": scans[0],
+                "recheck_time": last if count > 1 else None
+            }
+            if count % 2 == 0:
+                record["expires_at"] = last + timedelta(minutes=TIMELOCK_MINUTES)
+                if week_id != current_week and record["expires_at"] < now:
+                    record["status"] = "결석"
+                    record["is_auto_absent_processed"] = True
+                    record["auto_processed_at"] = record["expires_at"] + timedelta(seconds=rng.randint(0, 300))
+            records.append(record)
+
+            if with_events:
+                status = None
+                for number, at in enumerate(scans, 1):
+                    expires_at = at + timedelta(minutes=TIMELOCK_MINUTES) if number % 2 == 0 else None
+                    events.append(make_attendance_event("scan", student_id, week_id, at, status, "출석", number, expires_at))
+                    status = "출석"
+                if record["is_auto_absent_processed"]:
+                    events.append(make_attendance_event(
+                        "auto_absent", student_id, week_id, record["auto_processed_at"], "출석", "결석",
+                        count, record["expires_at"]
+                    ))
+    return records, events
+
+def seed_database(db, students, weeks, seed=0, with_events=False, reset=False,
+                  chunk_size=SEED_CHUNK_SIZE, workers=SEED_WORKERS):
+    """학생 students 명 × weeks 주차 데이터를 넣고 인덱스/집계를 만든 뒤 요약 반환
+
+    reset 이면 기존 데이터를 지우고 다시 만들며, 아니면 학생/출석이 비어 있을 때만 넣음 (ValueError).
+    주차는 week_id 로 upsert 하므로 이미 있는 주차는 날짜만 갱신됨.
+    인덱스는 적재가 끝난 뒤 만들어 삽입마다 인덱스를 갱신하는 비용을 줄임
+    """
+    started = time.perf_counter()
+    now = datetime.now()
+    if reset:
+        for name in SEED_COLLECTIONS:
+            db.drop_collection(name)
+    elif db.students.estimated_document_count() or db.attendance.estimated_document_count():
+        raise ValueError("이미 학생/출석 데이터가 있습니다 (reset 으로 지우고 다시 만들 수 있음)")
+
+    week_starts = seed_week_starts(weeks, now)
+    # init-db 가 넣은 샘플 주차가 남아 있을 수 있으므로 week_id 로 덮어써 중복을 만들지 않음
+    db.weeks.bulk_write([
+        UpdateOne({"week_id": week}, {"$set": {
+            "week_name": f"{week}주차", "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": (start + timedelta(days=6)).strftime("%Y-%m-%d")
+        }}, upsert=True)
+        for week, start in week_starts.items()
+    ], ordered=False)
+
+    counts = {"students": 0, "attendance": 0, "attendance_events": 0}
+    students_per_chunk = max(1, chunk_size // weeks)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = []
+        for chunk, first in enumerate(range(0, students, students_per_chunk)):
+            roster = generate_seed_students(seed, chunk, first, min(students_per_chunk, students - first), now)
+            records, events = generate_seed_attendance(
+                seed, chunk, [student["student_id"] for student in roster], week_starts, now, with_events
+            )
+            for name, docs in (("students", roster), ("attendance", records), ("attendance_events", events)):
+                if docs:
+                    counts[name] += len(docs)
+                    in_flight.append(pool.submit(db[name].insert_many, docs, ordered=False))
+            # 생성이 삽입보다 빠를 때 메모리가 계속 늘지 않도록 대기 중인 청크 수를 제한
+            while len(in_flight) > workers * 2:
+                in_flight.pop(0).result()
+        for future in in_flight:
+            future.result()
+    loaded_seconds = time.perf_counter() - started
+
+    create_collection_indexes(db)
+    rebuild_rollups(db)
+    roster_cache.invalidate(db)
+
+    summary = dict(counts, weeks=weeks, seed=seed, load_seconds=round(loaded_seconds, 2),
+                   total_seconds=round(time.perf_counter() - started, 2))
+    log_event(db_log, logging.INFO, "database_seeded", **summary)
+    return summary
+
+# ===== 응답 캐시 (ETag) =====
+# 조회 API 의 ETag 는 경로/쿼리와 의존 컬렉션 버전으로 만들어서 데이터가 그대로면
+# If-None-Match 에 DB 조회 없이 304 로 응답하고, 본문은 백엔드에 보관해 재사용함
+# RESPONSE_CACHE_BACKEND: memory(기본, 프로세스 내 LRU) | mongo(인스턴스 간 공유) | none
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+# 키에 쿼리 문자열이 들어가 클라이언트가 항목을 마음대로 늘릴 수 있으므로 보관 바이트 합계도 제한함
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# 이보다 큰 본문은 보관하지 않음 (ETag 304 는 그대로 동작)
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+class MemoryResponseCache:
+    """프로세스 내 LRU 응답 캐시 - 항목 수와 본문 바이트 합계가 한도를 넘으면 오래된 것부터 버림"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES, max_bytes=RESPONSE_CACHE_MAX_BYTES,
+                 max_entry_bytes=RESPONSE_CACHE_MAX_ENTRY_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, db, key, etag):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, db, key, etag, body):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            if len(body) > self.max_entry_bytes:
+                return
+            self._entries[key] = (etag, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+class MongoResponseCache:
+    """response_cache 컬렉션에 보관하는 공유 응답 캐시 (stored_at TTL 인덱스로 만료)"""
+
+    def __init__(self, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._indexed = False
+
+    def get(self, db, key, etag):
+        doc = db.response_cache.find_one({"_id": key, "etag": etag}, {"body": 1})
+        return bytes(doc["body"]) if doc else None
+
+    def set(self, db, key, etag, body):
+        if len(body) > RESPONSE_CACHE_MAX_ENTRY_BYTES:
+            return
+        if not self._indexed:
+            db.response_cache.create_index([("stored_at", 1)], expireAfterSeconds=self.ttl_seconds)
+            self._indexed = True
+        db.response_cache.replace_one(
+            {"_id": key},
+            {"etag": etag, "body": body, "stored_at": datetime.now()},
+            upsert=True
+        )
+
+def make_response_cache(backend):
+    if backend == "mongo":
+        return MongoResponseCache()
+    if backend == "none":
+        return None
+    return MemoryResponseCache()
+
+response_cache = make_response_cache(RESPONSE_CACHE_BACKEND)
+
+def cached_response(*collections):
+    """조회 API 응답을 컬렉션 버전 기반 ETag 로 캐시 (성공 응답만 보관)"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            db = get_db()
+            if db is None:
+                return view(*args, **kwargs)
+            try:
+                versions = collection_versions.snapshot(db)
+            except Exception:
+                return view(*args, **kwargs)
+
+            key = request.path + "?" + urllib.parse.urlencode(sorted(request.args.items(multi=True)))
+            tag = hashlib.sha1(
+                (key + "|" + ",".join(f"{name}={versions.get(name, 0)}" for name in collections)).encode()
+            ).hexdigest()
+
+            if request.if_none_match.contains(tag):
+                response = app.response_class(status=304)
+            else:
+                body = response_cache.get(db, key, tag) if response_cache is not None else None
+                if body is not None:
+                    response = app.response_class(body, mimetype="application/json")
+                else:
+                    response = app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if response_cache is not None:
+                        response_cache.set(db, key, tag, response.get_data())
+            response.set_etag(tag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
+
+# ===== 응답 직렬화 =====
+# 행이 많은 목록 응답은 jsonify 대신 행 모양별 인코더(encode_*)로 필요한 필드만 담은 dict 를 만들고
+# json_response 로 한 번에 직렬화함. orjson 이 있으면 datetime 을 그대로 넘겨 C 코드에서 ISO 8601 로 바꾸고
+# 키 정렬을 하지 않으므로 jsonify 와 바이트는 다르지만 내용은 같음
+
+# 학생 행에 필요한 필드만 읽음
+STUDENT_ROW_PROJECTION = {"student_id": 1, "name": 1, "major": 1, "email": 1, "phone": 1, "created_at": 1, "updated_at": 1}
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"JSON 으로 바꿀 수 없는 값: {type(value).__name__}")
+
+def dumps_json(payload):
+    """응답 본문 bytes (UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=json_default)
+    # 표준 json 은 ASCII 로 출력하는 쪽이 빠름 (jsonify 와 같은 이스케이프)
+    return json.dumps(payload, separators=(",", ":"), default=json_default).encode("ascii")
+
+def json_response(payload, status=200):
+    return app.response_class(dumps_json(payload), status=status, mimetype="application/json")
+
+def json_datetime(value):
+    """행의 datetime 필드 값 (없으면 "") - 표준 json 을 쓸 때만 미리 문자열로 바꿈 (행마다 default 훅을 부르지 않도록)"""
+    if not value:
+        return ""
+    return value if orjson is not None else value.isoformat()
+
+def encode_student_row(student):
+    """학생 목록/단건 응답 행"""
+    get = student.get
+    return {
+        "id": str(student["_id"]),
+        "student_id": student["student_id"],
+        "name": student["name"],
+        "major": student["major"],
+        "email": get("email", ""),
+        "phone": get("phone", ""),
+        "created_at": json_datetime(get("created_at")),
+        "updated_at": json_datetime(get("updated_at"))
+    }
+
+def encode_roster_row(number, student, is_attendance):
+    """주차 명단(GET /api/attendance) 응답 행"""
+    return {
+        "number": number,
+        "name": student["name"],
+        "student_id": student["student_id"],
+        "department": student["major"],
+        "is_attendance": is_attendance
+    }
+
+def encode_attendance_row(record, student):
+    """주차별 출석 기록 응답 행 (student 는 명단 문서, 없으면 빈 dict)"""
+    get = record.get
+    return {
+        "id": str(record["_id"]),
+        "student_id": record["student_id"],
+        "student_name": student.get("name", "Unknown"),
+        "department": student.get("major", "Unknown"),
+        "status": record["status"],
+        "date": get("date", ""),
+        "notes": get("notes", ""),
+        "timestamp": json_datetime(get("timestamp"))
+    }
+
+def encode_student_attendance_row(record):
+    """학생별 출석 기록 응답 행"""
+    get = record.get
+    return {
+        "id": str(record["_id"]),
+        "week_id": record["week_id"],
+        "status": record["status"],
+        "date": get("date", ""),
+        "notes": get("notes", ""),
+        "timestamp": json_datetime(get("timestamp"))
+    }
+
+def encode_matrix(student_ids, names, week_ids, matrix):
+    """출석 매트릭스 응답 data (열 형식)"""
+    return {
+        "students": student_ids,
+        "names": names,
+        "weeks": week_ids,
+        "statuses": matrix["codes"],
+        "legend": matrix["legend"],
+        "row_totals": matrix["row_totals"],
+        "column_totals": matrix["column_totals"],
+        "status_totals": matrix["status_totals"]
+    }
+
 # ===== 시스템 관리 API =====
 @app.route('/')
 def home():
@@ -312,83 +1870,194 @@ def init_db():
             "message": "데이터베이스 초기화 실패"
         }), 500
 
+@app.route('/api/seed', methods=['POST'])
+def seed_data():
+    """대량 시드 데이터 생성
+
+    요청: {"students": 50000, "weeks": 16, "seed": 42, "events": false, "reset": false}
+    reset 이 아니면 학생/출석이 비어 있을 때만 넣음
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        students = int(data.get('students', 1000))
+        weeks = int(data.get('weeks', 16))
+        seed = int(data.get('seed', 0))
+    except (TypeError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": "students, weeks, seed 는 숫자여야 합니다"
+        }), 400
+    if students < 1 or weeks < 1:
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": "students, weeks 는 1 이상이어야 합니다"
+        }), 400
+    if students * weeks > SEED_MAX_ROWS:
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": f"한 번에 최대 {SEED_MAX_ROWS}건(students × weeks)까지 만들 수 있습니다"
+        }), 400
+    
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
+        summary = seed_database(db, students, weeks, seed,
+                                with_events=bool(data.get('events')), reset=bool(data.get('reset')))
+    except ValueError as e:
+        return jsonify({"success": False, "error": "VALIDATION_ERROR", "message": str(e)}), 400
+    except Exception as e:
+        db_log.exception("database_seed_failed")
+        return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
+    
+    return jsonify({
+        "success": True,
+        "message": "✅ 시드 데이터 생성 완료",
+        "data": summary
+    })
+
 # ===== 학생 관리 API =====
+# 정렬 가능한 필드 (모두 (필드, _id) 인덱스가 있음)
+STUDENT_SORT_FIELDS = ("student_id", "name", "major")
+STUDENT_COUNT_MODES = ("exact", "estimated", "cached", "none")
+MAX_STUDENT_PAGE_SIZE = 500
+
+def encode_student_cursor(sort_field, order, student):
+    """마지막 행의 (정렬 값, _id)를 불투명한 커서 문자열로 인코딩"""
+    payload = json.dumps({"s": sort_field, "o": order, "v": student.get(sort_field), "id": str(student["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_student_cursor(cursor, sort_field, order):
+    """커서 디코딩 - 형식이 틀리거나 정렬 조건이 다르면 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("유효하지 않은 커서입니다")
+    if payload.get("s") != sort_field or payload.get("o") != order:
+        raise ValueError("커서의 정렬 조건이 요청과 다릅니다")
+    return payload.get("v"), last_id
+
+def build_keyset_query(sort_field, sort_direction, last_value, last_id):
+    """(정렬 값, _id) 이후의 행만 고르는 조건 - 인덱스 범위 탐색으로 처리됨"""
+    op = "$gt" if sort_direction == 1 else "$lt"
+    return {"$or": [
+        {sort_field: {op: last_value}},
+        {sort_field: last_value, "_id": {op: last_id}}
+    ]}
+
+def count_students(db, mode):
+    """학생 수 - exact: 정확한 수, estimated: 컬렉션 메타데이터, cached: 집계(roster) 문서, none: 생략"""
+    if mode == "exact":
+        return db.students.count_documents({})
+    if mode == "estimated":
+        return db.students.estimated_document_count()
+    if mode == "cached":
+        roster = db.attendance_rollups.find_one({"_id": "roster"}, {"total": 1})
+        return roster.get("total", 0) if roster else db.students.estimated_document_count()
+    return None
+
 @app.route('/api/students', methods=['GET'])
+@cached_response("students")
 def get_students():
-    """모든 학생 조회"""
+    """모든 학생 조회
+
+    - 커서 방식: ?after=<next_cursor> 로 다음 페이지 (깊은 페이지도 일정한 비용)
+    - 기존 방식: ?page=N (skip 사용, 호환용) - 모든 응답에 next_cursor 가 포함됨
+    - ?count=exact|estimated|cached|none 으로 전체 수 계산 방식 선택
+    """
     try:
         db = get_db()
         if db is None:
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         # 쿼리 파라미터 처리
-        page = request.args.get('page', 1, type=int)
+        after = request.args.get('after')
+        # 커서가 없으면 기존 page 방식과 같은 응답 (page 기본값 1)
+        page = None if after else request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 50, type=int)
         sort_field = request.args.get('sort', 'student_id')
         order = request.args.get('order', 'asc')
+        # 기존 page 방식은 total_pages 를 위해 정확한 수를 기본으로 함
+        count_mode = request.args.get('count', 'exact' if page is not None else 'estimated')
+        
+        if sort_field not in STUDENT_SORT_FIELDS:
+            return jsonify({
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": f"정렬 필드는 {', '.join(STUDENT_SORT_FIELDS)} 중 하나여야 합니다"
+            }), 400
+        if count_mode not in STUDENT_COUNT_MODES:
+            return jsonify({
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": f"count 는 {', '.join(STUDENT_COUNT_MODES)} 중 하나여야 합니다"
+            }), 400
+        limit = max(1, min(limit, MAX_STUDENT_PAGE_SIZE))
         
         # 정렬 방향 설정
         sort_direction = 1 if order == 'asc' else -1
+        order = 'asc' if sort_direction == 1 else 'desc'
         
         # 페이지네이션
-        skip = (page - 1) * limit
+        query = {}
+        skip = 0
+        if after:
+            try:
+                last_value, last_id = decode_student_cursor(after, sort_field, order)
+            except ValueError as e:
+                return jsonify({"success": False, "error": "VALIDATION_ERROR", "message": str(e)}), 400
+            query = build_keyset_query(sort_field, sort_direction, last_value, last_id)
+        else:
+            skip = (max(page, 1) - 1) * limit
         
-        # 학생 데이터 조회
-        students = list(db.students.find()
-                       .sort(sort_field, sort_direction)
+        # 학생 데이터 조회 (다음 페이지 유무 확인을 위해 한 건 더 읽음)
+        students = list(db.students.find(query, STUDENT_ROW_PROJECTION)
+                       .sort([(sort_field, sort_direction), ("_id", sort_direction)])
                        .skip(skip)
-                       .limit(limit))
+                       .limit(limit + 1))
+        has_more = len(students) > limit
+        students = students[:limit]
         
-        total_count = db.students.count_documents({})
+        total_count = count_students(db, count_mode)
         
-        # 결과 변환
-        result = []
-        for student in students:
-            student_data = {
-                "id": str(student["_id"]),
-                "student_id": student["student_id"],
-                "name": student["name"],
-                "major": student["major"],
-                "email": student.get("email", ""),
-                "phone": student.get("phone", ""),
-                "created_at": student.get("created_at", "").isoformat() if student.get("created_at") else "",
-                "updated_at": student.get("updated_at", "").isoformat() if student.get("updated_at") else ""
-            }
-            result.append(student_data)
+        pagination = {
+            "limit": limit,
+            "sort": sort_field,
+            "order": order,
+            "has_more": has_more,
+            "next_cursor": encode_student_cursor(sort_field, order, students[-1]) if has_more else None,
+            "count_mode": count_mode,
+            "total_count": total_count
+        }
+        if page is not None:
+            pagination["page"] = page
+            pagination["total_pages"] = (total_count + limit - 1) // limit if total_count is not None else None
         
-        return jsonify({
-            "success": True, 
-            "data": result,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total_count": total_count,
-                "total_pages": (total_count + limit - 1) // limit
-            },
-            "timestamp": datetime.now().isoformat()
+        return json_response({
+            "success": True,
+            "data": [encode_student_row(student) for student in students],
+            "pagination": pagination,
+            "timestamp": datetime.now()
         })
     except Exception as e:
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
 @app.route('/api/students/<student_id>', methods=['GET'])
+@with_student_id
+@cached_response("students")
 def get_student(student_id):
     """특정 학생 조회"""
     try:
         db = get_db()
         if db is None:
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
-
-        # student_id를 숫자로 변환
-        try:
-            student_id_int = int(student_id)
-        except ValueError:
-            return jsonify({
-                "success": False,
-                "error": "VALIDATION_ERROR",
-                "message": "학번은 숫자여야 합니다"
-            }), 400
-            
-        student = db.students.find_one({"student_id": student_id})
+        
+        student = roster_cache.get(db, student_id)
         if not student:
             return jsonify({
                 "success": False,
@@ -396,20 +2065,9 @@ def get_student(student_id):
                 "message": "학생을 찾을 수 없습니다"
             }), 404
         
-        student_data = {
-            "id": str(student["_id"]),
-            "student_id": student["student_id"],
-            "name": student["name"],
-            "major": student["major"],
-            "email": student.get("email", ""),
-            "phone": student.get("phone", ""),
-            "created_at": student.get("created_at", "").isoformat() if student.get("created_at") else "",
-            "updated_at": student.get("updated_at", "").isoformat() if student.get("updated_at") else ""
-        }
-        
-        return jsonify({
+        return json_response({
             "success": True,
-            "data": student_data
+            "data": encode_student_row(student)
         })
     except Exception as e:
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
@@ -440,7 +2098,8 @@ def create_student():
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         # 중복 학번 확인
-        existing_student = db.students.find_one({"student_id": data['student_id']})
+        student_id = parse_student_id(data['student_id'])
+        existing_student = db.students.find_one({"student_id": student_id})
         if existing_student:
             return jsonify({
                 "success": False,
@@ -450,7 +2109,7 @@ def create_student():
         
         # 학생 데이터 생성
         student_data = {
-            "student_id": data['student_id'],
+            "student_id": student_id,
             "name": data['name'],
             "major": data['major'],
             "email": data.get('email', ''),
@@ -461,6 +2120,12 @@ def create_student():
         
         result = db.students.insert_one(student_data)
         
+        roster_cache.invalidate(db)
+        
+        # 집계 반영 (남아 있던 출석 기록이 있으면 학과 집계로 옮김)
+        apply_rollup_deltas(db, {}, roster_delta=1)
+        move_student_major_rollup(db, student_data['student_id'], None, student_data['major'])
+        
         return jsonify({
             "success": True,
             "message": "학생이 추가되었습니다",
@@ -472,7 +2137,194 @@ def create_student():
     except Exception as e:
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
+# ===== 학생 일괄 등록 =====
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "8"))
+MAX_IMPORT_ERRORS = 1000
+IMPORT_FIELDS = ("student_id", "name", "major", "email", "phone")
+
+def iter_import_rows(stream, import_format):
+    """요청 본문을 한 줄씩 읽어 (행 번호, 행 dict 또는 None, 파싱 오류) 반환 - 행 번호는 헤더/빈 줄 제외 1부터"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if import_format == "csv":
+        for line_no, row in enumerate(csv.DictReader(text), 1):
+            yield line_no, {key: (value or "").strip() for key, value in row.items() if key in IMPORT_FIELDS}, None
+        return
+    line_no = 0
+    for line in text:
+        if not line.strip():
+            continue
+        line_no += 1
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("JSON 객체가 아닙니다")
+        except ValueError as e:
+            yield line_no, None, f"JSON 형식 오류: {e}"
+            continue
+        yield line_no, {key: row[key] for key in IMPORT_FIELDS if key in row}, None
+
+def import_student_batch(db, batch, now):
+    """검증된 행 묶음을 학번 기준 upsert 로 한 번에 반영
+
+    batch: [(행 번호, 학생 dict), ...] - 반환값: (추가 수, 수정 수, 행 오류 목록)
+    """
+    student_ids = [student["student_id"] for _, student in batch]
+    previous_majors = {
+        student["student_id"]: student.get("major")
+        for student in db.students.find({"student_id": {"$in": student_ids}}, {"student_id": 1, "major": 1})
+    }
+    operations = [
+        UpdateOne(
+            {"student_id": student["student_id"]},
+            {
+                "$set": {**student, "updated_at": now},
+                # create_student 와 같이 email/phone 기본값은 빈 문자열
+                "$setOnInsert": {"created_at": now, **{field: "" for field in ("email", "phone") if field not in student}}
+            },
+            upsert=True
+        )
+        for _, student in batch
+    ]
+    errors = []
+    failed_indexes = set()
+    try:
+        result = db.students.bulk_write(operations, ordered=False)
+        upserted_count = result.upserted_count
+        modified_count = result.matched_count
+    except BulkWriteError as e:
+        for write_error in e.details["writeErrors"]:
+            failed_indexes.add(write_error["index"])
+            line_no, student = batch[write_error["index"]]
+            errors.append({
+                "line": line_no,
+                "student_id": student["student_id"],
+                "error": "DATABASE_ERROR",
+                "message": write_error.get("errmsg", "")
+            })
+        upserted_count = e.details["nUpserted"]
+        modified_count = e.details["nMatched"]
+
+    # 집계 반영 - 새 학생은 명단 수 증가, 학과가 바뀐 학생은 학과별 집계 이동
+    moves = []
+    for index, (_, student) in enumerate(batch):
+        if index in failed_indexes:
+            continue
+        moves.append((student["student_id"], previous_majors.get(student["student_id"]), student["major"]))
+    apply_rollup_deltas(db, {}, roster_delta=upserted_count)
+    move_student_major_rollups(db, moves)
+    return upserted_count, modified_count, errors
+
+@app.route('/api/students/import', methods=['POST'])
+def import_students():
+    """학생 일괄 등록 (CSV 또는 NDJSON 스트림, 학번 기준 upsert)
+
+    ?format=csv|ndjson (없으면 Content-Type 으로 판단), ?offset=N 이면 앞의 N행을 건너뜀.
+    시간 예산을 넘기면 멈추고 next_offset 을 돌려주므로 같은 파일을 offset 만 바꿔 다시 보내면 이어서 처리함
+    """
+    import_format = request.args.get('format') or ("ndjson" if "ndjson" in (request.content_type or "") else "csv")
+    if import_format not in ("csv", "ndjson"):
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": "format 은 csv, ndjson 중 하나여야 합니다"
+        }), 400
+    offset = request.args.get('offset', 0, type=int)
+    if offset < 0:
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": "offset 은 0 이상이어야 합니다"
+        }), 400
+    
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
+        db.students.create_index([("student_id", 1)], unique=True)
+        
+        now = datetime.now()
+        deadline = time.monotonic() + IMPORT_TIME_BUDGET_SECONDS
+        errors = []
+        failed_count = 0
+        inserted_count = 0
+        updated_count = 0
+        next_offset = offset
+        completed = True
+        batch = []
+        seen_ids = set()
+        
+        def flush():
+            nonlocal inserted_count, updated_count, failed_count, batch, seen_ids
+            if batch:
+                upserted, matched, batch_errors = import_student_batch(db, batch, now)
+                inserted_count += upserted
+                updated_count += matched
+                failed_count += len(batch_errors)
+                errors.extend(batch_errors[:MAX_IMPORT_ERRORS + 1 - len(errors)])
+            batch = []
+            seen_ids = set()
+        
+        # 중간 묶음 쓰기가 실패해도 이미 반영된 묶음은 남으므로 명단 캐시는 항상 무효화
+        try:
+            for line_no, row, parse_error in iter_import_rows(request.stream, import_format):
+                if line_no <= offset:
+                    continue
+                if row is not None:
+                    # 행 하나의 예상치 못한 오류로 나머지 행과 캐시 무효화가 중단되지 않도록 행 오류로 기록
+                    try:
+                        row_errors = validate_student_data(row)
+                        if not row_errors:
+                            row["student_id"] = parse_student_id(row["student_id"])
+                            if row["student_id"] in seen_ids:
+                                row_errors = ["같은 묶음 안에서 학번이 중복됩니다"]
+                    except Exception as e:
+                        row_errors = [f"행을 검증할 수 없습니다: {e}"]
+                else:
+                    row_errors = [parse_error]
+            
+                if row_errors:
+                    failed_count += 1
+                    if len(errors) <= MAX_IMPORT_ERRORS:
+                        errors.append({
+                            "line": line_no,
+                            "student_id": row.get("student_id") if row else None,
+                            "error": "VALIDATION_ERROR",
+                            "message": ", ".join(row_errors)
+                        })
+                else:
+                    seen_ids.add(row["student_id"])
+                    batch.append((line_no, row))
+                next_offset = line_no
+            
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    flush()
+                    if time.monotonic() >= deadline:
+                        completed = False
+                        break
+            flush()
+        finally:
+            if inserted_count or updated_count:
+                roster_cache.invalidate(db)
+        
+        return jsonify({
+            "success": True,
+            "message": "학생 일괄 등록 완료" if completed else "시간 예산을 넘겨 중간에 멈춤 - next_offset 부터 다시 보내 주세요",
+            "data": {
+                "completed": completed,
+                "next_offset": next_offset,
+                "inserted_count": inserted_count,
+                "updated_count": updated_count,
+                "failed_count": failed_count,
+                "errors": errors[:MAX_IMPORT_ERRORS],
+                "errors_truncated": len(errors) > MAX_IMPORT_ERRORS
+            }
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
+
 @app.route('/api/students/<student_id>', methods=['PUT'])
+@with_student_id
 def update_student(student_id):
     """학생 정보 수정"""
     try:
@@ -508,12 +2360,19 @@ def update_student(student_id):
         
         # 업데이트 데이터 준비
         update_data = {**data, "updated_at": datetime.now()}
+        if "student_id" in data:
+            update_data["student_id"] = parse_student_id(data["student_id"])
         
         # 학생 정보 업데이트
         db.students.update_one(
             {"student_id": student_id},
             {"$set": update_data}
         )
+        roster_cache.invalidate(db)
+        
+        # 학과가 바뀌면 학과별 집계도 옮김
+        if "major" in data:
+            move_student_major_rollup(db, existing_student["student_id"], existing_student.get("major"), data["major"])
         
         return jsonify({
             "success": True,
@@ -523,6 +2382,7 @@ def update_student(student_id):
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
 @app.route('/api/students/<student_id>', methods=['DELETE'])
+@with_student_id
 def delete_student(student_id):
     """학생 삭제"""
     try:
@@ -544,10 +2404,18 @@ def delete_student(student_id):
         
         # 학생 삭제
         db.students.delete_one({"student_id": student_id})
+        roster_cache.invalidate(db)
+        move_student_major_rollup(db, existing_student["student_id"], existing_student.get("major"), None)
+        apply_rollup_deltas(db, {}, roster_delta=-1)
         
         # 출석 기록도 삭제
         if delete_attendance:
-            db.attendance.delete_many({"student_id": student_id})
+            deltas = {}
+            for record in db.attendance.find({"student_id": student_id}, {"student_id": 1, "week_id": 1, "status": 1}):
+                add_status_change(deltas, record["student_id"], record["week_id"], None, record["status"], None)
+            if db.attendance.delete_many({"student_id": student_id}).deleted_count:
+                collection_versions.bump(db, "attendance")
+            apply_rollup_deltas(db, deltas)
         
         return jsonify({
             "success": True,
@@ -557,7 +2425,30 @@ def delete_student(student_id):
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
 # ===== 출석 관리 API =====
+def build_week_roster_pipeline(week):
+    """학생 명단(학번순)과 해당 주차 출석 상태를 조인하는 집계 파이프라인"""
+    return [
+        {"$sort": {"student_id": 1}},
+        {"$project": {"_id": 0, "name": 1, "student_id": 1, "major": 1}},
+        {"$lookup": {
+            "from": "attendance",
+            "let": {"sid": "$student_id"},
+            "pipeline": [
+                # (student_id, week_id) 유니크 인덱스로 학생당 한 건만 조회
+                {"$match": {"week_id": week, "$expr": {"$eq": ["$student_id", "$$sid"]}}},
+                {"$project": {"_id": 0, "status": 1}},
+                {"$limit": 1}
+            ],
+            "as": "attendance"
+        }},
+        {"$project": {
+            "name": 1, "student_id": 1, "major": 1,
+            "status": {"$arrayElemAt": ["$attendance.status", 0]}
+        }}
+    ]
+
 @app.route('/api/attendance', methods=['GET'])
+@cached_response("students", "attendance")
 def get_attendance():
     """출석 기록 조회 - 프론트엔드 맞춤형 형식"""
     try:
@@ -568,40 +2459,41 @@ def get_attendance():
         # 쿼리 파라미터 처리
         week = request.args.get('week', 1, type=int)  # 기본값 1주차
         
-        # 학생 데이터 조회
-        students = list(db.students.find().sort("student_id", 1))
-        
-        # 해당 주차 출석 데이터 조회
-        attendance_data = list(db.attendance.find({"week_id": week}))
+        roster = roster_cache.roster(db)
+        if roster is not None:
+            # 캐시된 정렬 명단 + 해당 주차 상태만 조회해 학번 키로 조인
+            status_by_student = {
+                record["student_id"]: record["status"]
+                for record in db.attendance.find({"week_id": week}, {"_id": 0, "student_id": 1, "status": 1})
+            }
+            rows = (
+                (number, student, status_by_student.get(student["student_id"]))
+                for number, student in roster["rows"]
+            )
+        else:
+            # 명단이 캐시 한도보다 크면 서버에서 한 번에 조인 (필요한 필드만 투영)
+            rows = (
+                (number, row, row.get("status"))
+                for number, row in enumerate(db.students.aggregate(build_week_roster_pipeline(week)), 1)
+            )
         
-        # 프론트엔드 맞춤형 데이터 변환
+        # 프론트엔드 맞춤형 데이터 변환 + 통계를 한 번의 순회로 계산
         result = []
-        for index, student in enumerate(students, 1):
-            # 해당 학생의 출석 기록 찾기
-            attendance_record = next(
-                (a for a in attendance_data if a["student_id"] == student["student_id"]),
-                None
-            )
-            
+        present_count = 0
+        for number, student, status in rows:
             # 출석 상태 변환 (출석=true, 그외=false)
-            is_attendance = attendance_record["status"] == "출석" if attendance_record else False
+            is_attendance = status == "출석"
+            if is_attendance:
+                present_count += 1
             
-            # 요청하신 형식으로 변환
-            student_data = {
-                "number": index,  # 번호 (1부터 시작)
-                "name": student["name"],
-                "student_id": int(student["student_id"]),  # 숫자로 변환
-                "department": student["major"],
-                "is_attendance": is_attendance
-            }
-            result.append(student_data)
+            # 요청하신 형식으로 변환 (번호는 1부터 시작)
+            result.append(encode_roster_row(number, student, is_attendance))
         
         # 통계 계산
         total_students = len(result)
-        present_count = sum(1 for student in result if student["is_attendance"])
         attendance_rate = round((present_count / total_students) * 100, 2) if total_students > 0 else 0
         
-        return jsonify({
+        return json_response({
             "success": True,
             "data": result,
             "week": week,
@@ -611,7 +2503,7 @@ def get_attendance():
                 "absent_count": total_students - present_count,
                 "attendance_rate": attendance_rate
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         })
         
     except Exception as e:
@@ -641,225 +2533,623 @@ def check_attendance():
         if db is None:
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
-        student = db.students.find_one({"student_id": data['student_id']})
+        student_id = parse_student_id(data['student_id'])
+        student = roster_cache.get(db, student_id)
         if not student:
             return jsonify({
                 "success": False,
                 "error": "STUDENT_NOT_FOUND",
-                "message": f"학생을 찾을 수 없습니다 (학번: {data['student_id']})"
+                "message": f"학생을 찾을 수 없습니다 (학번: {student_id})"
             }), 404
 
         now = datetime.now()
         week_id = int(data['week'])
-        student_id = int(data['student_id'])
-        
-        # 기존 기록 확인
-        existing_record = db.attendance.find_one({
-            "student_id": student_id,
-            "week_id": week_id
-        })
-        
-        # ★★★ 재인식 횟수 계산 ★★★
-        if existing_record:
-            # 기존 기록이 있으면 재인식
-            current_count = existing_record.get("recheck_count", 0)
-            recheck_count = current_count + 1
-            first_check_time = existing_record.get("first_check_time")
-            if first_check_time is None:
-                first_check_time = now
-            
-	        is_first_check = False
-        else:
-            # 첫 인식
-            recheck_count = 1  # 첫 인식 완료 = 1
-            first_check_time = now
-            is_first_check = True
-        
-        # ★★★ 수정된 타임어택 로직 ★★★
-        # recheck_count 기준:
-        # 1: 첫 인식 완료 → 타임어택 ❌ 없음
-        # 2: 재인식 1회 → 타임어택 ⏰ 있음 (짝수, 15분)
-        # 3: 재인식 2회 → 타임어택 ❌ 없음 (홀수)
-        # 4: 재인식 3회 → 타임어택 ⏰ 있음 (짝수, 15분)
-        # 5: 재인식 4회 → 타임어택 ❌ 없음 (홀수)
         
+        # ★★★ 원자적 출석 체크 (조회 + 재인식 횟수 + 타임어택을 한 번의 왕복으로) ★★★
+        existing_record = apply_checkin(db, student_id, week_id, now)
+        checkin = compute_checkin_state(existing_record, now)
         status = "출석"
         
-        if recheck_count == 1:
-            # 첫 인식 완료
-            message = "출석이 체크되었습니다 (첫 인식)"
-            expires_at = None
-            has_time_limit = False
-            should_set_expires_at = False
-        elif recheck_count % 2 == 0:  # 수정: 짝수일 때 타임어택 있음 (2,4,6...)
-            # 짝수번째 재인식 → 타임어택 있음
-            message = f"재인식되었습니다 (재인식 #{recheck_count}회) - 🚨 15분 내 재인식 필요!"
-            expires_at = now + timedelta(minutes=15)
-            has_time_limit = True
-            should_set_expires_at = True
-        else:  # 홀수일 때 (3,5,7...)
-            # 홀수번째 재인식 → 타임어택 없음
-            message = f"재인식되었습니다 (재인식 #{recheck_count}회) - 타임어택 해제됨"
-            expires_at = None
-            has_time_limit = False
-            should_set_expires_at = False
+        # 집계 반영 (이미 출석 상태였던 재인식은 변경 없음)
+        rollup_deltas = {}
+        add_status_change(
+            rollup_deltas, student_id, week_id, student.get("major"),
+            existing_record.get("status") if existing_record else None, status
+        )
+        apply_rollup_deltas(db, rollup_deltas, written_weeks=(week_id,))
+        collection_versions.expire()
+        record_attendance_events(db, [make_attendance_event(
+            "scan", student_id, week_id, now,
+            existing_record.get("status") if existing_record else None, status,
+            checkin["recheck_count"], checkin["expires_at"]
+        )])
         
-        # ★★★ 디버그 로그 ★★★
-        print(f"\n{'='*60}")
-        print(f"🎯 출석 체크 - 수정된 타임어택 로직")
-        print(f"{'='*60}")
-        print(f"학생: {student_id}, 주차: {week_id}")
-        print(f"기존 기록: {'있음' if existing_record else '없음'}")
-        if existing_record:
-            print(f"이전 recheck_count: {existing_record.get('recheck_count')}")
-        print(f"새 recheck_count: {recheck_count}")
-        print(f"홀수/짝수: {'홀수' if recheck_count % 2 == 1 else '짝수'}")
-        print(f"첫 인식 여부: {is_first_check}")
-        print(f"타임어택 계산: has_time_limit={has_time_limit}")
-        print(f"expires_at 설정: {expires_at}")
-        print(f"should_set_expires_at: {should_set_expires_at}")
-        print(f"메시지: {message}")
-        print(f"{'='*60}\n")
-        
-        # ★★★ 업데이트 데이터 준비 ★★★
-        update_data = {
-            "student_id": student_id,
-            "week_id": week_id,
-            "status": status,
-            "date": now.strftime("%Y-%m-%d"),
-            "timestamp": now,
-            "is_auto_absent_processed": False,
-            "recheck_count": recheck_count,
-            "first_check_time": first_check_time,
-            "recheck_time": now if existing_record else None,
-            "last_updated": now,
-            "notes": f"재인식 {recheck_count}회 - 패턴: {'짝수-타임어택' if has_time_limit else '홀수-해제' if recheck_count > 1 else '첫인식'}"
-        }
+        # 상주 서버에서는 만료 시각을 스케줄러에 등록/취소
+        timelock_scheduler = get_timelock_scheduler()
+        if timelock_scheduler is not None:
+            if checkin["has_time_limit"]:
+                timelock_scheduler.schedule(student_id, week_id, checkin["expires_at"])
+            else:
+                timelock_scheduler.cancel(student_id, week_id)
         
-        # ★★★ 업데이트 연산 구성 ★★★
-        update_operation = {"$set": update_data}
+        recheck_count = checkin["recheck_count"]
+        first_check_time = checkin["first_check_time"]
+        expires_at = checkin["expires_at"]
+        has_time_limit = checkin["has_time_limit"]
         
-        if should_set_expires_at:
-            # 타임어택 있음: expires_at 설정
-            update_operation["$set"]["expires_at"] = expires_at
-        else:
-            # 타임어택 없음: expires_at 필드 제거
-            update_operation["$unset"] = {"expires_at": ""}
-            
-            # 혹시 set에 있다면 제거
-            if "expires_at" in update_operation["$set"]:
-                del update_operation["$set"]["expires_at"]
-        
-        # ★★★ MongoDB 업데이트 ★★★
-        result = db.attendance.update_one(
-            {"student_id": student_id, "week_id": week_id},
-            update_operation,
-            upsert=True
-        )
+        message = describe_checkin(recheck_count, has_time_limit)
+        
+        # ★★★ 디버그 로그 ★★★
+        log_checkin(student_id, week_id, existing_record, checkin, message)
         
         # ★★★ 응답 데이터 ★★★
         response_data = {
             "success": True, 
             "message": message,
             "data": {
-                "student_id": student_id,
-                "week_id": week_id,
-                "status": status,
-                "student_name": student["name"],
-                "expires_at": expires_at.isoformat() if expires_at else None,
-                "recheck_count": recheck_count,
-                "has_time_limit": has_time_limit,
-                "is_in_timelock": has_time_limit,
-                "first_check_time": first_check_time.isoformat() if first_check_time else now.isoformat(),
-                "pattern_info": {
-                    "count": recheck_count,
-                    "is_even": recheck_count % 2 == 0,
-                    "should_have_timelock": has_time_limit,
-                    "description": f"{recheck_count}회 - {'짝수(타임어택)' if has_time_limit else '홀수/첫인식(해제)'}"
+                "student_id": student_id,
+                "week_id": week_id,
+                "status": status,
+                "student_name": student["name"],
+                "expires_at": expires_at.isoformat() if expires_at else None,
+                "recheck_count": recheck_count,
+                "has_time_limit": has_time_limit,
+                "is_in_timelock": has_time_limit,
+                "first_check_time": first_check_time.isoformat() if first_check_time else now.isoformat(),
+                "pattern_info": {
+                    "count": recheck_count,
+                    "is_even": recheck_count % 2 == 0,
+                    "should_have_timelock": has_time_limit,
+                    "description": f"{recheck_count}회 - {'짝수(타임어택)' if has_time_limit else '홀수/첫인식(해제)'}"
+                }
+            }
+        }
+        
+        return jsonify(response_data)
+        
+    except Exception as e:
+        checkin_log.exception("checkin_failed")
+        return jsonify({"success": False, "error": "SERVER_ERROR", "message": str(e)}), 500
+        
+MAX_BATCH_SCANS = int(os.environ.get("MAX_BATCH_SCANS", "5000"))
+
+def parse_client_ts(value, default):
+    """키오스크 스캔 시각(ISO 8601) 파싱 - 시간대가 있으면 서버 로컬 시각으로 변환"""
+    if value in (None, ""):
+        return default
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+@app.route('/api/attendance/check/batch', methods=['POST'])
+def check_attendance_batch():
+    """출석 체크 일괄 처리 - 키오스크가 모아 둔(오프라인 포함) 스캔을 순서대로 반영
+
+    요청: {"scans": [{"student_id", "week", "client_ts"}, ...]}
+    같은 (학생, 주차) 스캔은 client_ts 순서로 재인식 횟수/타임어택 규칙을 적용하며
+    (학생, 주차)마다 한 번의 원자적 갱신으로 기록함. 결과 메시지와 집계 증감분은 그 갱신이 돌려준
+    변경 전 문서로 계산하므로 동시에 들어온 다른 키오스크 스캔과 섞여도 어긋나지 않음
+    결과는 요청 순서대로 스캔마다 반환
+    """
+    try:
+        data = request.get_json()
+        scans = data.get('scans') if isinstance(data, dict) else data
+        if not scans or not isinstance(scans, list):
+            return jsonify({
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": "요청 데이터가 없습니다"
+            }), 400
+        if len(scans) > MAX_BATCH_SCANS:
+            return jsonify({
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": f"한 번에 최대 {MAX_BATCH_SCANS}건까지 처리할 수 있습니다"
+            }), 400
+        
+        db = get_db()
+        if db is None:
+            return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
+        
+        now = datetime.now()
+        results = [None] * len(scans)
+        
+        # ★★★ 일괄 검증 ★★★
+        valid_scans = []
+        for index, scan in enumerate(scans):
+            if not isinstance(scan, dict):
+                results[index] = {"index": index, "success": False, "error": "VALIDATION_ERROR", "message": "스캔 형식이 올바르지 않습니다"}
+                continue
+            errors = validate_attendance_data({**scan, "status": "출석"})
+            try:
+                client_ts = parse_client_ts(scan.get('client_ts'), now)
+            except (TypeError, ValueError):
+                errors.append("client_ts 는 ISO 8601 형식이어야 합니다")
+            if errors:
+                results[index] = {"index": index, "success": False, "error": "VALIDATION_ERROR", "message": ", ".join(errors)}
+                continue
+            valid_scans.append((client_ts, index, parse_student_id(scan['student_id']), int(scan['week'])))
+        
+        students = roster_cache.get_many(db, {student_id for _, _, student_id, _ in valid_scans})
+        ordered_scans = []
+        for client_ts, index, student_id, week_id in valid_scans:
+            if student_id not in students:
+                results[index] = {
+                    "index": index, "success": False, "error": "STUDENT_NOT_FOUND",
+                    "message": f"학생을 찾을 수 없습니다 (학번: {student_id})"
+                }
+                continue
+            ordered_scans.append((client_ts, index, student_id, week_id))
+        
+        # (학생, 주차)별로 client_ts 순서가 되도록 정렬 (같은 시각이면 요청 순서)
+        ordered_scans.sort()
+        
+        # (학생, 주차)별 스캔 시각 (client_ts 순서)
+        scans_by_key = {}
+        for client_ts, index, student_id, week_id in ordered_scans:
+            scans_by_key.setdefault((student_id, week_id), []).append((client_ts, index))
+        
+        # ★★★ (학생, 주차)마다 원자적 갱신 후 변경 전 문서로 순서대로 규칙 적용 ★★★
+        applied_scans = []
+        events = []
+        rollup_deltas = {}
+        for (student_id, week_id), key_scans in scans_by_key.items():
+            try:
+                existing_record = apply_checkins(db, student_id, week_id, [client_ts for client_ts, _ in key_scans])
+            except Exception as e:
+                log_event(checkin_log, logging.ERROR, "checkin_batch_write_failed",
+                          student_id=student_id, week_id=week_id, error=str(e))
+                for _, index in key_scans:
+                    results[index] = {"index": index, "success": False, "error": "DATABASE_ERROR", "message": "기록하지 못했습니다"}
+                continue
+            add_status_change(
+                rollup_deltas, student_id, week_id, students[student_id].get("major"),
+                existing_record.get("status") if existing_record else None, "출석"
+            )
+            previous = existing_record
+            for client_ts, index in key_scans:
+                checkin = compute_checkin_state(previous, client_ts)
+                events.append(make_attendance_event(
+                    "scan", student_id, week_id, client_ts,
+                    previous.get("status") if previous else None, "출석",
+                    checkin["recheck_count"], checkin["expires_at"]
+                ))
+                previous = {
+                    "status": "출석",
+                    "recheck_count": checkin["recheck_count"],
+                    "first_check_time": checkin["first_check_time"]
+                }
+                results[index] = {
+                    "index": index,
+                    "success": True,
+                    "message": describe_checkin(checkin["recheck_count"], checkin["has_time_limit"]),
+                    "student_id": student_id,
+                    "week_id": week_id,
+                    "student_name": students[student_id]["name"],
+                    "status": "출석",
+                    "recheck_count": checkin["recheck_count"],
+                    "has_time_limit": checkin["has_time_limit"],
+                    "expires_at": checkin["expires_at"].isoformat() if checkin["expires_at"] else None,
+                    "client_ts": client_ts.isoformat()
+                }
+                applied_scans.append((client_ts, index, student_id, week_id))
+        
+        # ★★★ 집계/스케줄러 반영 (반영된 스캔 기준) ★★★
+        apply_rollup_deltas(db, rollup_deltas, written_weeks={week_id for _, _, _, week_id in applied_scans})
+        record_attendance_events(db, events)
+        if applied_scans:
+            collection_versions.expire()
+        
+        timelock_scheduler = get_timelock_scheduler()
+        if timelock_scheduler is not None:
+            final_results = {}
+            for _, index, student_id, week_id in applied_scans:
+                final_results[(student_id, week_id)] = results[index]
+            for (student_id, week_id), result in final_results.items():
+                if result["has_time_limit"]:
+                    timelock_scheduler.schedule(student_id, week_id, parse_client_ts(result["expires_at"], None))
+                else:
+                    timelock_scheduler.cancel(student_id, week_id)
+        
+        applied_count = sum(1 for result in results if result["success"])
+        log_event(checkin_log, logging.INFO, "checkin_batch",
+                  total=len(scans), applied=applied_count, failed=len(scans) - applied_count)
+        return jsonify({
+            "success": True,
+            "message": f"{applied_count}/{len(scans)}건 출석 체크 완료",
+            "data": {
+                "results": results,
+                "summary": {
+                    "total": len(scans),
+                    "applied": applied_count,
+                    "failed": len(scans) - applied_count
                 }
             }
-        }
-        
-        return jsonify(response_data)
+        })
         
     except Exception as e:
-        print(f"❌ ERROR in check_attendance: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        checkin_log.exception("checkin_batch_failed")
         return jsonify({"success": False, "error": "SERVER_ERROR", "message": str(e)}), 500
+
+# ===== 자동 결석 처리 =====
+AUTO_ABSENT_CHUNK_SIZE = int(os.environ.get("AUTO_ABSENT_CHUNK_SIZE", "500"))
+
+def build_expired_timelock_query(now, week_from=None, week_to=None):
+    """짝수번째 재인식 후 타임어택이 만료된 미처리 기록 조건
+
+    (status, is_auto_absent_processed, expires_at) 복합 인덱스를 그대로 탐색함.
+    week_from/week_to 를 주면 해당 주차 범위만 대상으로 함 (워커별 분할 처리용)
+    """
+    query = {
+        "status": "출석",
+        "is_auto_absent_processed": False,
+        "expires_at": {"$exists": True, "$lt": now},
+        "$expr": {"$and": [
+            {"$gt": ["$recheck_count", 1]},
+            {"$eq": [{"$mod": ["$recheck_count", 2]}, 0]}
+        ]}
+    }
+    if week_from is not None or week_to is not None:
+        query["week_id"] = {}
+        if week_from is not None:
+            query["week_id"]["$gte"] = week_from
+        if week_to is not None:
+            query["week_id"]["$lte"] = week_to
+    return query
+
+def build_auto_absent_update(now):
+    """만료 기록을 결석으로 바꾸는 업데이트 (이력은 attendance_events 에 남김)"""
+    return {
+        "$set": {
+            "status": "결석",
+            "is_auto_absent_processed": True,
+            "auto_processed_at": now
+        },
+        "$unset": {"notes": ""}
+    }
+
+def fetch_student_majors(db, student_ids):
+    """학번 목록의 학과를 한 번에 조회"""
+    return {
+        student["student_id"]: student.get("major")
+        for student in db.students.find({"student_id": {"$in": list(student_ids)}}, {"student_id": 1, "major": 1})
+    }
+
+def process_expired_timelocks(db, now, chunk_size=AUTO_ABSENT_CHUNK_SIZE,
+                              week_from=None, week_to=None, deadline=None, on_chunk=None, keys=None):
+    """만료된 타임어택을 chunk_size 단위 update_many 로 결석 처리
+
+    keys 에 (student_id, week_id) 목록을 주면 해당 기록만 대상으로 함.
+    deadline(time.monotonic 기준)을 넘기면 다음 청크를 시작하지 않고 멈춤.
+    on_chunk(processed_count, failed_count, last_record) 가 False 를 반환하면 중단함.
+    반환값: {"processed_count", "failed_count", "completed"}
+    - 조회와 갱신 사이에 재인식되어 조건이 풀린 기록은 실패로 셈
+    """
+    query = build_expired_timelock_query(now, week_from, week_to)
+    if keys is not None:
+        query["$or"] = [{"student_id": student_id, "week_id": week_id} for student_id, week_id in keys]
+    projection = {"_id": 1, "student_id": 1, "week_id": 1, "status": 1, "expires_at": 1, "recheck_count": 1}
+    processed_count = 0
+    failed_count = 0
+    completed = False
+    
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        
+        chunk = list(db.attendance.find(query, projection).sort("expires_at", 1).limit(chunk_size))
+        if not chunk:
+            completed = True
+            break
+        
+        chunk_ids = [record["_id"] for record in chunk]
+        try:
+            result = db.attendance.update_many(
+                {**query, "_id": {"$in": chunk_ids}},
+                build_auto_absent_update(now)
+            )
+        except Exception as e:
+            log_event(auto_absent_log, logging.ERROR, "auto_absent_chunk_failed", chunk_size=len(chunk), error=str(e))
+            failed_count += len(chunk)
+            break
         
+        processed_count += result.modified_count
+        failed_count += len(chunk) - result.modified_count
+        if debug_enabled(auto_absent_log):
+            auto_absent_log.debug("auto_absent_chunk", extra={"fields": {
+                "matched": len(chunk), "modified": result.modified_count, "last_expires_at": chunk[-1].get("expires_at")
+            }})
+        
+        # 일부만 바뀐 경우에만 실제로 바뀐 기록을 다시 확인
+        if result.modified_count == len(chunk):
+            transitioned = chunk
+        else:
+            transitioned = list(db.attendance.find({"_id": {"$in": chunk_ids}, "auto_processed_at": now}, projection))
+        
+        # 집계/이력 반영 (출석 → 결석)
+        majors = fetch_student_majors(db, {record["student_id"] for record in transitioned})
+        rollup_deltas = {}
+        for record in transitioned:
+            add_status_change(
+                rollup_deltas, record["student_id"], record["week_id"],
+                majors.get(record["student_id"]), "출석", "결석"
+            )
+        apply_rollup_deltas(db, rollup_deltas, written_weeks={record["week_id"] for record in transitioned})
+        record_attendance_events(db, [
+            make_attendance_event(
+                "auto_absent", record["student_id"], record["week_id"], now, "출석", "결석",
+                record.get("recheck_count"), record.get("expires_at")
+            )
+            for record in transitioned
+        ])
+        if result.modified_count:
+            collection_versions.expire()
+        
+        if on_chunk is not None and on_chunk(processed_count, failed_count, chunk[-1]) is False:
+            break
+        
+        if len(chunk) < chunk_size:
+            completed = True
+            break
+        # 하나도 바뀌지 않았다면 같은 기록을 계속 다시 읽지 않도록 중단 (다음 실행에서 재시도)
+        if result.modified_count == 0:
+            break
+    
+    return {"processed_count": processed_count, "failed_count": failed_count, "completed": completed}
+
+# ===== 작업 임대(lease) 락 =====
+# locks 컬렉션 문서 하나가 작업 하나의 락이며, 만료(expires_at) 전까지 owner 만 작업할 수 있음
+# 서버리스 인스턴스가 중간에 죽어도 TTL 이 지나면 다른 호출이 이어받음
+AUTO_ABSENT_LEASE_SECONDS = int(os.environ.get("AUTO_ABSENT_LEASE_SECONDS", "60"))
+AUTO_ABSENT_TIME_BUDGET_SECONDS = float(os.environ.get("AUTO_ABSENT_TIME_BUDGET_SECONDS", "8"))
+
+def make_lease_owner():
+    """락 소유자 ID (호스트:프로세스:호출)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def acquire_lease(db, name, owner, ttl_seconds):
+    """락 획득 시도 - 성공하면 락 문서, 다른 소유자가 잡고 있으면 None"""
+    now = datetime.now()
+    try:
+        return db.locks.find_one_and_update(
+            {"_id": name, "$or": [{"expires_at": {"$lte": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "acquired_at": now, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # 문서는 있지만 아직 만료되지 않은 다른 소유자의 락
+        return None
+
+def renew_lease(db, name, owner, ttl_seconds, checkpoint=None):
+    """락 만료 시간 연장 (+진행 상황 기록) - 락을 잃었으면 False"""
+    update = {"$set": {"expires_at": datetime.now() + timedelta(seconds=ttl_seconds)}}
+    if checkpoint:
+        update["$set"].update({f"checkpoint.{key}": value for key, value in checkpoint.items()})
+    return db.locks.update_one({"_id": name, "owner": owner}, update).matched_count > 0
+
+def release_lease(db, name, owner, checkpoint=None):
+    """락 해제 - 문서는 진행 상황 기록을 위해 남겨 둠"""
+    update = {"$set": {"expires_at": datetime.now()}, "$unset": {"owner": ""}}
+    if checkpoint:
+        update["$set"].update({f"checkpoint.{key}": value for key, value in checkpoint.items()})
+    db.locks.update_one({"_id": name, "owner": owner}, update)
+
+def fetch_auto_absent_lag(db, week_from=None, week_to=None):
+    """가장 오래된 미처리 만료 기록과 현재 시각의 차이"""
+    now = datetime.now()
+    oldest = db.attendance.find_one(
+        build_expired_timelock_query(now, week_from, week_to),
+        {"expires_at": 1},
+        sort=[("expires_at", 1)]
+    )
+    oldest_expires_at = oldest["expires_at"] if oldest else None
+    return {
+        "oldest_unprocessed_expires_at": oldest_expires_at.isoformat() if oldest_expires_at else None,
+        "lag_seconds": round((now - oldest_expires_at).total_seconds(), 1) if oldest_expires_at else 0
+    }
+
+# ===== 타임어택 만료 스케줄러 (상주 서버용) =====
+# 서버리스가 아닌 상주 배포에서 TIMELOCK_SCHEDULER=1 로 켜면 만료 시각을 힙에 들고 있다가
+# 약 1초 안에 결석 처리함. 다른 인스턴스에서 생긴 타임어택은 주기적 재동기화로 가져오며
+# cron 엔드포인트(process-auto-absent)는 그대로 누락분을 따라잡는 경로로 남음
+TIMELOCK_SCHEDULER_ENABLED = os.environ.get("TIMELOCK_SCHEDULER", "0") == "1"
+TIMELOCK_SCHEDULER_RESYNC_SECONDS = float(os.environ.get("TIMELOCK_SCHEDULER_RESYNC_SECONDS", "60"))
+
+class TimelockScheduler:
+    """(student_id, week_id) 별 만료 시각을 최소 힙으로 관리하는 스케줄러
+
+    취소/재설정은 _deadlines 만 바꾸고 힙의 오래된 항목은 꺼낼 때 버림 (지연 삭제)
+    """
+
+    def __init__(self, resync_seconds=TIMELOCK_SCHEDULER_RESYNC_SECONDS):
+        self.resync_seconds = resync_seconds
+        self._heap = []
+        self._deadlines = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._next_resync = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="timelock-scheduler", daemon=True)
+        self._thread.start()
+
+    def schedule(self, student_id, week_id, expires_at):
+        """만료 시각 등록 (같은 기록의 기존 시각은 대체됨)"""
+        key = (student_id, week_id)
+        with self._condition:
+            if self._deadlines.get(key) == expires_at:
+                return
+            self._deadlines[key] = expires_at
+            heapq.heappush(self._heap, (expires_at, key))
+            # 가장 이른 만료 시각이 바뀌었으면 대기 중인 스레드를 깨움
+            if self._heap[0][1] == key:
+                self._condition.notify()
+
+    def cancel(self, student_id, week_id):
+        """홀수번째 재인식 등으로 타임어택이 풀리면 등록 취소"""
+        with self._condition:
+            self._deadlines.pop((student_id, week_id), None)
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._deadlines)
+
+    def resync(self, db):
+        """미처리 타임어택을 인덱스 범위 조회로 다시 읽어 등록 (시작 시 + 주기적)"""
+        pending = db.attendance.find(
+            build_pending_timelock_query(datetime.now()),
+            {"_id": 0, "student_id": 1, "week_id": 1, "expires_at": 1}
+        ).sort("expires_at", 1)
+        for record in pending:
+            self.schedule(record["student_id"], record["week_id"], record["expires_at"])
+
+    def _pop_due(self, now):
+        """만료된 항목을 꺼냄 - 반환값: (만료된 키 목록, 다음 대기 시간)"""
+        due = []
+        while self._heap:
+            expires_at, key = self._heap[0]
+            if self._deadlines.get(key) != expires_at:
+                heapq.heappop(self._heap)
+                continue
+            if expires_at > now:
+                return due, (expires_at - now).total_seconds()
+            heapq.heappop(self._heap)
+            del self._deadlines[key]
+            due.append(key)
+        return due, None
+
+    def _run(self):
+        while True:
+            try:
+                db = get_db()
+                if time.monotonic() >= self._next_resync:
+                    if db is not None:
+                        self.resync(db)
+                    # 연결이 없을 때도 다음 시도 시각을 미뤄야 wait(0) 으로 계속 돌지 않음
+                    self._next_resync = time.monotonic() + self.resync_seconds
+
+                with self._condition:
+                    due, wait_seconds = self._pop_due(datetime.now())
+                    if not due:
+                        until_resync = max(0.0, self._next_resync - time.monotonic())
+                        self._condition.wait(until_resync if wait_seconds is None else min(wait_seconds, until_resync))
+                        continue
+
+                if db is not None:
+                    # 만료 시각이 지나야 조건($lt now)에 걸리므로 기준 시각을 약간 뒤로 잡음
+                    result = process_expired_timelocks(db, datetime.now() + timedelta(milliseconds=1), keys=due)
+                    log_event(scheduler_log, logging.INFO, "scheduler_auto_absent",
+                              keys=len(due), processed=result["processed_count"])
+            except Exception:
+                scheduler_log.exception("scheduler_failed")
+                time.sleep(1)
+
+_timelock_scheduler = None
+_timelock_scheduler_pid = None
+_timelock_scheduler_lock = threading.Lock()
+
+def build_pending_timelock_query(now):
+    """아직 결석 처리되지 않은 타임어택 조건 (만료 전 포함)"""
+    return {
+        "status": "출석",
+        "is_auto_absent_processed": False,
+        # 타임어택은 설정 시점부터 TIMELOCK_MINUTES 안에 만료되므로 범위가 한정됨
+        "expires_at": {"$exists": True, "$lte": now + timedelta(minutes=TIMELOCK_MINUTES)}
+    }
+
+def get_timelock_scheduler():
+    """스케줄러가 켜져 있으면 프로세스당 하나를 시작해 반환 (꺼져 있으면 None)"""
+    global _timelock_scheduler, _timelock_scheduler_pid
+    if not TIMELOCK_SCHEDULER_ENABLED:
+        return None
+
+    pid = os.getpid()
+    if _timelock_scheduler is None or _timelock_scheduler_pid != pid:
+        with _timelock_scheduler_lock:
+            # fork 된 프로세스에는 스레드가 복사되지 않으므로 새로 시작
+            if _timelock_scheduler is None or _timelock_scheduler_pid != pid:
+                _timelock_scheduler = TimelockScheduler()
+                _timelock_scheduler.start()
+                _timelock_scheduler_pid = pid
+    return _timelock_scheduler
+
+@app.before_request
+def ensure_timelock_scheduler():
+    get_timelock_scheduler()
+
 @app.route('/api/attendance/process-auto-absent', methods=['POST', 'GET'])
 def process_auto_absent():
-    """짝수번째 재인식(2,4,6...) 후 15분 내 재인식 없으면 결석 처리"""
+    """짝수번째 재인식(2,4,6...) 후 15분 내 재인식 없으면 결석 처리
+
+    주차 범위(week_from, week_to)별로 락을 따로 잡으므로 여러 워커가 나눠서 처리할 수 있음.
+    시간 예산(budget, 초)을 넘기면 멈추고 남은 기록은 다음 실행이 이어서 처리함
+    """
     try:
         db = get_db()
         if db is None:
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         now = datetime.now()
+        week_from = request.args.get('week_from', type=int)
+        week_to = request.args.get('week_to', type=int)
+        budget = request.args.get('budget', AUTO_ABSENT_TIME_BUDGET_SECONDS, type=float)
         
-        # 만료된 타임어택 찾기
-        expired_records = list(db.attendance.find({
-            "status": "출석",
-            "expires_at": {"$exists": True, "$lt": now},
-            "is_auto_absent_processed": False
-        }))
-        
-        print(f"🔍 처리 대상 레코드: {len(expired_records)}건")
-        for record in expired_records:
-            print(f"   - 학생: {record.get('student_id')}, 주차: {record.get('week_id')}, recheck_count: {record.get('recheck_count')}")
+        lease_name = f"auto_absent:{week_from if week_from is not None else '*'}-{week_to if week_to is not None else '*'}"
+        owner = make_lease_owner()
         
-        processed_count = 0
-        failed_count = 0
+        # 겹치는 cron 호출 방지
+        lease = acquire_lease(db, lease_name, owner, AUTO_ABSENT_LEASE_SECONDS)
+        if lease is None:
+            return jsonify({
+                "success": True,
+                "message": "다른 자동 결석 처리 작업이 실행 중입니다",
+                "data": {
+                    "skipped": True,
+                    "lease": lease_name,
+                    "timestamp": now.isoformat(),
+                    **fetch_auto_absent_lag(db, week_from, week_to)
+                }
+            })
         
-        for record in expired_records:
-            try:
-                recheck_count = record.get("recheck_count", 0)
-                
-                # 짝수번째 재인식인지 확인 (2,4,6...)
-                if recheck_count > 1 and recheck_count % 2 == 0:
-                    expires_at = record.get("expires_at")
-                    
-                    result = db.attendance.update_one(
-                        {"_id": record["_id"]},
-                        {
-                            "$set": {
-                                "status": "결석",
-                                "is_auto_absent_processed": True,
-                                "auto_processed_at": now,
-                                "notes": f"{record.get('notes', '')}\n[⏰ {recheck_count}회차 타임어택 만료 ({expires_at}) → 자동 결석]"
-                            }
-                        }
-                    )
-                    
-                    if result.modified_count > 0:
-                        processed_count += 1
-                        print(f"✅ 자동 결석 처리됨: 학생 {record.get('student_id')}, 주차 {record.get('week_id')}")
-                    else:
-                        failed_count += 1
-                else:
-                    print(f"⚠️ 조건 불일치: recheck_count={recheck_count} (짝수 아님)")
-                        
-            except Exception as e:
-                print(f"❌ 처리 실패: {e}")
-                failed_count += 1
+        def checkpoint(processed_count, failed_count, last_record):
+            # 청크마다 락을 연장하면서 진행 상황을 남김 - 락을 잃었으면 중단
+            return renew_lease(db, lease_name, owner, AUTO_ABSENT_LEASE_SECONDS, {
+                "last_expires_at": last_record.get("expires_at"),
+                "last_id": last_record["_id"],
+                "updated_at": datetime.now()
+            })
         
-        # 처리된 레코드 다시 확인
-        if processed_count > 0:
-            processed_records = list(db.attendance.find({
-                "auto_processed_at": {"$exists": True, "$gte": now - timedelta(seconds=10)}
-            }))
-            print(f"📊 실제 처리 확인: {len(processed_records)}건")
+        result = {"processed_count": 0, "failed_count": 0, "completed": False}
+        try:
+            result = process_expired_timelocks(
+                db, now,
+                week_from=week_from, week_to=week_to,
+                deadline=time.monotonic() + budget,
+                on_chunk=checkpoint
+            )
+        finally:
+            release_lease(db, lease_name, owner, {
+                "last_run_at": now,
+                "last_run_owner": owner,
+                "last_run_processed": result["processed_count"],
+                "last_run_completed": result["completed"]
+            })
+        log_event(auto_absent_log, logging.INFO, "auto_absent_run", lease=lease_name,
+                  processed=result["processed_count"], failed=result["failed_count"], completed=result["completed"])
         
         return jsonify({
             "success": True,
-            "message": f"자동 결석 처리 완료",
+            "message": f"자동 결석 처리 완료" if result["completed"] else "처리가 중간에 멈춤 (시간 예산 초과 등) - 남은 기록은 다음 실행에서 처리",
             "data": {
-                "total_expired": len(expired_records),
-                "processed_count": processed_count,
-                "failed_count": failed_count,
+                "total_expired": result["processed_count"] + result["failed_count"],
+                "processed_count": result["processed_count"],
+                "failed_count": result["failed_count"],
+                "completed": result["completed"],
+                "lease": lease_name,
                 "timestamp": now.isoformat(),
-                "condition": "짝수번째 재인식(2,4,6...) 후 15분 내 재인식 없음"
+                "condition": "짝수번째 재인식(2,4,6...) 후 15분 내 재인식 없음",
+                **fetch_auto_absent_lag(db, week_from, week_to)
             }
         })
         
@@ -938,6 +3228,60 @@ def get_recheck_status(student_id, week):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/attendance/history/<int:student_id>/<int:week>', methods=['GET'])
+def get_attendance_history(student_id, week):
+    """(학생, 주차) 출석 이벤트 이력 - 최신순, ?before=<이벤트 id> 로 다음 페이지"""
+    try:
+        try:
+            limit = int(request.args.get('limit', 50))
+            if limit < 1 or limit > MAX_HISTORY_PAGE_SIZE:
+                raise ValueError
+            before = request.args.get('before')
+            before = ObjectId(before) if before else None
+        except Exception:
+            return jsonify({
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": f"limit 은 1~{MAX_HISTORY_PAGE_SIZE}, before 는 이벤트 id 여야 합니다"
+            }), 400
+        
+        db = get_db()
+        if db is None:
+            return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
+        
+        query = {"student_id": student_id, "week_id": week}
+        if before is not None:
+            query["_id"] = {"$lt": before}
+        # 한 건 더 읽어 다음 페이지 여부 판단
+        events = list(db.attendance_events.find(query).sort("_id", -1).limit(limit + 1))
+        has_more = len(events) > limit
+        events = events[:limit]
+        
+        result = []
+        for event in events:
+            result.append({
+                "id": str(event["_id"]),
+                "type": event["type"],
+                "at": event["at"].isoformat(),
+                "from": event.get("from"),
+                "to": event.get("to"),
+                "recheck_count": event.get("recheck_count"),
+                "expires_at": event["expires_at"].isoformat() if event.get("expires_at") else None
+            })
+        
+        return jsonify({
+            "success": True,
+            "data": result,
+            "pagination": {
+                "limit": limit,
+                "has_more": has_more,
+                "next_before": result[-1]["id"] if has_more else None
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
+
 @app.route('/api/debug/timelock-test', methods=['POST'])
 def debug_timelock_test():
     """타임어택 디버깅 테스트"""
@@ -947,7 +3291,10 @@ def debug_timelock_test():
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         data = request.get_json()
-        student_id = data.get('student_id', 2007720116)
+        try:
+            student_id = parse_student_id(data.get('student_id', 2007720116))
+        except ValueError:
+            return invalid_student_id_response()
         week = data.get('week', 1)
         
         # 현재 기록 확인
@@ -1051,7 +3398,199 @@ def debug_auto_process_status():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# ===== 쿼리 플랜 점검 =====
+# 라우트별 대표 쿼리를 explain("executionStats") 로 실행해 사용한 인덱스와 검사/반환 문서 수를 확인함
+# 자주 호출되는 경로(hot)가 반환 문서 1건당 QUERY_PLAN_MAX_EXAMINED_RATIO 건보다 많이 검사하면 실패로 표시
+QUERY_PLAN_MAX_EXAMINED_RATIO = float(os.environ.get("QUERY_PLAN_MAX_EXAMINED_RATIO", "10"))
+# 메모리 저장소에는 쿼리 플래너가 없어 explain 결과가 실제 mongod 와 관계없으므로 점검하지 않음
+QUERY_PLAN_UNSUPPORTED_MESSAGE = "쿼리 플랜 점검은 실제 MongoDB 에서만 실행할 수 있습니다 (STORAGE_BACKEND=memory)"
+
+def query_plan_audit_supported():
+    """explain 결과를 믿을 수 있는 저장소인지"""
+    return STORAGE_BACKEND != "memory"
+
+def build_query_plan_cases(db, now, student_id=None):
+    """점검할 (이름, 라우트, hot 여부, explain 명령) 목록 - 학번/주차/학과 표본은 실제 데이터에서 고름
+
+    각 라우트가 실제로 보내는 조건을 그대로 씀 (학번은 parse_student_id 를 거친 int)
+    student_id 를 주면 그 학생의 기록을 표본으로 씀
+    """
+    sample_query = {} if student_id is None else {"student_id": student_id}
+    sample = db.attendance.find_one(sample_query, {"_id": 0, "student_id": 1, "week_id": 1}) or sample_query
+    student_id = parse_student_id(sample.get("student_id", 0))
+    week = sample.get("week_id", 1)
+    major = (db.students.find_one({}, {"_id": 0, "major": 1}) or {}).get("major", "")
+    
+    def find(collection, query, sort=None, limit=0, projection=None):
+        command = {"find": collection, "filter": query}
+        if projection:
+            command["projection"] = projection
+        if sort:
+            command["sort"] = dict(sort)
+        if limit:
+            command["limit"] = limit
+        return command
+    
+    def aggregate(collection, pipeline):
+        return {"aggregate": collection, "pipeline": pipeline, "cursor": {}}
+    
+    record_key = {"student_id": student_id, "week_id": week}
+    auto_absent_projection = {"_id": 1, "student_id": 1, "week_id": 1, "status": 1, "expires_at": 1, "recheck_count": 1}
+    return [
+        ("check_attendance.record", "POST /api/attendance/check", True,
+         find("attendance", record_key, limit=1)),
+        ("check_attendance.student", "POST /api/attendance/check", True,
+         find("students", {"student_id": student_id}, limit=1)),
+        ("get_students", "GET /api/students", True,
+         find("students", {}, [("student_id", 1), ("_id", 1)], 101)),
+        ("get_students.name", "GET /api/students?sort=name", True,
+         find("students", {}, [("name", 1), ("_id", 1)], 101)),
+        ("get_students.major", "GET /api/students?sort=major", True,
+         find("students", {}, [("major", 1), ("_id", 1)], 101)),
+        ("get_student", "GET /api/students/<student_id>", True,
+         find("students", {"student_id": student_id}, limit=1)),
+        ("update_student", "PUT /api/students/<student_id>", False,
+         find("students", {"student_id": student_id}, limit=1)),
+        ("delete_student.attendance", "DELETE /api/students/<student_id>", False,
+         find("attendance", {"student_id": student_id}, projection={"student_id": 1, "week_id": 1, "status": 1})),
+        ("get_attendance", "GET /api/attendance?week=", True,
+         find("attendance", {"week_id": week}, projection={"_id": 0, "student_id": 1, "status": 1})),
+        ("get_attendance.roster", "GET /api/attendance?week=", False,
+         aggregate("students", build_week_roster_pipeline(week))),
+        ("get_recheck_status", "GET /api/attendance/recheck-status/<student_id>/<week>", True,
+         find("attendance", record_key, limit=1)),
+        ("get_attendance_history", "GET /api/attendance/history/<student_id>/<week>", True,
+         find("attendance_events", record_key, [("_id", -1)], 51)),  # 기본 페이지 50건 + 다음 페이지 확인 1건
+        ("get_student_attendance", "GET /api/attendance/student/<student_id>", True,
+         find("attendance", {"student_id": student_id}, [("week_id", 1)], projection=ATTENDANCE_RECORD_PROJECTION)),
+        ("get_week_attendance", "GET /api/attendance/week/<week>", True,
+         find("attendance", {"week_id": week}, projection=ATTENDANCE_RECORD_PROJECTION)),
+        ("get_student_stats", "GET /api/stats/student/<student_id>", True,
+         find("attendance", {"student_id": student_id})),
+        ("stats.rollups", "GET /api/stats/overview, /api/stats/weekly", True,
+         find("attendance_rollups", {"scope": {"$in": ["week", "roster"]}},
+              projection={"_id": 0, "scope": 1, "key": 1, "counts": 1, "total": 1})),
+        ("process_auto_absent", "POST /api/attendance/process-auto-absent", True,
+         find("attendance", build_expired_timelock_query(now), [("expires_at", 1)], AUTO_ABSENT_CHUNK_SIZE,
+              auto_absent_projection)),
+        ("timelock_scheduler.resync", "TimelockScheduler.resync", False,
+         find("attendance", build_pending_timelock_query(now), [("expires_at", 1)],
+              projection={"_id": 0, "student_id": 1, "week_id": 1, "expires_at": 1})),
+        ("export_attendance", "GET /api/attendance/export?weeks=", False,
+         find("attendance", build_export_query(db, [week], None), [("student_id", 1), ("week_id", 1)])),
+        ("get_attendance_matrix", "GET /api/attendance/matrix?weeks=", False,
+         aggregate("attendance", [
+             {"$match": {"week_id": {"$in": [week]}}},
+             {"$group": {"_id": "$student_id", "cells": {"$push": {"w": "$week_id", "s": "$status"}}}}
+         ])),
+        ("get_attendance_matrix.major", "GET /api/attendance/matrix?major=", False,
+         find("students", {"major": major}, [("student_id", 1)], projection={"_id": 0, "student_id": 1, "name": 1})),
+    ]
+
+def summarize_explain(explain):
+    """explain 결과에서 플랜 단계, 사용 인덱스, 검사/반환 문서 수를 뽑음
+
+    find 는 최상위, aggregate 는 첫 $cursor 단계에 결과가 있음. SBE 형식(winningPlan.queryPlan)도 처리
+    """
+    cursor = explain
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage:
+            cursor = stage["$cursor"]
+            break
+    winning_plan = cursor.get("queryPlanner", {}).get("winningPlan", {})
+    winning_plan = winning_plan.get("queryPlan", winning_plan)
+    
+    stages = []
+    indexes = []
+    pending = [winning_plan]
+    while pending:
+        node = pending.pop()
+        if node.get("stage"):
+            stages.append(node["stage"])
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        pending.extend(reversed(node.get("inputStages", [])))
+        if "inputStage" in node:
+            pending.append(node["inputStage"])
+    
+    stats = cursor.get("executionStats", {})
+    return {
+        "plan": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "docs_examined": stats.get("totalDocsExamined", 0),
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "returned": stats.get("nReturned", 0),
+        "millis": stats.get("executionTimeMillis", 0)
+    }
+
+def audit_query_plans(db, max_ratio=QUERY_PLAN_MAX_EXAMINED_RATIO, now=None, student_id=None):
+    """모든 점검 대상 쿼리를 explain 하고 hot 경로의 검사/반환 비율이 max_ratio 를 넘는지 판정
+
+    반환값: {"max_ratio", "supported", "cases": [...], "failures": [이름, ...]}
+    메모리 저장소면 점검하지 않고 supported=False 와 빈 목록을 반환함
+    """
+    if not query_plan_audit_supported():
+        return {"max_ratio": max_ratio, "supported": False, "message": QUERY_PLAN_UNSUPPORTED_MESSAGE,
+                "cases": [], "failures": []}
+    now = now or datetime.now()
+    cases = []
+    for name, route, hot, command in build_query_plan_cases(db, now, student_id):
+        case = {"name": name, "route": route, "hot": hot, "collection": command.get("find") or command.get("aggregate")}
+        try:
+            case.update(summarize_explain(db.command("explain", command, verbosity="executionStats")))
+        except Exception as e:
+            case.update(error=str(e), ok=False)
+            cases.append(case)
+            continue
+        ratio = case["docs_examined"] / max(case["returned"], 1)
+        case["examined_ratio"] = round(ratio, 2)
+        case["ok"] = not (hot and ratio > max_ratio)
+        cases.append(case)
+    return {
+        "max_ratio": max_ratio,
+        "supported": True,
+        "cases": cases,
+        "failures": [case["name"] for case in cases if not case["ok"]]
+    }
+
+@app.route('/api/debug/query-plans', methods=['GET'])
+def debug_query_plans():
+    """라우트별 쿼리 플랜 점검 - ?max_ratio=10 (데이터가 충분히 있을 때 의미 있음)"""
+    try:
+        max_ratio = float(request.args.get('max_ratio', QUERY_PLAN_MAX_EXAMINED_RATIO))
+        if max_ratio <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": "max_ratio 는 양수여야 합니다"
+        }), 400
+    
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
+        
+        report = audit_query_plans(db, max_ratio)
+        if not report["supported"]:
+            return jsonify({"success": False, "error": "NOT_SUPPORTED", "message": report["message"]}), 501
+        return jsonify({
+            "success": True,
+            "passed": not report["failures"],
+            "data": report
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
+
+# 기록 목록 응답에 필요한 필드만 읽음 (notes 는 이벤트 로그 도입 전 기록 호환용)
+ATTENDANCE_RECORD_PROJECTION = {"student_id": 1, "week_id": 1, "status": 1, "date": 1, "notes": 1, "timestamp": 1}
+
 @app.route('/api/attendance/student/<student_id>', methods=['GET'])
+@with_student_id
+@cached_response("students", "attendance")
 def get_student_attendance(student_id):
     """학생별 출석 기록"""
     try:
@@ -1060,7 +3599,7 @@ def get_student_attendance(student_id):
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         # 학생 존재 확인
-        student = db.students.find_one({"student_id": student_id})
+        student = roster_cache.get(db, student_id)
         if not student:
             return jsonify({
                 "success": False,
@@ -1069,28 +3608,16 @@ def get_student_attendance(student_id):
             }), 404
         
         # 학생의 출석 기록 조회
-        attendance_data = list(db.attendance.find({"student_id": student_id}).sort("week_id", 1))
-        
-        result = []
-        for record in attendance_data:
-            attendance_record = {
-                "id": str(record["_id"]),
-                "week_id": record["week_id"],
-                "status": record["status"],
-                "date": record.get("date", ""),
-                "notes": record.get("notes", ""),
-                "timestamp": record.get("timestamp", "").isoformat() if record.get("timestamp") else ""
-            }
-            result.append(attendance_record)
+        attendance_data = list(db.attendance.find({"student_id": student_id}, ATTENDANCE_RECORD_PROJECTION).sort("week_id", 1))
         
         # 통계 계산
         total_weeks = 7
         present_count = sum(1 for record in attendance_data if record["status"] == "출석")
         attendance_rate = round((present_count / total_weeks) * 100, 2) if total_weeks > 0 else 0
         
-        return jsonify({
+        return json_response({
             "success": True,
-            "data": result,
+            "data": [encode_student_attendance_row(record) for record in attendance_data],
             "student_info": {
                 "student_id": student["student_id"],
                 "name": student["name"],
@@ -1107,6 +3634,7 @@ def get_student_attendance(student_id):
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
 @app.route('/api/attendance/week/<int:week>', methods=['GET'])
+@cached_response("students", "attendance")
 def get_week_attendance(week):
     """주차별 출석 기록"""
     try:
@@ -1115,30 +3643,21 @@ def get_week_attendance(week):
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         # 해당 주차 출석 데이터 조회
-        attendance_data = list(db.attendance.find({"week_id": week}))
-        
-        # 학생 정보 조회
-        students = list(db.students.find().sort("student_id", 1))
-        student_map = {s["student_id"]: s for s in students}
+        attendance_data = list(db.attendance.find({"week_id": week}, ATTENDANCE_RECORD_PROJECTION))
         
-        # 결과 변환
-        result = []
-        for record in attendance_data:
-            student_info = student_map.get(record["student_id"], {})
-            attendance_record = {
-                "id": str(record["_id"]),
-                "student_id": record["student_id"],
-                "student_name": student_info.get("name", "Unknown"),
-                "department": student_info.get("major", "Unknown"),
-                "status": record["status"],
-                "date": record.get("date", ""),
-                "notes": record.get("notes", ""),
-                "timestamp": record.get("timestamp", "").isoformat() if record.get("timestamp") else ""
-            }
-            result.append(attendance_record)
+        # 학생 정보 조회 (명단 캐시 사용, 한도를 넘으면 해당 주차 학생만 조회)
+        roster = roster_cache.roster(db)
+        if roster is not None:
+            student_map = roster["by_id"]
+            total_students = len(roster["rows"])
+        else:
+            student_ids = list({record["student_id"] for record in attendance_data})
+            student_map = {s["student_id"]: s for s in db.students.find(
+                {"student_id": {"$in": student_ids}}, {"_id": 0, "student_id": 1, "name": 1, "major": 1}
+            )}
+            total_students = db.students.estimated_document_count()
         
         # 통계 계산
-        total_students = len(students)
         present_count = sum(1 for record in attendance_data if record["status"] == "출석")
         attendance_rate = round((present_count / total_students) * 100, 2) if total_students > 0 else 0
         
@@ -1147,9 +3666,9 @@ def get_week_attendance(week):
             status = record["status"]
             status_count[status] = status_count.get(status, 0) + 1
         
-        return jsonify({
+        return json_response({
             "success": True,
-            "data": result,
+            "data": [encode_attendance_row(record, student_map.get(record["student_id"], {})) for record in attendance_data],
             "week": week,
             "stats": {
                 "total_students": total_students,
@@ -1161,8 +3680,332 @@ def get_week_attendance(week):
     except Exception as e:
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
+# ===== 출석 내보내기 =====
+# 배치 단위 커서로 읽은 기록을 명단과 조인해 바로 스트리밍하므로 전체 크기와 상관없이 메모리 사용량이 일정함
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "2000"))
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_COLUMNS = ["week_id", "student_id", "name", "major", "status", "date", "timestamp", "recheck_count"]
+# 주차 목록에 쓸 수 있는 가장 큰 주차 번호 (범위를 펼치기 전에 확인해 큰 범위로 메모리를 쓰지 않게 함)
+WEEK_LIST_MAX_WEEK = int(os.environ.get("WEEK_LIST_MAX_WEEK", "100"))
+WEEK_LIST_ERROR_MESSAGE = f"weeks 는 1~{WEEK_LIST_MAX_WEEK} 사이 주차의 1,2,5-7 형식이어야 합니다"
+
+def parse_week_list(value, max_week=WEEK_LIST_MAX_WEEK):
+    """"1,2,5-7" 형식의 주차 목록 파싱 (잘못된 형식이거나 1~max_week 밖의 주차가 있으면 ValueError)"""
+    weeks = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, sep, hi = part.partition("-")
+        lo = int(lo)
+        hi = int(hi) if sep else lo
+        if not 1 <= lo <= hi <= max_week:
+            raise ValueError(part)
+        weeks.update(range(lo, hi + 1))
+    if not weeks:
+        raise ValueError(value)
+    return sorted(weeks)
+
+def build_export_query(db, weeks, major):
+    """내보낼 출석 기록 조건 (학과 필터는 해당 학과 학번 목록으로 바꿈)"""
+    query = {}
+    if weeks:
+        query["week_id"] = {"$in": weeks}
+    if major:
+        roster = roster_cache.roster(db)
+        if roster is not None:
+            student_ids = [student["student_id"] for _, student in roster["rows"] if student.get("major") == major]
+        else:
+            student_ids = [student["student_id"] for student in db.students.find({"major": major}, {"student_id": 1})]
+        query["student_id"] = {"$in": student_ids}
+    return query
+
+def iter_export_rows(db, query, batch_size=EXPORT_BATCH_SIZE):
+    """(기록, 학생) 을 batch_size 건씩 묶어 반환 - 학생은 명단 캐시에서 조인"""
+    cursor = db.attendance.find(
+        query,
+        {"_id": 0, "student_id": 1, "week_id": 1, "status": 1, "date": 1, "timestamp": 1, "recheck_count": 1}
+    ).sort([("student_id", 1), ("week_id", 1)]).batch_size(batch_size)
+
+    roster = roster_cache.roster(db)
+    batch = []
+    for record in cursor:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield join_export_batch(db, roster, batch)
+            batch = []
+    if batch:
+        yield join_export_batch(db, roster, batch)
+
+def join_export_batch(db, roster, batch):
+    if roster is not None:
+        students = roster["by_id"]
+    else:
+        students = roster_cache.get_many(db, {record["student_id"] for record in batch})
+    return [(record, students.get(record["student_id"], {})) for record in batch]
+
+def export_values(record, student):
+    timestamp = record.get("timestamp")
+    return [
+        record["week_id"],
+        record["student_id"],
+        student.get("name", ""),
+        student.get("major", ""),
+        record.get("status", ""),
+        record.get("date", ""),
+        timestamp.isoformat() if timestamp else "",
+        record.get("recheck_count", 0)
+    ]
+
+def generate_export(db, query, export_format):
+    """CSV/NDJSON 텍스트 조각을 배치마다 생성"""
+    if export_format == "csv":
+        # 엑셀에서 한글이 깨지지 않도록 BOM 을 붙임
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in iter_export_rows(db, query):
+            writer.writerows(export_values(record, student) for record, student in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for rows in iter_export_rows(db, query):
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, export_values(record, student))), ensure_ascii=False) + "\n"
+                for record, student in rows
+            )
+
+def gzip_stream(chunks):
+    """텍스트 조각을 받아 gzip 바이트 조각으로 압축"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/api/attendance/export', methods=['GET'])
+def export_attendance():
+    """출석 기록 내보내기 - ?format=csv|ndjson&weeks=1,2,5-7&major=학과&gzip=1
+
+    gzip=1 이거나 Accept-Encoding 에 gzip 이 있으면 압축해서 보냄
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": f"format 은 {', '.join(EXPORT_FORMATS)} 중 하나여야 합니다"
+        }), 400
+    try:
+        weeks = parse_week_list(request.args['weeks']) if request.args.get('weeks') else None
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": WEEK_LIST_ERROR_MESSAGE
+        }), 400
+    major = request.args.get('major')
+    
+    db = get_db()
+    if db is None:
+        return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
+    
+    try:
+        query = build_export_query(db, weeks, major)
+    except Exception as e:
+        return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
+    
+    use_gzip = request.args.get('gzip') == '1' or 'gzip' in request.accept_encodings
+    chunks = generate_export(db, query, export_format)
+    body = gzip_stream(chunks) if use_gzip else (chunk.encode("utf-8") for chunk in chunks)
+    
+    response = app.response_class(body, mimetype=EXPORT_FORMATS[export_format])
+    response.headers["Content-Disposition"] = f"attachment; filename=attendance.{export_format}"
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+# ===== 출석 매트릭스 =====
+# 학생 × 주차 전체 격자를 열 형식으로 반환: 학번 배열, 주차 배열, 행 우선 상태 코드 배열 + 범례
+MATRIX_STATUS_LEGEND = ["미기록", "출석", "결석", "지각", "조퇴", "공결"]
+
+def build_attendance_matrix(student_ids, week_ids, cells):
+    """(student_id, week_id, status) 목록으로 상태 코드 격자와 합계 계산
+
+    반환값: {"codes": 행 우선 코드 목록, "legend", "row_totals", "column_totals", "status_totals"}
+    row/column_totals 는 학생별/주차별 출석 수. 범례에 없는 상태는 뒤에 코드를 추가함
+    """
+    legend = list(MATRIX_STATUS_LEGEND)
+    status_codes = {status: code for code, status in enumerate(legend)}
+    row_of = {student_id: row for row, student_id in enumerate(student_ids)}
+    column_of = {week_id: column for column, week_id in enumerate(week_ids)}
+    width = len(week_ids)
+
+    codes = bytearray(len(student_ids) * width)
+    for student_id, week_id, status in cells:
+        row = row_of.get(student_id)
+        column = column_of.get(week_id)
+        if row is None or column is None:
+            continue
+        code = status_codes.get(status)
+        if code is None:
+            code = status_codes[status] = len(legend)
+            legend.append(status)
+        codes[row * width + column] = code
+
+    present = status_codes["출석"]
+    if np is not None:
+        grid = np.frombuffer(bytes(codes), dtype=np.uint8)
+        is_present = grid.reshape(len(student_ids), width) == present
+        row_totals = is_present.sum(axis=1).tolist()
+        column_totals = is_present.sum(axis=0).tolist()
+        status_totals = np.bincount(grid, minlength=len(legend)).tolist()
+    else:
+        # bytes.count 는 C 로 세므로 셀 단위 파이썬 루프보다 훨씬 빠름
+        row_totals = [codes.count(present, row * width, (row + 1) * width) for row in range(len(student_ids))]
+        column_totals = [codes[column::width].count(present) for column in range(width)] if width else []
+        status_totals = [codes.count(code) for code in range(len(legend))]
+
+    return {
+        "codes": list(codes),
+        "legend": legend,
+        "row_totals": row_totals,
+        "column_totals": column_totals,
+        "status_totals": dict(zip(legend, status_totals))
+    }
+
+@app.route('/api/attendance/matrix', methods=['GET'])
+@cached_response("students", "attendance")
+def get_attendance_matrix():
+    """학생 × 주차 출석 매트릭스 - ?weeks=1-7&major=학과
+
+    statuses[i * len(weeks) + j] 가 students[i] 의 weeks[j] 상태 코드 (legend[코드] 가 상태 이름)
+    """
+    try:
+        weeks = parse_week_list(request.args['weeks']) if request.args.get('weeks') else None
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "VALIDATION_ERROR",
+            "message": WEEK_LIST_ERROR_MESSAGE
+        }), 400
+    major = request.args.get('major')
+    
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
+        
+        roster = roster_cache.roster(db)
+        if roster is not None:
+            students = [student for _, student in roster["rows"] if not major or student.get("major") == major]
+        else:
+            students = list(db.students.find(
+                {"major": major} if major else {}, {"_id": 0, "student_id": 1, "name": 1}
+            ).sort("student_id", 1))
+        student_ids = [student["student_id"] for student in students]
+        
+        if weeks is None:
+            weeks = [week["week_id"] for week in db.weeks.find({}, {"week_id": 1}).sort("week_id", 1)]
+            if not weeks:
+                weeks = sorted(db.attendance.distinct("week_id"))
+        
+        # 학생별로 (주차, 상태) 쌍을 묶어 한 번의 집계로 조회
+        match = {"week_id": {"$in": weeks}}
+        if major:
+            match["student_id"] = {"$in": student_ids}
+        cells = (
+            (group["_id"], cell["w"], cell["s"])
+            for group in db.attendance.aggregate([
+                {"$match": match},
+                {"$group": {"_id": "$student_id", "cells": {"$push": {"w": "$week_id", "s": "$status"}}}}
+            ], allowDiskUse=True)
+            for cell in group["cells"]
+        )
+        matrix = build_attendance_matrix(student_ids, weeks, cells)
+        
+        return json_response({
+            "success": True,
+            "data": encode_matrix(student_ids, [student.get("name", "") for student in students], weeks, matrix)
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
+
 # ===== 통계 API =====
+def build_stats_pipeline():
+    """주차 목록과 주차별 집계 문서, 전체 학생 수 집계를 한 번에 읽는 집계 파이프라인
+
+    weeks 컬렉션에서 시작하며 $facet 은 입력이 비어 있어도 문서 하나를 내보내므로
+    주차가 없더라도 결과가 항상 한 건 나온다. 원본 attendance 는 읽지 않고
+    attendance_rollups 의 미리 계산된 건수만 읽으므로 데이터 크기와 무관함
+    """
+    return [
+        {"$facet": {
+            "weeks": [{"$sort": {"week_id": 1}}, {"$project": {"_id": 0, "week_id": 1}}]
+        }},
+        {"$lookup": {
+            "from": "attendance_rollups",
+            "pipeline": [
+                {"$match": {"scope": {"$in": ["week", "roster"]}}},
+                {"$project": {"_id": 0, "scope": 1, "key": 1, "counts": 1, "total": 1}}
+            ],
+            "as": "rollups"
+        }}
+    ]
+
+def fetch_raw_week_rollups(db):
+    """집계 문서가 없을 때 원본 attendance/students 로 같은 모양(week/roster)의 집계를 계산"""
+    rollups = {}
+    for group in db.attendance.aggregate([
+        {"$group": {"_id": {"week_id": "$week_id", "status": "$status"}, "count": {"$sum": 1}}}
+    ], allowDiskUse=True):
+        rollup = rollups.setdefault(group["_id"]["week_id"], {"scope": "week", "key": group["_id"]["week_id"], "counts": {}})
+        rollup["counts"][group["_id"]["status"]] = group["count"]
+    return list(rollups.values()) + [{"scope": "roster", "key": None, "total": db.students.count_documents({})}]
+
+def fetch_attendance_stats(db):
+    """주차별/상태별 출석 통계 조회 (DB 왕복 1회, 집계 문서만 읽음)
+
+    집계가 아직 만들어지지 않았으면(roster 문서 없음) 원본 데이터로 계산함
+    """
+    stats = next(db.weeks.aggregate(build_stats_pipeline()), {})
+    rollups = stats.get("rollups", [])
+    if not any(rollup["scope"] == "roster" for rollup in rollups):
+        log_event(db_log, logging.WARNING, "rollups_missing", fallback="raw_aggregation")
+        rollups = fetch_raw_week_rollups(db)
+    
+    by_week = {}
+    by_status = {}
+    total_students = 0
+    total_attendance = 0
+    for rollup in rollups:
+        if rollup["scope"] == "roster":
+            total_students = rollup.get("total", 0)
+            continue
+        
+        week_status = by_week.setdefault(rollup["key"], {})
+        for status, count in rollup.get("counts", {}).items():
+            if not count:
+                continue
+            week_status[status] = week_status.get(status, 0) + count
+            by_status[status] = by_status.get(status, 0) + count
+            total_attendance += count
+    
+    return {
+        "total_students": total_students,
+        "total_attendance_records": total_attendance,
+        "week_ids": [week["week_id"] for week in stats.get("weeks", [])],
+        "by_week": by_week,
+        "by_status": by_status
+    }
+
 @app.route('/api/stats/overview', methods=['GET'])
+@cached_response("students", "attendance")
 def get_overview_stats():
     """전체 통계"""
     try:
@@ -1171,15 +4014,14 @@ def get_overview_stats():
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         # 기본 통계
-        total_students = db.students.count_documents({})
-        total_attendance = db.attendance.count_documents({})
-        total_weeks = 7
+        stats = fetch_attendance_stats(db)
+        total_students = stats["total_students"]
+        total_weeks = len(stats["week_ids"])
         
         # 주차별 통계
         weekly_stats = []
-        for week in range(1, total_weeks + 1):
-            week_attendance = list(db.attendance.find({"week_id": week}))
-            present_count = sum(1 for record in week_attendance if record["status"] == "출석")
+        for week in stats["week_ids"]:
+            present_count = stats["by_week"].get(week, {}).get("출석", 0)
             week_rate = round((present_count / total_students) * 100, 2) if total_students > 0 else 0
             
             weekly_stats.append({
@@ -1188,27 +4030,21 @@ def get_overview_stats():
                 "attendance_rate": week_rate
             })
         
-        # 상태별 통계
-        status_stats = {}
-        all_attendance = list(db.attendance.find())
-        for record in all_attendance:
-            status = record["status"]
-            status_stats[status] = status_stats.get(status, 0) + 1
-        
         return jsonify({
             "success": True,
             "data": {
                 "total_students": total_students,
-                "total_attendance_records": total_attendance,
+                "total_attendance_records": stats["total_attendance_records"],
                 "total_weeks": total_weeks,
                 "weekly_stats": weekly_stats,
-                "status_stats": status_stats
+                "status_stats": stats["by_status"]
             }
         })
     except Exception as e:
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
 @app.route('/api/stats/weekly', methods=['GET'])
+@cached_response("students", "attendance")
 def get_weekly_stats():
     """주차별 통계"""
     try:
@@ -1216,17 +4052,12 @@ def get_weekly_stats():
         if db is None:
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
-        total_students = db.students.count_documents({})
-        total_weeks = 7
+        stats = fetch_attendance_stats(db)
+        total_students = stats["total_students"]
         
         weekly_stats = []
-        for week in range(1, total_weeks + 1):
-            week_attendance = list(db.attendance.find({"week_id": week}))
-            
-            status_count = {}
-            for record in week_attendance:
-                status = record["status"]
-                status_count[status] = status_count.get(status, 0) + 1
+        for week in stats["week_ids"]:
+            status_count = stats["by_week"].get(week, {})
             
             present_count = status_count.get("출석", 0)
             week_rate = round((present_count / total_students) * 100, 2) if total_students > 0 else 0
@@ -1246,6 +4077,8 @@ def get_weekly_stats():
         return jsonify({"success": False, "error": "DATABASE_ERROR", "message": str(e)}), 500
 
 @app.route('/api/stats/student/<student_id>', methods=['GET'])
+@with_student_id
+@cached_response("students", "attendance")
 def get_student_stats(student_id):
     """학생별 통계"""
     try:
@@ -1254,7 +4087,7 @@ def get_student_stats(student_id):
             return jsonify({"success": False, "error": "DATABASE_ERROR"}), 500
         
         # 학생 존재 확인
-        student = db.students.find_one({"student_id": student_id})
+        student = roster_cache.get(db, student_id)
         if not student:
             return jsonify({
                 "success": False,
@@ -1316,6 +4149,35 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 텍스트 형식 메트릭 (요청/MongoDB 명령 시간, 연결 풀, 자동 결석 대기열, 명단 크기)"""
+    lines = []
+    for metric in (request_count, request_latency, mongo_command_latency, mongo_command_failures, mongo_checkout_failures):
+        lines.extend(metric.render())
+    lines.extend(render_gauge(
+        "mongodb_pool_connections", "서버별 연결 풀 연결 수 (open/in_use/waiting)", ("address", "state"),
+        [((address, state), value) for address, pool in sorted(mongo_pool_metrics.snapshot().items())
+         for state, value in pool.items()]
+    ))
+    lines.extend(render_gauge("mongodb_pool_max_size", "연결 풀 최대 크기", (), [((), MONGODB_MAX_POOL_SIZE)]))
+
+    db = get_db()
+    if db is not None:
+        try:
+            now = datetime.now()
+            backlog = db.attendance.count_documents(build_expired_timelock_query(now))
+            lag = fetch_auto_absent_lag(db)["lag_seconds"]
+            roster = db.attendance_rollups.find_one({"_id": "roster"}, {"total": 1})
+            roster_size = roster["total"] if roster else db.students.estimated_document_count()
+            lines.extend(render_gauge("attendance_auto_absent_backlog", "결석 처리를 기다리는 만료 타임어택 기록 수", (), [((), backlog)]))
+            lines.extend(render_gauge("attendance_auto_absent_lag_seconds", "가장 오래된 미처리 만료 기록의 지연 시간", (), [((), lag)]))
+            lines.extend(render_gauge("attendance_roster_size", "등록된 학생 수", (), [((), roster_size)]))
+        except Exception as e:
+            log_event(db_log, logging.WARNING, "metrics_gauges_failed", error=str(e))
+
+    return app.response_class("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
+
 # 404 에러 핸들러
 @app.errorhandler(404)
 def not_found(error):
@@ -1327,22 +4189,160 @@ def not_found(error):
             "GET /",
             "GET /api/test-db",
             "POST /api/init-db",
+            "POST /api/seed",
             "GET /api/students",
             "GET /api/students/{student_id}",
             "POST /api/students",
+            "POST /api/students/import",
             "PUT /api/students/{student_id}",
             "DELETE /api/students/{student_id}",
             "GET /api/attendance",
             "POST /api/attendance/check",
+            "POST /api/attendance/check/batch",
             "GET /api/attendance/student/{student_id}",
             "GET /api/attendance/week/{week}",
+            "GET /api/attendance/history/{student_id}/{week}",
+            "GET /api/attendance/export",
+            "GET /api/attendance/matrix",
             "GET /api/stats/overview",
             "GET /api/stats/weekly",
             "GET /api/stats/student/{student_id}",
-            "GET /health"
+            "GET /api/debug/query-plans",
+            "GET /health",
+            "GET /metrics"
         ]
     }), 404
 
+# ===== CLI 명령 =====
+# 사용법: flask --app api/index.py rollups verify
+@app.cli.group()
+def rollups():
+    """출석 집계(rollup) 관리"""
+
+@rollups.command("rebuild")
+def rollups_rebuild():
+    """원본 출석 데이터로 집계 컬렉션을 다시 만듦"""
+    db = get_db()
+    try:
+        count = rebuild_rollups(db)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"✅ 집계 재생성 완료: {count}건")
+
+@rollups.command("verify")
+@click.option("--fix", is_flag=True, help="어긋난 항목이 있으면 집계를 다시 만듦")
+def rollups_verify(fix):
+    """저장된 집계와 원본 데이터를 비교해 어긋난 항목 출력"""
+    db = get_db()
+    drift = verify_rollups(db)
+    for item in drift:
+        click.echo(f"❌ {item['_id']}: 기대값={item['expected']} 실제값={item['actual']}")
+    if not drift:
+        click.echo("✅ 집계가 원본 데이터와 일치합니다")
+        return
+    click.echo(f"어긋난 항목: {len(drift)}건")
+    if fix:
+        try:
+            count = rebuild_rollups(db)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"✅ 집계 재생성 완료: {count}건")
+    else:
+        raise SystemExit(1)
+
+@app.cli.group()
+def schema():
+    """인덱스/데이터 마이그레이션 관리"""
+
+@schema.command("migrate")
+@click.option("--target", type=int, default=None, help="이 버전까지만 적용")
+def schema_migrate(target):
+    """적용하지 않은 인덱스 마이그레이션을 순서대로 적용 (데이터는 바꾸지 않음)"""
+    db = get_db()
+    done = apply_schema_migrations(db, target)
+    if done:
+        click.echo(f"✅ 마이그레이션 적용 완료: {', '.join(map(str, done))}")
+    else:
+        click.echo("✅ 적용할 마이그레이션이 없습니다")
+
+@schema.command("migrate-data")
+@click.option("--target", type=int, default=None, help="이 버전까지만 적용")
+def schema_migrate_data(target):
+    """적용하지 않은 데이터 마이그레이션을 락을 잡고 순서대로 적용 (문서를 고쳐 씀 - 인덱스 마이그레이션 뒤에 실행)"""
+    db = get_db()
+    try:
+        done = apply_data_migrations(db, target)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    if done:
+        click.echo(f"✅ 데이터 마이그레이션 적용 완료: {', '.join(map(str, done))}")
+    else:
+        click.echo("✅ 적용할 데이터 마이그레이션이 없습니다")
+
+@schema.command("status")
+def schema_status():
+    """버전별 적용 여부 출력"""
+    db = get_db()
+    for title, items in (("인덱스", schema_migration_status(db)),
+                         ("데이터", schema_migration_status(db, DATA_MIGRATIONS, "data_migrations"))):
+        click.echo(title)
+        for item in items:
+            mark = "✅" if item["applied"] else "⏳"
+            click.echo(f"{mark} {item['version']:>3}  {item['description']}  {item['applied_at'] or ''}")
+
+@schema.command("audit")
+def schema_audit():
+    """코드가 기대하는 인덱스와 실제 인덱스 비교 (차이가 있으면 종료 코드 1)"""
+    db = get_db()
+    report = audit_indexes(db)
+    for item in report["missing"]:
+        click.echo(f"❌ 없음: {item['collection']}.{item['name']}")
+    for item in report["mismatched"]:
+        click.echo(f"❌ 다름: {item['collection']}.{item['name']} 기대값={item['expected']} 실제값={item['actual']}")
+    for item in report["unexpected"]:
+        click.echo(f"⚠️ 코드에서 쓰지 않음: {item['collection']}.{item['name']} {item['keys']}")
+    if not any(report.values()):
+        click.echo("✅ 인덱스가 코드와 일치합니다")
+    elif report["missing"] or report["mismatched"]:
+        raise SystemExit(1)
+
+@schema.command("query-plans")
+@click.option("--max-ratio", default=QUERY_PLAN_MAX_EXAMINED_RATIO, show_default=True, type=float,
+              help="hot 경로의 반환 문서 1건당 허용 검사 문서 수")
+def schema_query_plans(max_ratio):
+    """라우트별 쿼리 플랜 점검 (hot 경로가 기준을 넘으면 종료 코드 1)"""
+    report = audit_query_plans(get_db(), max_ratio)
+    if not report["supported"]:
+        raise click.ClickException(report["message"])
+    for case in report["cases"]:
+        mark = "✅" if case["ok"] else "❌"
+        if "error" in case:
+            click.echo(f"{mark} {case['name']:<28} 오류: {case['error']}")
+            continue
+        plan = " <- ".join(case["plan"])
+        indexes = ",".join(case["indexes"]) or "-"
+        click.echo(f"{mark} {case['name']:<28} 검사 {case['docs_examined']:>7} / 반환 {case['returned']:>6} "
+                   f"(x{case['examined_ratio']:<7}) {plan} [{indexes}]{' hot' if case['hot'] else ''}")
+    if report["failures"]:
+        raise SystemExit(1)
+
+@app.cli.command("seed")
+@click.option("--students", default=1000, show_default=True, help="학생 수")
+@click.option("--weeks", default=16, show_default=True, help="주차 수")
+@click.option("--seed", "seed_value", default=0, show_default=True, help="난수 시드 (같으면 같은 데이터)")
+@click.option("--events", is_flag=True, help="스캔/자동 결석 이벤트 이력도 만듦")
+@click.option("--reset", is_flag=True, help="기존 학생/출석 데이터를 지우고 다시 만듦")
+@click.option("--workers", default=SEED_WORKERS, show_default=True, help="insert_many 병렬 스레드 수")
+def seed_command(students, weeks, seed_value, events, reset, workers):
+    """대량 시드 데이터 생성 (예: seed --students 62500 --weeks 16 --reset)"""
+    db = get_db()
+    try:
+        summary = seed_database(db, students, weeks, seed_value, with_events=events, reset=reset, workers=workers)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"✅ 시드 데이터 생성 완료: 학생 {summary['students']:,}명, 출석 {summary['attendance']:,}건, "
+               f"이벤트 {summary['attendance_events']:,}건 (적재 {summary['load_seconds']}초, 전체 {summary['total_seconds']}초)")
+
 # Vercel에서 필요
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,997 @@
+"""메모리 저장소 백엔드
+
+STORAGE_BACKEND=memory 일 때 index.get_mongo_client() 가 MongoDB 대신 돌려주는 저장소.
+라우트 코드를 바꾸지 않고 DB 없이 테스트/벤치마크를 돌리고, DB 지연을 뺀 앱 쪽 CPU 비용만 잴 수 있음.
+
+범용 MongoDB 흉내가 아니라 api/index.py 와 benchmarks/ 가 실제로 보내는 모양만 구현함
+- 조회 조건: 필드 동등 비교, $in/$gt/$gte/$lt/$lte/$exists/$type, 최상위 $or/$expr
+- 업데이트: $set/$setOnInsert/$unset/$inc, 파이프라인 업데이트($set 단계), 전체 교체(replace_one)
+- 집계 단계: $match/$set/$project/$sort/$limit/$group($sum/$push)/$lookup/$facet
+- 집계 식: $cond/$ifNull/$and, 비교($eq/$ne/$gt/$gte/$lt/$lte), $add/$mod/$type/$arrayElemAt, $$REMOVE, $lookup let 변수
+- bulk_write 는 이 모듈의 UpdateOne 만 받음 (pymongo 요청 객체는 필드를 공개하지 않음)
+앱이 새 모양을 쓰기 시작하면 여기에 추가하고 STORAGE_BACKEND=memory 로 benchmarks/run_suite.py 를 돌려 확인함
+
+- 유니크 인덱스는 강제하고 DuplicateKeyError/BulkWriteError 도 pymongo 와 같게 발생시킴
+- 인덱스 첫 필드 동등/$in 조건은 해시 조회로 후보를 줄임 (나머지는 전체 탐색)
+- TTL 인덱스는 읽기/쓰기 때 만료 문서를 지우는 방식으로 흉내 냄
+- 쿼리 플래너가 없으므로 explain 은 지원하지 않음 (index.audit_query_plans 는 지원하지 않음으로 보고)
+- 목록에 없는 연산자/단계는 틀린 결과 대신 NotImplementedError 로 바로 알림
+"""
+import functools
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+TTL_PURGE_INTERVAL_SECONDS = 1.0
+
+
+class _Missing:
+    """없는 필드 (null 과 구분)"""
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+REMOVE = object()
+
+# ===== 값 비교 / 경로 =====
+def _clone(value):
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+
+def _freeze(value):
+    """해시 가능한 값으로 변환 (그룹 키/인덱스 키용)"""
+    if isinstance(value, dict):
+        return ("__dict__", tuple((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return ("__list__", tuple(_freeze(item) for item in value))
+    if value is MISSING:
+        return None
+    return value
+
+
+def _type_rank(value):
+    # BSON 정렬 순서: null < 숫자 < 문자열 < 객체 < 배열 < 바이너리 < ObjectId < bool < 날짜
+    if value is None or value is MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, bytes):
+        return 6
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _compare(a, b):
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == 1:
+        return 0
+    if rank_a in (4, 5):
+        a, b = repr(_freeze(a)), repr(_freeze(b))
+    return (a > b) - (a < b)
+
+
+def _equal(a, b):
+    if a is MISSING:
+        a = None
+    if b is MISSING:
+        b = None
+    return _type_rank(a) == _type_rank(b) and a == b
+
+
+def _get_path(doc, path):
+    """점 경로 값 (중간에 배열이 있으면 각 원소의 값을 모은 배열)"""
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, MISSING)
+        elif isinstance(value, list):
+            value = [item.get(part) for item in value if isinstance(item, dict) and part in item]
+        else:
+            return MISSING
+        if value is MISSING:
+            return MISSING
+    return value
+
+
+def _set_path(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        child = doc.get(part)
+        if not isinstance(child, dict):
+            child = doc[part] = {}
+        doc = child
+    doc[parts[-1]] = value
+
+
+def _unset_path(doc, path):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _is_operator_doc(value):
+    return isinstance(value, dict) and value and all(key.startswith("$") for key in value)
+
+
+# ===== 조회 조건 =====
+def _match(doc, query, variables=None):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_match(doc, sub, variables) for sub in condition):
+                return False
+        elif key == "$expr":
+            if not _truthy(_eval(condition, doc, variables)):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"지원하지 않는 조회 연산자: {key}")
+        elif not _match_value(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+def _match_equal(value, expected):
+    if _equal(value, expected):
+        return True
+    return isinstance(value, list) and any(_equal(item, expected) for item in value)
+
+
+def _match_compare(value, operand, accept):
+    candidates = value if isinstance(value, list) else [value]
+    for candidate in candidates:
+        if candidate is MISSING or _type_rank(candidate) != _type_rank(operand):
+            continue
+        if accept(_compare(candidate, operand)):
+            return True
+    return False
+
+
+def _match_value(value, condition):
+    if not _is_operator_doc(condition):
+        return _match_equal(value, condition)
+
+    for op, operand in condition.items():
+        if op == "$in":
+            if isinstance(value, (str, int)) and not isinstance(value, bool):
+                # 흔한 문자열/정수 값은 리스트 포함 검사로 바로 확인 (긴 $in 목록 대비)
+                matched = value in operand
+            else:
+                matched = any(_match_equal(value, item) for item in operand)
+        elif op == "$gt":
+            matched = _match_compare(value, operand, lambda c: c > 0)
+        elif op == "$gte":
+            matched = _match_compare(value, operand, lambda c: c >= 0)
+        elif op == "$lt":
+            matched = _match_compare(value, operand, lambda c: c < 0)
+        elif op == "$lte":
+            matched = _match_compare(value, operand, lambda c: c <= 0)
+        elif op == "$exists":
+            matched = (value is not MISSING) == bool(operand)
+        elif op == "$type":
+            # 문자열 별칭 하나만 지원
+            matched = value is not MISSING and _type_name(value) == operand
+        else:
+            raise NotImplementedError(f"지원하지 않는 조회 연산자: {op}")
+        if not matched:
+            return False
+    return True
+
+
+# ===== 집계 식 =====
+def _truthy(value):
+    return value not in (None, False, 0) and value is not MISSING
+
+
+def _type_name(value):
+    if value is MISSING:
+        return "missing"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int" if -2 ** 31 <= value < 2 ** 31 else "long"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime):
+        return "date"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _eval(expr, doc, variables=None):
+    if isinstance(expr, str):
+        if expr.startswith("$$"):
+            name, _, path = expr[2:].partition(".")
+            if name == "REMOVE":
+                return REMOVE
+            if variables is None or name not in variables:
+                raise ValueError(f"정의되지 않은 변수: $${name}")
+            return _get_path(variables[name], path) if path else variables[name]
+        if expr.startswith("$"):
+            return _get_path(doc, expr[1:])
+        return expr
+    if isinstance(expr, list):
+        return [_eval(item, doc, variables) for item in expr]
+    if isinstance(expr, dict):
+        if len(expr) == 1:
+            op = next(iter(expr))
+            if op.startswith("$"):
+                return _eval_operator(op, expr[op], doc, variables)
+        result = {}
+        for key, item in expr.items():
+            value = _eval(item, doc, variables)
+            if value is not MISSING and value is not REMOVE:
+                result[key] = value
+        return result
+    return expr
+
+
+def _eval_operator(op, args, doc, variables):
+    if op == "$cond":
+        condition, then, otherwise = args
+        return _eval(then if _truthy(_eval(condition, doc, variables)) else otherwise, doc, variables)
+    if op == "$ifNull":
+        for arg in args[:-1]:
+            value = _eval(arg, doc, variables)
+            if value is not None and value is not MISSING:
+                return value
+        return _eval(args[-1], doc, variables)
+    if op == "$and":
+        return all(_truthy(_eval(arg, doc, variables)) for arg in args)
+
+    values = [_eval(arg, doc, variables) for arg in (args if isinstance(args, list) else [args])]
+    if op in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte"):
+        a, b = values
+        result = _compare(a, b)
+        if a is MISSING or b is MISSING:
+            # 집계 식에서 없는 필드는 null 보다도 작음
+            result = 0 if a is b else (-1 if a is MISSING else 1)
+        return {
+            "$eq": result == 0, "$ne": result != 0, "$gt": result > 0, "$gte": result >= 0,
+            "$lt": result < 0, "$lte": result <= 0
+        }[op]
+    if op == "$add":
+        if any(value is None or value is MISSING for value in values):
+            return None
+        return sum(values)
+    if op == "$mod":
+        a, b = values
+        if a is None or a is MISSING or b is None or b is MISSING:
+            return None
+        # 결과 부호는 피제수를 따름 (C fmod 와 같음)
+        remainder = abs(a) % abs(b)
+        return remainder if a >= 0 else -remainder
+    if op == "$type":
+        return _type_name(values[0])
+    if op == "$arrayElemAt":
+        array, index = values
+        if not isinstance(array, list):
+            return None
+        return array[index] if -len(array) <= index < len(array) else MISSING
+    raise NotImplementedError(f"지원하지 않는 집계 연산자: {op}")
+
+
+# ===== 프로젝션 / 정렬 =====
+def _project(doc, projection):
+    """포함 프로젝션 ({필드: 1 또는 식}, _id 는 0 으로 뺄 수 있음)"""
+    if not projection:
+        return _clone(doc)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if (not fields and projection.get("_id") in (0, False)) or any(value in (0, False) for value in fields.values()):
+        raise NotImplementedError(f"제외 프로젝션은 지원하지 않음: {projection}")
+    result = {}
+    if projection.get("_id", 1) not in (0, False) and "_id" in doc:
+        result["_id"] = doc["_id"]
+    for key, value in fields.items():
+        if value in (1, True):
+            found = _get_path(doc, key)
+            if found is not MISSING:
+                _set_path(result, key, _clone(found))
+        else:
+            found = _eval(value, doc)
+            if found is not MISSING and found is not REMOVE:
+                _set_path(result, key, found)
+    return result
+
+
+def _normalize_sort(key_or_list, direction=None):
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction if direction is not None else 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [(key, value) for key, value in key_or_list]
+
+
+def _sort_docs(docs, spec):
+    def compare(a, b):
+        for field, direction in spec:
+            result = _compare(_get_path(a, field), _get_path(b, field))
+            if result:
+                return result if direction == 1 else -result
+        return 0
+    return sorted(docs, key=functools.cmp_to_key(compare))
+
+
+# ===== 업데이트 =====
+def _apply_operators(doc, update, is_insert):
+    for op, fields in update.items():
+        if op == "$set":
+            for path, value in fields.items():
+                _set_path(doc, path, _clone(value))
+        elif op == "$setOnInsert":
+            if is_insert:
+                for path, value in fields.items():
+                    _set_path(doc, path, _clone(value))
+        elif op == "$unset":
+            for path in fields:
+                _unset_path(doc, path)
+        elif op == "$inc":
+            for path, amount in fields.items():
+                current = _get_path(doc, path)
+                _set_path(doc, path, (0 if current is MISSING or current is None else current) + amount)
+        else:
+            raise NotImplementedError(f"지원하지 않는 업데이트 연산자: {op}")
+    return doc
+
+
+def _apply_update(doc, update, is_insert=False):
+    """업데이트를 적용한 새 문서 반환 (연산자 / 파이프라인 / 전체 교체)"""
+    if isinstance(update, list):
+        result = _run_stages(None, [_clone(doc)], update, None)[0]
+    elif _is_operator_doc(update):
+        result = _apply_operators(_clone(doc), update, is_insert)
+    else:
+        result = _clone(update)
+    if "_id" in doc:
+        result["_id"] = doc["_id"]
+    return result
+
+
+def _upsert_seed(query):
+    """upsert 로 새로 만들 문서의 초기값 (조건의 동등 비교 필드)"""
+    seed = {}
+    for key, condition in query.items():
+        if not key.startswith("$") and not _is_operator_doc(condition):
+            _set_path(seed, key, _clone(condition))
+    return seed
+
+
+# ===== 집계 파이프라인 =====
+def _accumulate(op, values):
+    if op == "$sum":
+        return sum(v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool))
+    if op == "$push":
+        return [v for v in values if v is not MISSING]
+    raise NotImplementedError(f"지원하지 않는 누산기: {op}")
+
+
+def _group(docs, spec, variables):
+    groups = {}
+    for doc in docs:
+        group_id = _eval(spec["_id"], doc, variables)
+        if group_id is MISSING:
+            group_id = None
+        key = _freeze(group_id)
+        entry = groups.get(key)
+        if entry is None:
+            entry = groups[key] = (group_id, {field: [] for field in spec if field != "_id"})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, expr), = accumulator.items()
+            entry[1][field].append(_eval(expr, doc, variables))
+    result = []
+    for group_id, values in groups.values():
+        out = {"_id": group_id}
+        for field, accumulator in spec.items():
+            if field != "_id":
+                out[field] = _accumulate(next(iter(accumulator)), values[field])
+        result.append(out)
+    return result
+
+
+def _simple_join_field(pipeline):
+    """첫 $match 의 $expr 가 {"$eq": ["$필드", "$$변수"]} 이면 (필드, 변수, 나머지 조건) 반환 - 해시 조인용"""
+    if not pipeline or "$match" not in pipeline[0]:
+        return None
+    match = pipeline[0]["$match"]
+    expr = match.get("$expr")
+    if not (isinstance(expr, dict) and list(expr) == ["$eq"] and len(expr["$eq"]) == 2):
+        return None
+    left, right = expr["$eq"]
+    if isinstance(left, str) and isinstance(right, str) and left.startswith("$$") and not right.startswith("$$"):
+        left, right = right, left
+    if not (isinstance(left, str) and left.startswith("$") and not left.startswith("$$")
+            and isinstance(right, str) and right.startswith("$$") and "." not in right):
+        return None
+    rest = {key: value for key, value in match.items() if key != "$expr"}
+    return left[1:], right[2:], rest
+
+
+def _lookup(db, docs, spec, variables):
+    foreign = db[spec["from"]]
+    alias = spec["as"]
+    if "localField" in spec:
+        index = {}
+        for item in foreign._snapshot():
+            value = _get_path(item, spec["foreignField"])
+            for key in (value if isinstance(value, list) else [value]):
+                index.setdefault(_freeze(key), []).append(item)
+        for doc in docs:
+            local = _get_path(doc, spec["localField"])
+            matches = []
+            for key in (local if isinstance(local, list) else [local]):
+                matches.extend(index.get(_freeze(key), []))
+            doc[alias] = [_clone(item) for item in matches]
+        return docs
+
+    pipeline = spec.get("pipeline", [])
+    let = spec.get("let", {})
+    foreign_docs = foreign._snapshot()
+    join = _simple_join_field(pipeline) if let else None
+    if join is not None:
+        field, variable, rest = join
+        index = {}
+        for item in foreign_docs:
+            if _match(item, rest, variables):
+                index.setdefault(_freeze(_get_path(item, field)), []).append(item)
+        for doc in docs:
+            scope = dict(variables or {}, **{name: _eval(expr, doc, variables) for name, expr in let.items()})
+            candidates = [_clone(item) for item in index.get(_freeze(scope[variable]), [])]
+            doc[alias] = _run_stages(db, candidates, pipeline[1:], scope)
+        return docs
+
+    for doc in docs:
+        scope = dict(variables or {}, **{name: _eval(expr, doc, variables) for name, expr in let.items()})
+        doc[alias] = _run_stages(db, [_clone(item) for item in foreign_docs], pipeline, scope)
+    return docs
+
+
+def _run_stages(db, docs, pipeline, variables):
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [doc for doc in docs if _match(doc, spec, variables)]
+        elif name == "$set":
+            for doc in docs:
+                values = {path: _eval(expr, doc, variables) for path, expr in spec.items()}
+                for path, value in values.items():
+                    if value is REMOVE:
+                        _unset_path(doc, path)
+                    elif value is not MISSING:
+                        _set_path(doc, path, value)
+        elif name == "$project":
+            docs = [_project(doc, spec) for doc in docs]
+        elif name == "$sort":
+            docs = _sort_docs(docs, list(spec.items()))
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$group":
+            docs = _group(docs, spec, variables)
+        elif name == "$lookup":
+            docs = _lookup(db, docs, spec, variables)
+        elif name == "$facet":
+            docs = [{
+                field: _run_stages(db, [_clone(doc) for doc in docs], sub_pipeline, variables)
+                for field, sub_pipeline in spec.items()
+            }]
+        else:
+            raise NotImplementedError(f"지원하지 않는 집계 단계: {name}")
+    return docs
+
+
+# ===== 인덱스 =====
+class _Index:
+    """인덱스 정의 + 첫 필드 해시 (후보 축소용) + 유니크 키 목록"""
+
+    def __init__(self, name, keys, unique=False, expire_after_seconds=None):
+        self.name = name
+        self.keys = keys
+        self.unique = unique
+        self.expire_after_seconds = expire_after_seconds
+        self.first_field = keys[0][0]
+        self.buckets = {}
+        self.multikey = set()
+        self.unique_keys = {}
+
+    def _first_value(self, doc):
+        value = _get_path(doc, self.first_field)
+        return None if value is MISSING else value
+
+    def unique_key(self, doc):
+        return tuple(_freeze(_get_path(doc, field)) for field, _ in self.keys)
+
+    def add(self, doc):
+        value = self._first_value(doc)
+        if isinstance(value, (list, dict)):
+            self.multikey.add(doc["_id"])
+        else:
+            self.buckets.setdefault(value, set()).add(doc["_id"])
+        if self.unique:
+            self.unique_keys[self.unique_key(doc)] = doc["_id"]
+
+    def remove(self, doc):
+        value = self._first_value(doc)
+        if isinstance(value, (list, dict)):
+            self.multikey.discard(doc["_id"])
+        else:
+            bucket = self.buckets.get(value)
+            if bucket is not None:
+                bucket.discard(doc["_id"])
+                if not bucket:
+                    del self.buckets[value]
+        if self.unique and self.unique_keys.get(self.unique_key(doc)) == doc["_id"]:
+            del self.unique_keys[self.unique_key(doc)]
+
+    def candidates(self, values):
+        ids = set(self.multikey)
+        for value in values:
+            try:
+                ids.update(self.buckets.get(value, ()))
+            except TypeError:
+                return None
+        return ids
+
+    def info(self):
+        info = {"key": list(self.keys), "v": 2}
+        if self.unique:
+            info["unique"] = True
+        if self.expire_after_seconds is not None:
+            info["expireAfterSeconds"] = self.expire_after_seconds
+        return info
+
+
+def _index_name(keys):
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+# ===== bulk_write 요청 =====
+class UpdateOne:
+    """pymongo.UpdateOne 과 같은 인자를 받고 필드를 공개하는 요청 객체
+
+    pymongo 요청 객체는 필드를 공개하지 않으므로 STORAGE_BACKEND=memory 이면 index 가 이 클래스를 씀
+    """
+    __slots__ = ("filter", "update", "upsert")
+
+    def __init__(self, filter, update, upsert=False):
+        self.filter = filter
+        self.update = update
+        self.upsert = upsert
+
+    def __repr__(self):
+        return f"UpdateOne({self.filter!r}, {self.update!r}, {self.upsert!r})"
+
+
+# ===== 커서 =====
+class MemoryCursor:
+    """find() 결과 커서 - 반복을 시작할 때 조건/정렬/skip/limit 을 적용"""
+
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+        self._results = None
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def _execute(self):
+        docs = self._collection._find_docs(self._query, self._sort, self._skip, self._limit)
+        return [_project(doc, self._projection) for doc in docs]
+
+    def __iter__(self):
+        if self._results is None:
+            self._results = iter(self._execute())
+        return self
+
+    def __next__(self):
+        if self._results is None:
+            self._results = iter(self._execute())
+        return next(self._results)
+
+    def __getitem__(self, index):
+        return self._execute()[index]
+
+
+# ===== 컬렉션 / DB / 클라이언트 =====
+class MemoryCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self._lock = database._lock
+        self._docs = {}
+        self._positions = {}
+        self._next_position = 0
+        self._indexes = {}
+        self._ttl_checked_at = 0.0
+
+    @property
+    def full_name(self):
+        return f"{self.database.name}.{self.name}"
+
+    # ----- 내부 -----
+    def _purge_expired(self):
+        ttl_indexes = [index for index in self._indexes.values() if index.expire_after_seconds is not None]
+        if not ttl_indexes or time.monotonic() - self._ttl_checked_at < TTL_PURGE_INTERVAL_SECONDS:
+            return
+        self._ttl_checked_at = time.monotonic()
+        now = datetime.now()
+        for index in ttl_indexes:
+            cutoff = now - timedelta(seconds=index.expire_after_seconds)
+            expired = [doc for doc in self._docs.values()
+                       if isinstance(doc.get(index.first_field), datetime) and doc[index.first_field] < cutoff]
+            for doc in expired:
+                self._remove(doc)
+
+    def _snapshot(self):
+        with self._lock:
+            self._purge_expired()
+            return list(self._docs.values())
+
+    def _candidate_docs(self, query):
+        if "_id" in query and not _is_operator_doc(query["_id"]):
+            doc = self._docs.get(query["_id"])
+            return [doc] if doc is not None else []
+        for index in self._indexes.values():
+            condition = query.get(index.first_field, MISSING)
+            if condition is MISSING or isinstance(condition, list):
+                continue
+            if _is_operator_doc(condition):
+                if list(condition) != ["$in"]:
+                    continue
+                values = [value for value in condition["$in"] if not isinstance(value, (list, dict))]
+                if len(values) != len(condition["$in"]):
+                    continue
+            elif isinstance(condition, dict):
+                continue
+            else:
+                values = [condition]
+            ids = index.candidates(values)
+            if ids is not None:
+                # 전체 탐색과 같은 (삽입) 순서로 반환
+                return sorted((self._docs[_id] for _id in ids), key=lambda doc: self._positions[doc["_id"]])
+        return self._docs.values()
+
+    def _find_docs(self, query, sort=None, skip=0, limit=0):
+        with self._lock:
+            self._purge_expired()
+            docs = [doc for doc in self._candidate_docs(query or {}) if _match(doc, query or {})]
+            if sort:
+                docs = _sort_docs(docs, sort)
+            if skip:
+                docs = docs[skip:]
+            if limit:
+                docs = docs[:limit]
+            return docs
+
+    def _check_unique(self, doc, ignore_id=None):
+        for index in self._indexes.values():
+            if not index.unique:
+                continue
+            existing = index.unique_keys.get(index.unique_key(doc))
+            if existing is not None and existing != ignore_id:
+                key = {field: _get_path(doc, field) for field, _ in index.keys}
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.full_name} index: {index.name} dup key: {key}",
+                    11000, {"index": index.name, "keyValue": key}
+                )
+        if ignore_id is None and doc["_id"] in self._docs:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.full_name} index: _id_ dup key: {{_id: {doc['_id']!r}}}",
+                11000, {"index": "_id_", "keyValue": {"_id": doc["_id"]}}
+            )
+
+    def _insert(self, doc):
+        self._check_unique(doc)
+        self._docs[doc["_id"]] = doc
+        self._positions[doc["_id"]] = self._next_position
+        self._next_position += 1
+        for index in self._indexes.values():
+            index.add(doc)
+
+    def _replace(self, old, new):
+        self._check_unique(new, ignore_id=old["_id"])
+        for index in self._indexes.values():
+            index.remove(old)
+        self._docs[new["_id"]] = new
+        for index in self._indexes.values():
+            index.add(new)
+
+    def _remove(self, doc):
+        for index in self._indexes.values():
+            index.remove(doc)
+        del self._docs[doc["_id"]]
+        del self._positions[doc["_id"]]
+
+    def _update(self, query, update, upsert, multi, sort=None):
+        """(matched, modified, upserted_id, before, after) - before/after 는 첫 문서 기준"""
+        docs = self._find_docs(query, sort, limit=0 if multi else 1)
+        if not docs:
+            if not upsert:
+                return 0, 0, None, None, None
+            new = _apply_update(_upsert_seed(query), update, is_insert=True)
+            new.setdefault("_id", ObjectId())
+            self._insert(new)
+            return 0, 0, new["_id"], None, new
+        modified = 0
+        before = after = None
+        for doc in docs:
+            new = _apply_update(doc, update)
+            if new != doc:
+                self._replace(doc, new)
+                modified += 1
+            if before is None:
+                before, after = doc, new
+        return len(docs), modified, None, before, after
+
+    # ----- 조회 -----
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0, **kwargs):
+        cursor = MemoryCursor(self, filter, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        docs = self._find_docs(filter, _normalize_sort(sort) if sort else None, limit=1)
+        return _project(docs[0], projection) if docs else None
+
+    def count_documents(self, filter, skip=0, limit=0, **kwargs):
+        return len(self._find_docs(filter, skip=skip, limit=limit))
+
+    def estimated_document_count(self, **kwargs):
+        with self._lock:
+            self._purge_expired()
+            return len(self._docs)
+
+    def distinct(self, key, filter=None, **kwargs):
+        values, seen = [], set()
+        for doc in self._find_docs(filter):
+            value = _get_path(doc, key)
+            for item in (value if isinstance(value, list) else [value]):
+                frozen = _freeze(item)
+                if item is not MISSING and frozen not in seen:
+                    seen.add(frozen)
+                    values.append(_clone(item))
+        return values
+
+    def aggregate(self, pipeline, allowDiskUse=False, **kwargs):
+        # 첫 단계 $match 는 find 와 같이 인덱스로 후보를 줄여 처리
+        if pipeline and "$match" in pipeline[0]:
+            docs = [_clone(doc) for doc in self._find_docs(pipeline[0]["$match"])]
+            pipeline = pipeline[1:]
+        else:
+            docs = [_clone(doc) for doc in self._snapshot()]
+        with self._lock:
+            return iter(_run_stages(self.database, docs, pipeline, None))
+
+    # ----- 쓰기 -----
+    def insert_one(self, document, **kwargs):
+        document.setdefault("_id", ObjectId())
+        with self._lock:
+            self._insert(_clone(document))
+        return InsertOneResult(document["_id"], True)
+
+    def insert_many(self, documents, ordered=True, **kwargs):
+        documents = list(documents)
+        inserted_ids, errors = [], []
+        with self._lock:
+            for position, document in enumerate(documents):
+                document.setdefault("_id", ObjectId())
+                try:
+                    self._insert(_clone(document))
+                    inserted_ids.append(document["_id"])
+                except DuplicateKeyError as e:
+                    errors.append({"index": position, "code": 11000, "errmsg": str(e), "op": document})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted_ids),
+                "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []
+            })
+        return InsertManyResult(inserted_ids, True)
+
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        with self._lock:
+            matched, modified, upserted_id, _, _ = self._update(filter, update, upsert, multi=False)
+        return UpdateResult({"n": matched or (1 if upserted_id is not None else 0),
+                             "nModified": modified, "upserted": upserted_id}, True)
+
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        with self._lock:
+            matched, modified, upserted_id, _, _ = self._update(filter, update, upsert, multi=True)
+        return UpdateResult({"n": matched or (1 if upserted_id is not None else 0),
+                             "nModified": modified, "upserted": upserted_id}, True)
+
+    def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        if _is_operator_doc(replacement):
+            raise ValueError("replacement 에는 업데이트 연산자를 쓸 수 없습니다")
+        return self.update_one(filter, replacement, upsert=upsert)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                            return_document=ReturnDocument.BEFORE, **kwargs):
+        with self._lock:
+            _, _, _, before, after = self._update(
+                filter, update, upsert, multi=False, sort=_normalize_sort(sort) if sort else None
+            )
+            result = after if return_document == ReturnDocument.AFTER else before
+            return _project(result, projection) if result is not None else None
+
+    def delete_one(self, filter, **kwargs):
+        with self._lock:
+            docs = self._find_docs(filter, limit=1)
+            for doc in docs:
+                self._remove(doc)
+        return DeleteResult({"n": len(docs)}, True)
+
+    def delete_many(self, filter, **kwargs):
+        with self._lock:
+            docs = self._find_docs(filter)
+            for doc in docs:
+                self._remove(doc)
+        return DeleteResult({"n": len(docs)}, True)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        totals = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        errors = []
+        with self._lock:
+            for position, op in enumerate(requests):
+                if not isinstance(op, UpdateOne):
+                    raise TypeError(f"메모리 저장소 bulk_write 는 storage.UpdateOne 만 받습니다: {type(op).__module__}.{type(op).__name__}")
+                try:
+                    matched, modified, upserted_id, _, _ = self._update(op.filter, op.update, op.upsert, multi=False)
+                except DuplicateKeyError as e:
+                    errors.append({"index": position, "code": 11000, "errmsg": str(e), "op": op.update})
+                    if ordered:
+                        break
+                    continue
+                totals["nMatched"] += matched
+                totals["nModified"] += modified
+                if upserted_id is not None:
+                    totals["nUpserted"] += 1
+                    totals["upserted"].append({"index": position, "_id": upserted_id})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], **totals})
+        return BulkWriteResult(totals, True)
+
+    # ----- 인덱스 -----
+    def create_index(self, keys, unique=False, expireAfterSeconds=None, name=None, **kwargs):
+        keys = _normalize_sort(keys, 1)
+        name = name or _index_name(keys)
+        with self._lock:
+            if name in self._indexes:
+                return name
+            index = _Index(name, keys, unique, expireAfterSeconds)
+            for doc in self._docs.values():
+                if unique and index.unique_key(doc) in index.unique_keys:
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error collection: {self.full_name} index: {name}", 11000
+                    )
+                index.add(doc)
+            self._indexes[name] = index
+        return name
+
+    def index_information(self):
+        with self._lock:
+            info = {"_id_": {"key": [("_id", 1)], "v": 2}}
+            info.update({name: index.info() for name, index in self._indexes.items()})
+            return info
+
+    def drop(self):
+        self.database.drop_collection(self.name)
+
+    def rename(self, new_name, dropTarget=False, **kwargs):
+        """같은 DB 안에서 이름 변경 (이 객체가 새 이름의 컬렉션이 되고 예전 이름은 빈 컬렉션이 됨)"""
+        with self.database._lock:
+            collections = self.database._collections
+            if collections.get(self.name) is not self:
+                raise OperationFailure("source namespace does not exist", 26)
+            if new_name in collections and not dropTarget:
+                raise OperationFailure("target namespace exists", 48)
+            collections.pop(self.name)
+            collections[new_name] = self
+            self.name = new_name
+
+
+class MemoryDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self._lock = threading.RLock()
+        self._collections = {}
+
+    def __getitem__(self, name):
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collections[name] = MemoryCollection(self, name)
+            return collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def drop_collection(self, name):
+        with self._lock:
+            self._collections.pop(name if isinstance(name, str) else name.name, None)
+
+    def command(self, command, value=1, **kwargs):
+        # 쿼리 플래너가 없으므로 explain 은 지원하지 않음 (쿼리 플랜 점검은 실제 mongod 에서만 의미가 있음)
+        if command == "ping" or command == {"ping": 1}:
+            return {"ok": 1.0}
+        raise NotImplementedError(f"지원하지 않는 명령: {command}")
+
+
+class MemoryClient:
+    """MongoClient 대신 쓰는 프로세스 내 저장소 (DB 별로 데이터가 분리됨)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._databases = {}
+
+    def __getitem__(self, name):
+        with self._lock:
+            database = self._databases.get(name)
+            if database is None:
+                database = self._databases[name] = MemoryDatabase(self, name)
+            return database
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def drop_database(self, name_or_database):
+        name = name_or_database if isinstance(name_or_database, str) else name_or_database.name
+        with self._lock:
+            self._databases.pop(name, None)
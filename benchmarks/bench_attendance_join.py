@@ -0,0 +1,95 @@
+"""GET /api/attendance 명단×주차 조인 벤치마크
+
+기존 학생별 선형 탐색 조인(O(학생 × 기록))과 학번 키 조인(O(학생 + 기록))을
+10k / 100k 명 규모에서 비교한다. 기존 방식은 너무 느리므로 앞쪽 일부 학생만
+측정해 전체 명단 크기로 환산한다.
+
+--db 옵션을 주면 별도 벤치마크 DB에 데이터를 넣고 $lookup 집계
+(build_week_roster_pipeline)의 실제 소요 시간도 측정한다.
+
+사용법:
+    python benchmarks/bench_attendance_join.py --sizes 10000 100000
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_attendance_join.py --db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+WEEK = 1
+LEGACY_SAMPLE = 1000
+
+
+def make_dataset(size, seed=42):
+    rng = random.Random(seed)
+    students = [{"student_id": 2020000000 + i, "name": f"학생{i}", "major": "소프트웨어학부"}
+                for i in range(size)]
+    attendance = [{"student_id": s["student_id"], "week_id": WEEK,
+                   "status": rng.choice(["출석", "결석", "지각"])}
+                  for s in students if rng.random() < 0.9]
+    rng.shuffle(attendance)
+    return students, attendance
+
+
+def legacy_join(students, attendance_data):
+    result = []
+    for student in students:
+        record = next((a for a in attendance_data if a["student_id"] == student["student_id"]), None)
+        result.append(record["status"] == "출석" if record else False)
+    return result
+
+
+def keyed_join(students, attendance_data):
+    status_by_student = {a["student_id"]: a["status"] for a in attendance_data}
+    return [status_by_student.get(s["student_id"]) == "출석" for s in students]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def bench_python(size):
+    students, attendance = make_dataset(size)
+    sample = students[:LEGACY_SAMPLE]
+    legacy = timed(legacy_join, sample, attendance) * (size / len(sample))
+    keyed = timed(keyed_join, students, attendance)
+    print(f"{size:>8} students  legacy {legacy * 1000:>12.1f} ms (extrapolated)   "
+          f"keyed {keyed * 1000:>8.1f} ms   speedup x{legacy / keyed:,.0f}")
+
+
+def bench_lookup(size):
+    db = index.get_mongo_client()["attendance_bench"]
+    students, attendance = make_dataset(size)
+    db.students.drop()
+    db.attendance.drop()
+    db.students.insert_many(students)
+    db.attendance.insert_many(attendance)
+    db.students.create_index([("student_id", 1)], unique=True)
+    db.attendance.create_index([("student_id", 1), ("week_id", 1)], unique=True)
+
+    elapsed = timed(lambda: list(db.students.aggregate(index.build_week_roster_pipeline(WEEK))))
+    print(f"{size:>8} students  $lookup aggregation {elapsed * 1000:>10.1f} ms")
+    index.get_mongo_client().drop_database("attendance_bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--db", action="store_true", help="MongoDB $lookup 경로도 측정")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench_python(size)
+    if args.db:
+        for size in args.sizes:
+            bench_lookup(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""출석 매트릭스 응답 크기/계산 시간 벤치마크
+
+학생 N명 × 주차 W개 데이터를 만들어 기존 방식(GET /api/attendance/week/<week> 를
+주차마다 호출한 기록별 JSON)과 GET /api/attendance/matrix 의 열 형식 JSON 크기를 비교하고
+build_attendance_matrix 계산 시간을 잰다. DB 연결은 필요 없다.
+
+사용법:
+    python benchmarks/bench_attendance_matrix.py --students 1000 10000 --weeks 16
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+
+def make_dataset(students, weeks, seed=42):
+    rng = random.Random(seed)
+    roster = [{"student_id": 2020000000 + i, "name": f"학생{i}", "major": f"학과{i % 40}"} for i in range(students)]
+    cells = [(s["student_id"], week, rng.choice(["출석", "출석", "출석", "결석", "지각"]))
+             for s in roster for week in range(1, weeks + 1) if rng.random() < 0.95]
+    return roster, cells
+
+
+def legacy_payload_bytes(roster, weeks, cells):
+    """주차별 기록 목록 응답을 모두 합한 크기 (get_week_attendance 와 같은 필드)"""
+    by_id = {s["student_id"]: s for s in roster}
+    now = datetime.now().isoformat()
+    total = 0
+    for week in range(1, weeks + 1):
+        records = [{
+            "id": "0" * 24, "student_id": student_id, "student_name": by_id[student_id]["name"],
+            "department": by_id[student_id]["major"], "status": status, "date": "2024-03-01",
+            "notes": "", "timestamp": now
+        } for student_id, week_id, status in cells if week_id == week]
+        total += len(json.dumps({"success": True, "data": records}, ensure_ascii=False).encode("utf-8"))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--weeks", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"numpy: {'yes' if index.np is not None else 'no (bytearray fallback)'}")
+    for students in args.students:
+        roster, cells = make_dataset(students, args.weeks)
+        student_ids = [s["student_id"] for s in roster]
+        week_ids = list(range(1, args.weeks + 1))
+
+        start = time.perf_counter()
+        matrix = index.build_attendance_matrix(student_ids, week_ids, cells)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        payload = {"success": True, "data": {
+            "students": student_ids, "names": [s["name"] for s in roster], "weeks": week_ids,
+            "statuses": matrix["codes"], "legend": matrix["legend"], "row_totals": matrix["row_totals"],
+            "column_totals": matrix["column_totals"], "status_totals": matrix["status_totals"]
+        }}
+        matrix_bytes = len(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        legacy_bytes = legacy_payload_bytes(roster, args.weeks, cells)
+        print(f"{students:>7} x {args.weeks:<3} legacy {legacy_bytes / 1e6:>8.2f} MB   matrix {matrix_bytes / 1e6:>7.2f} MB   "
+              f"x{legacy_bytes / matrix_bytes:>5.1f} smaller   build {build_ms:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
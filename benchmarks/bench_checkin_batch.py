@@ -0,0 +1,73 @@
+"""출석 체크 일괄 처리 처리량 벤치마크
+
+스캔 N건을 POST /api/attendance/check 로 한 건씩 보내는 경우와
+POST /api/attendance/check/batch 한 번으로 보내는 경우를 비교한다.
+
+사용법:
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_checkin_batch.py --scans 1000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+BENCH_STUDENT_BASE = 1999100000
+BENCH_WEEK = 98
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scans", type=int, default=1000)
+    parser.add_argument("--students", type=int, default=200)
+    args = parser.parse_args()
+
+    db = index.get_db()
+    student_ids = [BENCH_STUDENT_BASE + i for i in range(args.students)]
+    db.students.delete_many({"student_id": {"$in": student_ids}})
+    db.students.insert_many([
+        {"student_id": student_id, "name": f"벤치{i}", "major": "테스트학과",
+         "created_at": datetime.now(), "updated_at": datetime.now()}
+        for i, student_id in enumerate(student_ids)
+    ])
+    index.roster_cache.invalidate(db)
+
+    started_at = datetime.now()
+    scans = [
+        {"student_id": student_ids[i % len(student_ids)], "week": BENCH_WEEK,
+         "client_ts": (started_at + timedelta(milliseconds=i)).isoformat()}
+        for i in range(args.scans)
+    ]
+    client = index.app.test_client()
+
+    def reset():
+        db.attendance.delete_many({"student_id": {"$in": student_ids}, "week_id": BENCH_WEEK})
+
+    reset()
+    start = time.perf_counter()
+    for scan in scans:
+        client.post("/api/attendance/check", json={**scan, "status": "출석"})
+    single = time.perf_counter() - start
+
+    reset()
+    start = time.perf_counter()
+    response = client.post("/api/attendance/check/batch", json={"scans": scans})
+    batch = time.perf_counter() - start
+    summary = response.get_json()["data"]["summary"]
+
+    print(f"single  {args.scans} calls   {single:>8.2f} s   {args.scans / single:>10.1f} scans/s")
+    print(f"batch   1 call       {batch:>8.2f} s   {args.scans / batch:>10.1f} scans/s   "
+          f"(applied {summary['applied']}, failed {summary['failed']})")
+    print(f"speedup x{single / batch:.1f}")
+
+    reset()
+    db.students.delete_many({"student_id": {"$in": student_ids}})
+    index.roster_cache.invalidate(db)
+    index.rebuild_rollups(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""출석 체크 동시성 스트레스 테스트
+
+같은 (학생, 주차)에 병렬로 스캔을 보내고 최종 recheck_count 가
+스캔 횟수와 정확히 같은지, 타임어택 상태가 짝/홀 규칙과 맞는지 확인.
+
+사용법:
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_checkin_concurrency.py --scans 200 --concurrency 16
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+STRESS_STUDENT_ID = 1999000001
+STRESS_WEEK = 99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scans", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    db = index.get_db()
+    db.students.update_one(
+        {"student_id": STRESS_STUDENT_ID},
+        {"$set": {"name": "동시성테스트", "major": "테스트학과",
+                  "created_at": datetime.now(), "updated_at": datetime.now()}},
+        upsert=True
+    )
+    db.attendance.delete_many({"student_id": STRESS_STUDENT_ID, "week_id": STRESS_WEEK})
+
+    client = index.app.test_client()
+    payload = {"student_id": STRESS_STUDENT_ID, "week": STRESS_WEEK, "status": "출석"}
+
+    def scan(_):
+        return client.post("/api/attendance/check", json=payload).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        codes = list(pool.map(scan, range(args.scans)))
+    elapsed = time.perf_counter() - started
+
+    record = db.attendance.find_one({"student_id": STRESS_STUDENT_ID, "week_id": STRESS_WEEK})
+    failures = [code for code in codes if code != 200]
+    expected_timelock = args.scans % 2 == 0
+    ok = (
+        not failures
+        and record["recheck_count"] == args.scans
+        and ("expires_at" in record) == expected_timelock
+    )
+
+    print(f"scans={args.scans} concurrency={args.concurrency} elapsed={elapsed:.2f}s "
+          f"({args.scans / elapsed:.1f} scans/s)")
+    print(f"non-200 responses: {len(failures)}")
+    print(f"recheck_count: {record['recheck_count']} (expected {args.scans})")
+    print(f"timelock set: {'expires_at' in record} (expected {expected_timelock})")
+    print("PASS" if ok else "FAIL")
+
+    db.attendance.delete_many({"student_id": STRESS_STUDENT_ID, "week_id": STRESS_WEEK})
+    db.students.delete_one({"student_id": STRESS_STUDENT_ID})
+    index.roster_cache.invalidate(db)
+    # 스캔이 올린 집계 증감분도 지움
+    index.rebuild_rollups(db)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""GET /api/attendance/export 스트리밍 내보내기 벤치마크
+
+별도 벤치마크 DB에 출석 기록 N건(학생 × 주차)을 넣고 CSV/NDJSON(gzip 포함)으로
+끝까지 내려받으며 처리량, 전송 바이트, 최대 RSS 증가량을 측정한다.
+명단이 ROSTER_CACHE_MAX_SIZE 보다 크면 배치마다 학번 조회로 조인한다.
+
+사용법:
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_export.py --rows 5000000 --weeks 50
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+BENCH_DB = "attendance_bench"
+
+
+def seed(db, rows, weeks):
+    students = max(1, rows // weeks)
+    db.students.drop()
+    db.attendance.drop()
+    for start in range(0, students, 10000):
+        db.students.insert_many([
+            {"student_id": 2000000000 + i, "name": f"학생{i:07d}", "major": f"학과{i % 40}"}
+            for i in range(start, min(start + 10000, students))
+        ], ordered=False)
+    statuses = ["출석", "결석", "지각"]
+    batch = []
+    for week in range(1, weeks + 1):
+        for i in range(students):
+            batch.append({"student_id": 2000000000 + i, "week_id": week, "status": statuses[(i + week) % 3],
+                          "date": "2024-03-01", "recheck_count": 1})
+            if len(batch) == 50000:
+                db.attendance.insert_many(batch, ordered=False)
+                batch = []
+    if batch:
+        db.attendance.insert_many(batch, ordered=False)
+    db.students.create_index([("student_id", 1)], unique=True)
+    db.attendance.create_index([("student_id", 1), ("week_id", 1)], unique=True)
+    return students * weeks
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--weeks", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true", help="이미 넣어 둔 벤치마크 데이터 재사용")
+    args = parser.parse_args()
+
+    client = index.get_mongo_client()
+    db = client[BENCH_DB]
+    if args.skip_seed:
+        rows = db.attendance.estimated_document_count()
+    else:
+        start = time.perf_counter()
+        rows = seed(db, args.rows, args.weeks)
+        print(f"seeded {rows:,} rows in {time.perf_counter() - start:.1f} s")
+
+    # 앱이 벤치마크 DB를 보도록 연결 대상만 바꿈
+    index.get_db = lambda: client[BENCH_DB]
+    index.roster_cache.invalidate(db)
+    app = index.app.test_client()
+
+    for label, url in (
+        ("csv", "/api/attendance/export?format=csv"),
+        ("csv+gzip", "/api/attendance/export?format=csv&gzip=1"),
+        ("ndjson", "/api/attendance/export?format=ndjson"),
+        ("ndjson+gzip", "/api/attendance/export?format=ndjson&gzip=1"),
+    ):
+        rss_before = max_rss_mb()
+        start = time.perf_counter()
+        response = app.get(url, buffered=False)
+        sent = 0
+        for chunk in response.response:
+            sent += len(chunk)
+        response.close()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {elapsed:>8.1f} s   {rows / elapsed:>10,.0f} rows/s   "
+              f"{sent / 1e6:>9.1f} MB   max RSS +{max_rss_mb() - rss_before:.1f} MB")
+
+    client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    main()
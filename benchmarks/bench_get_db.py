@@ -0,0 +1,65 @@
+"""get_db() 연결 방식 벤치마크
+
+요청마다 새 MongoClient + ismaster ping 을 하던 기존 방식과
+프로세스 전역 풀 클라이언트를 재사용하는 방식의 처리량/지연시간 비교.
+
+사용법:
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_get_db.py --requests 500 --concurrency 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+
+def legacy_get_db():
+    """기존 구현: 요청마다 클라이언트 생성 + ping"""
+    client = MongoClient(index.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    client.admin.command('ismaster')
+    return client.attendance_db
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def run(label, get_db, total, concurrency):
+    def one_request(_):
+        start = time.perf_counter()
+        db = get_db()
+        db.students.find_one({"student_id": 2007720116})
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one_request, range(total)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{label:<8} {total / elapsed:>10.1f} req/s   "
+          f"p50 {percentile(latencies, 50) * 1000:>8.2f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    # 워밍업 (풀 클라이언트의 첫 연결 비용은 cold start 1회로 간주)
+    index.get_db().students.find_one({})
+
+    run("before", legacy_get_db, args.requests, args.concurrency)
+    run("after", index.get_db, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
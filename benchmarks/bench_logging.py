@@ -0,0 +1,81 @@
+"""출석 체크 로그 오버헤드 마이크로벤치마크
+
+출석 체크 한 건마다 남기는 로그의 요청 스레드 기준 소요 시간을 비교한다.
+- legacy: 예전 print 배너 15줄 (stdout 동기 출력)
+- INFO:   log_checkin 호출, DEBUG 꺼짐 (필드도 만들지 않음)
+- DEBUG:  log_checkin 호출, 큐 핸들러로 넘기고 JSON 변환/출력은 리스너 스레드가 처리
+출력은 모두 /dev/null 로 보낸다. DB 연결은 필요 없다.
+
+사용법:
+    python benchmarks/bench_logging.py --calls 100000
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+
+def legacy_banner(student_id, week_id, existing_record, checkin, message):
+    recheck_count = checkin["recheck_count"]
+    print(f"\n{'='*60}")
+    print(f"🎯 출석 체크 - 수정된 타임어택 로직")
+    print(f"{'='*60}")
+    print(f"학생: {student_id}, 주차: {week_id}")
+    print(f"기존 기록: {'있음' if existing_record else '없음'}")
+    if existing_record:
+        print(f"이전 recheck_count: {existing_record.get('recheck_count')}")
+    print(f"새 recheck_count: {recheck_count}")
+    print(f"홀수/짝수: {'홀수' if recheck_count % 2 == 1 else '짝수'}")
+    print(f"첫 인식 여부: {existing_record is None}")
+    print(f"타임어택 계산: has_time_limit={checkin['has_time_limit']}")
+    print(f"expires_at 설정: {checkin['expires_at']}")
+    print(f"메시지: {message}")
+    print(f"{'='*60}\n")
+
+
+def timed(fn, calls, args):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(*args)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    existing_record = {"recheck_count": 1, "status": "출석"}
+    checkin = {"recheck_count": 2, "has_time_limit": True, "expires_at": now + timedelta(minutes=15)}
+    call_args = (2024405040, 3, existing_record, checkin, index.describe_checkin(2, True))
+
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    index.log_stream_handler.setStream(devnull)
+
+    with contextlib.redirect_stdout(devnull):
+        legacy_us = timed(legacy_banner, args.calls, call_args)
+
+    index.checkin_log.setLevel(logging.INFO)
+    info_us = timed(index.log_checkin, args.calls, call_args)
+
+    index.checkin_log.setLevel(logging.DEBUG)
+    debug_us = timed(index.log_checkin, args.calls, call_args)
+    # 리스너가 큐를 다 비울 때까지 기다린 전체 시간도 참고로 출력
+    start = time.perf_counter()
+    index.stop_log_listener()
+    drain_ms = (time.perf_counter() - start) * 1000
+
+    print(f"legacy print banner   {legacy_us:>8.2f} us/request")
+    print(f"INFO  (debug off)     {info_us:>8.2f} us/request")
+    print(f"DEBUG (queued JSON)   {debug_us:>8.2f} us/request   (listener drain {drain_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""/metrics 기록 오버헤드 마이크로벤치마크
+
+- request: 요청 하나당 기록 (request_latency.observe + request_count.inc)
+- command: MongoDB 명령 하나당 CommandListener 기록 (started + succeeded)
+- /health: 테스트 클라이언트 요청 전체 시간, 메트릭 기록을 켠 경우와 끈 경우
+DB 연결은 필요 없다.
+
+사용법:
+    python benchmarks/bench_metrics.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+
+def timed(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    def record_request():
+        index.request_latency.observe(("GET", "/api/students"), 0.0123)
+        index.request_count.inc(("GET", "/api/students", 200))
+
+    address = ("localhost", 27017)
+    started = monitoring.CommandStartedEvent({"find": "attendance", "filter": {}}, "attendance_db", 1, address, 1)
+    succeeded = monitoring.CommandSucceededEvent(timedelta(microseconds=850), {"ok": 1}, "find", 1, address, 1)
+
+    def record_command():
+        index.mongo_command_metrics.started(started)
+        index.mongo_command_metrics.succeeded(succeeded)
+
+    request_us = timed(record_request, args.calls)
+    command_us = timed(record_command, args.calls)
+
+    # 켠/끈 상태를 번갈아 세 번씩 재고 가장 빠른 값 사용 (첫 요청 워밍업 영향 제거)
+    client = index.app.test_client()
+    samples = {False: [], True: []}
+    for _ in range(3):
+        for enabled in (False, True):
+            index.METRICS_ENABLED = enabled
+            samples[enabled].append(timed(lambda: client.get("/health"), args.requests))
+    off_us = min(samples[False])
+    on_us = min(samples[True])
+
+    print(f"request record        {request_us:>8.2f} us")
+    print(f"command record        {command_us:>8.2f} us")
+    print(f"GET /health metrics off {off_us:>8.1f} us   on {on_us:>8.1f} us   (+{on_us - off_us:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
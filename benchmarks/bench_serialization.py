@@ -0,0 +1,169 @@
+"""목록 응답 직렬화 CPU 벤치마크 (10k 행당)
+
+시드 생성기와 같은 학생/출석 문서로 세 가지 응답 모양을 잰다.
+- students: GET /api/students 행 (encode_student_row)
+- attendance: GET /api/attendance/week/<week> 행 (encode_attendance_row)
+- matrix: GET /api/attendance/matrix 열 형식 (encode_matrix, 학생 × --weeks 주차)
+
+직렬화 경로별로 잰다.
+- legacy: 이전 방식 (행마다 dict + .get().isoformat(), Flask jsonify)
+- encoders+json: 행 모양별 인코더 + 표준 json (orjson 이 없을 때)
+- encoders+orjson: 행 모양별 인코더 + orjson (설치되어 있을 때)
+
+BSON 디코드 비용도 잰다. 전체 문서, 투영한 문서, RawBSONDocument(필드를 읽을 때 디코드)를 비교한다.
+DB 연결은 필요 없다.
+
+사용법:
+    python benchmarks/bench_serialization.py --rows 10000 --weeks 16
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import bson
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+RAW_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+def make_dataset(rows, weeks, seed=42):
+    now = datetime.now()
+    students = index.generate_seed_students(seed, 0, 0, rows, now)
+    for student in students:
+        student["_id"] = ObjectId()
+    student_ids = [student["student_id"] for student in students]
+    # 한 주차 분량만 행으로 씀 (주차별 기록 응답과 같은 크기)
+    records, _ = index.generate_seed_attendance(seed, 0, student_ids, index.seed_week_starts(weeks, now), now)
+    for record in records:
+        record["_id"] = ObjectId()
+    week_records = [record for record in records if record["week_id"] == weeks][:rows]
+    return students, week_records, records
+
+
+def legacy_student_rows(students):
+    return [{
+        "id": str(student["_id"]),
+        "student_id": student["student_id"],
+        "name": student["name"],
+        "major": student["major"],
+        "email": student.get("email", ""),
+        "phone": student.get("phone", ""),
+        "created_at": student.get("created_at", "").isoformat() if student.get("created_at") else "",
+        "updated_at": student.get("updated_at", "").isoformat() if student.get("updated_at") else ""
+    } for student in students]
+
+
+def legacy_attendance_rows(records, student_map):
+    result = []
+    for record in records:
+        student_info = student_map.get(record["student_id"], {})
+        result.append({
+            "id": str(record["_id"]),
+            "student_id": record["student_id"],
+            "student_name": student_info.get("name", "Unknown"),
+            "department": student_info.get("major", "Unknown"),
+            "status": record["status"],
+            "date": record.get("date", ""),
+            "notes": record.get("notes", ""),
+            "timestamp": record.get("timestamp", "").isoformat() if record.get("timestamp") else ""
+        })
+    return result
+
+
+def cpu_ms(fn, repeat):
+    """repeat 번 실행한 CPU 시간 중 최솟값 (ms)"""
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        elapsed = (time.process_time() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--weeks", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    students, week_records, records = make_dataset(args.rows, args.weeks)
+    student_map = {student["student_id"]: student for student in students}
+    student_ids = [student["student_id"] for student in students]
+    week_ids = list(range(1, args.weeks + 1))
+    names = [student["name"] for student in students]
+    cells = [(record["student_id"], record["week_id"], record["status"]) for record in records]
+    matrix = index.build_attendance_matrix(student_ids, week_ids, cells)
+
+    def legacy_jsonify(payload):
+        with index.app.app_context():
+            return index.jsonify(payload).get_data()
+
+    shapes = {
+        "students": (
+            len(students),
+            lambda: legacy_jsonify({"success": True, "data": legacy_student_rows(students)}),
+            lambda: index.dumps_json({"success": True, "data": [index.encode_student_row(s) for s in students]}),
+        ),
+        "attendance": (
+            len(week_records),
+            lambda: legacy_jsonify({"success": True, "data": legacy_attendance_rows(week_records, student_map)}),
+            lambda: index.dumps_json({"success": True, "data": [
+                index.encode_attendance_row(r, student_map.get(r["student_id"], {})) for r in week_records
+            ]}),
+        ),
+        "matrix": (
+            len(students),
+            lambda: legacy_jsonify({"success": True, "data": index.encode_matrix(student_ids, names, week_ids, matrix)}),
+            lambda: index.dumps_json({"success": True, "data": index.encode_matrix(student_ids, names, week_ids, matrix)}),
+        ),
+    }
+
+    orjson = index.orjson
+    print(f"orjson: {'yes' if orjson is not None else 'no (stdlib json only)'}")
+    print(f"{'shape':<11} {'rows':>6}  {'legacy':>9}  {'enc+json':>9}  {'enc+orjson':>10}   ms CPU per 10k rows")
+    for name, (rows, legacy, encoded) in shapes.items():
+        scale = 10000 / max(rows, 1)
+        legacy_ms = cpu_ms(legacy, args.repeat) * scale
+        index.orjson = None
+        json_ms = cpu_ms(encoded, args.repeat) * scale
+        index.orjson = orjson
+        orjson_ms = cpu_ms(encoded, args.repeat) * scale if orjson is not None else None
+        print(f"{name:<11} {rows:>6}  {legacy_ms:>9.1f}  {json_ms:>9.1f}  "
+              + (f"{orjson_ms:>10.1f}   x{legacy_ms / orjson_ms:.1f}" if orjson_ms else f"{'-':>10}"))
+
+    # BSON 디코드: 드라이버가 서버 응답 배치를 dict 로 바꾸는 단계
+    full_blob = b"".join(bson.encode(student) for student in students)
+    projected_blob = b"".join(bson.encode({key: student[key] for key in ("_id", *index.STUDENT_ROW_PROJECTION)})
+                              for student in students)
+    record_fields = ("_id", *index.ATTENDANCE_RECORD_PROJECTION)
+    record_blob = b"".join(bson.encode(record) for record in week_records)
+    projected_record_blob = b"".join(bson.encode({key: record[key] for key in record_fields if key in record})
+                                     for record in week_records)
+
+    def raw_access(blob, fields):
+        for document in bson.decode_all(blob, RAW_OPTIONS):
+            for field in fields:
+                document.get(field)
+
+    print(f"\n{'decode':<11} {'rows':>6}  {'full':>9}  {'projected':>9}  {'raw+access':>10}   ms CPU per 10k rows")
+    for name, rows, blob, projected, fields in (
+        ("students", len(students), full_blob, projected_blob, ("_id", *index.STUDENT_ROW_PROJECTION)),
+        ("attendance", len(week_records), record_blob, projected_record_blob, record_fields),
+    ):
+        scale = 10000 / max(rows, 1)
+        print(f"{name:<11} {rows:>6}  {cpu_ms(lambda: bson.decode_all(blob), args.repeat) * scale:>9.1f}  "
+              f"{cpu_ms(lambda: bson.decode_all(projected), args.repeat) * scale:>9.1f}  "
+              f"{cpu_ms(lambda: raw_access(blob, fields), args.repeat) * scale:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
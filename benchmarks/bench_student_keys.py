@@ -0,0 +1,131 @@
+"""학번 키 변환 점검 - 라우트별 검사 문서 수와 응답 코드
+
+벤치마크 DB에 학생 N명 × W주차 데이터를 넣고 --legacy 명의 학번을 학번 키 변환 도입 전처럼
+문자열로 바꾼 뒤, 학번으로 조회하는 라우트마다
+- 대표 쿼리의 explain 검사 문서 수 / 반환 문서 수 (index.audit_query_plans)
+- 실제 요청의 응답 코드 (Flask 테스트 클라이언트)
+를 마이그레이션(normalize_student_id_keys) 전후로 출력한다.
+
+마이그레이션 뒤의 결과는 실제 explain(executionStats) 값으로 검사하고 하나라도 어긋나면 종료 코드 1
+- 모든 라우트: 응답 코드 200/201, 반환 1건 이상, 플랜에 IXSCAN(EXPRESS_IXSCAN)이 있고 COLLSCAN 이 없음
+- 학생 단건 조회(POINT_LOOKUPS): totalDocsExamined == nReturned == 1
+- 학생별 출석 조회: totalDocsExamined == nReturned (인덱스로 그 학생 기록만 읽음)
+
+explain 결과가 필요하므로 실제 mongod 에서만 실행한다 (메모리 저장소는 쿼리 플래너가 없어 실행을 거부함).
+CI 에서는 mongo 서비스 컨테이너를 띄우고 작은 크기로 실행하면 됨 (벤치마크 DB 는 끝나면 지움)
+
+사용법:
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_student_keys.py
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_student_keys.py --students 2000 --weeks 4 --legacy 50
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+BENCH_DB = "attendance_bench"
+
+# (explain 점검 이름, 같은 라우트로 보낼 요청)
+STUDENT_ROUTES = [
+    ("get_student", lambda sid: ("GET", f"/api/students/{sid}", None)),
+    ("update_student", lambda sid: ("PUT", f"/api/students/{sid}", {"phone": "010-0000-0000"})),
+    ("get_student_attendance", lambda sid: ("GET", f"/api/attendance/student/{sid}", None)),
+    ("get_student_stats", lambda sid: ("GET", f"/api/stats/student/{sid}", None)),
+    ("check_attendance.student", lambda sid: ("POST", "/api/attendance/check",
+                                              {"student_id": str(sid), "week": 1, "status": "출석"})),
+    ("delete_student.attendance", lambda sid: ("DELETE", f"/api/students/{sid}?delete_attendance=false", None)),
+]
+
+# 학번으로 학생 문서 하나만 찾는 점검 - 문서 하나만 검사해야 함
+POINT_LOOKUPS = {"get_student", "update_student", "check_attendance.student"}
+
+
+def make_legacy_keys(db, student_ids):
+    """학번을 문자열로 저장하던 시절의 데이터처럼 바꿈"""
+    for student_id in student_ids:
+        db.students.update_one({"student_id": student_id}, {"$set": {"student_id": str(student_id)}})
+        db.attendance.update_many({"student_id": student_id}, {"$set": {"student_id": str(student_id)}})
+        db.attendance_events.update_many({"student_id": student_id}, {"$set": {"student_id": str(student_id)}})
+        db.attendance_rollups.update_one({"_id": index.rollup_id("student", student_id)},
+                                         {"$set": {"key": str(student_id)}})
+    index.roster_cache.invalidate(db)
+
+
+def measure(db, client, student_id):
+    plans = {case["name"]: case for case in index.audit_query_plans(db, student_id=student_id)["cases"]}
+    rows = []
+    for name, make_request in STUDENT_ROUTES:
+        method, path, body = make_request(student_id)
+        status = client.open(path, method=method, json=body).status_code
+        case = plans[name]
+        rows.append((name, method, path, status, case["docs_examined"], case["returned"], case["plan"],
+                     ",".join(case["indexes"]) or "-"))
+    return rows
+
+
+def print_rows(title, rows):
+    print(title)
+    for name, method, path, status, examined, returned, _, indexes in rows:
+        print(f"  {method:<6} {path:<52} {status}  examined {examined:>4}  returned {returned:>4}  [{indexes}]")
+
+
+def check_rows(rows):
+    """마이그레이션 뒤 결과 검사 - 실패 메시지 목록 반환"""
+    failures = []
+    for name, _, _, status, examined, returned, plan, _ in rows:
+        if status not in (200, 201):
+            failures.append(f"{name}: status {status}")
+        if returned == 0:
+            failures.append(f"{name}: returned 0 documents")
+        # 8.0 부터 유니크 인덱스 단건 조회는 EXPRESS_IXSCAN 으로 나옴
+        if not any(stage.endswith("IXSCAN") for stage in plan) or "COLLSCAN" in plan:
+            failures.append(f"{name}: plan {'>'.join(plan)} is not an index scan")
+        if name in POINT_LOOKUPS and (examined, returned) != (1, 1):
+            failures.append(f"{name}: totalDocsExamined {examined}, nReturned {returned} (expected 1, 1)")
+        elif examined != returned:
+            failures.append(f"{name}: totalDocsExamined {examined} != nReturned {returned}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--weeks", type=int, default=16)
+    parser.add_argument("--legacy", type=int, default=1000, help="학번을 문자열로 바꿀 학생 수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if not index.query_plan_audit_supported():
+        parser.error(index.QUERY_PLAN_UNSUPPORTED_MESSAGE)
+
+    client = index.get_mongo_client()
+    db = client[BENCH_DB]
+    index.seed_database(db, args.students, args.weeks, args.seed, reset=True)
+    index.get_db = lambda: client[BENCH_DB]
+    index.response_cache = None
+    index.log_stream_handler.setStream(open(os.devnull, "w", encoding="utf-8"))
+
+    legacy_ids = sorted(db.students.distinct("student_id"))[:args.legacy]
+    make_legacy_keys(db, legacy_ids)
+    # 새로 채운 DB는 변환이 끝난 것으로 기록되므로 기록을 지워 다시 실행되게 함
+    db.data_migrations.delete_one({"_id": 1})
+    test_client = index.app.test_client()
+
+    print_rows(f"before migration (student {legacy_ids[0]} stored as string)", measure(db, test_client, legacy_ids[0]))
+    applied = index.apply_data_migrations(db)
+    print(f"data migrations applied: {applied}  result: {db.data_migrations.find_one({'_id': 1})['result']}")
+    after = measure(db, test_client, legacy_ids[1])
+    print_rows(f"after migration (student {legacy_ids[1]})", after)
+
+    client.drop_database(BENCH_DB)
+    failures = check_rows(after)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK student key lookups use the index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""GET /api/students 페이지네이션 벤치마크
+
+별도 벤치마크 DB에 학생 N명을 넣고 skip 방식(?page=)과 커서 방식(?after=)으로
+깊은 페이지를 읽는 시간을 비교한다.
+
+사용법:
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/bench_students_pagination.py --students 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+BENCH_DB = "attendance_bench"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    client = index.get_mongo_client()
+    db = client[BENCH_DB]
+    db.students.drop()
+    for start in range(0, args.students, 10000):
+        db.students.insert_many([
+            {"student_id": 2000000000 + i, "name": f"학생{i:07d}", "major": f"학과{i % 40}"}
+            for i in range(start, min(start + 10000, args.students))
+        ], ordered=False)
+    db.students.create_index([("student_id", 1)], unique=True)
+    db.students.create_index([("name", 1), ("_id", 1)])
+    db.students.create_index([("major", 1), ("_id", 1)])
+
+    # 앱이 벤치마크 DB를 보도록 연결 대상만 바꿈
+    index.get_db = lambda: client[BENCH_DB]
+    app = index.app.test_client()
+
+    for sort_field in ("student_id", "name"):
+        print(f"sort={sort_field}")
+        for page in args.pages:
+            if (page - 1) * args.limit >= args.students:
+                continue
+            start = time.perf_counter()
+            app.get(f"/api/students?sort={sort_field}&limit={args.limit}&page={page}&count=estimated")
+            skip_ms = (time.perf_counter() - start) * 1000
+
+            # 같은 위치 직전 페이지의 커서를 만들어 커서 방식으로 같은 페이지를 읽음
+            if page > 1:
+                last = db.students.find().sort([(sort_field, 1), ("_id", 1)]).skip((page - 1) * args.limit - 1).limit(1)[0]
+                cursor = index.encode_student_cursor(sort_field, "asc", last)
+                start = time.perf_counter()
+                app.get(f"/api/students?sort={sort_field}&limit={args.limit}&after={cursor}&count=estimated")
+                cursor_ms = (time.perf_counter() - start) * 1000
+            else:
+                cursor_ms = skip_ms
+            print(f"  page {page:>6}   skip {skip_ms:>9.1f} ms   cursor {cursor_ms:>7.1f} ms")
+
+    client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    main()
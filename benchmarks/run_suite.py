@@ -0,0 +1,386 @@
+"""API 엔드포인트 부하 테스트/벤치마크 스위트
+
+별도 벤치마크 DB에 학생 N명 × W주차 데이터를 넣고 (index.seed_database) api/index.py 의 모든 라우트를
+Flask 테스트 클라이언트(test)와 실제 HTTP(http, 같은 프로세스의 werkzeug 서버)로 호출해
+라우트별 p50/p95/p99 지연, 처리량, 요청당 메모리 할당(tracemalloc, test 전송만)을 잰다.
+결과는 JSON 으로 저장하므로 --compare 로 두 실행을 비교할 수 있다.
+--plan-audit 은 측정 전에 라우트별 쿼리 플랜을 점검(index.audit_query_plans)해 hot 경로가
+반환 문서 1건당 --max-examined-ratio 건보다 많이 검사하면 종료 코드 1로 끝낸다 (--requests 0 이면 점검만).
+메모리 저장소에는 쿼리 플래너가 없으므로 --plan-audit 과 GET /api/debug/query-plans 측정은 실제 mongod 에서만 한다.
+
+- 로컬 mongod 또는 STORAGE_BACKEND=memory(메모리 저장소)로 실행
+- POST /api/init-db, POST /api/seed 는 데이터를 지우고 다시 만드므로 제외 (시드 시간은 시작할 때 출력함)
+- 직접 시드한 벤치마크 DB는 끝나면 지움 (--keep 이면 남겨 두고 다음 실행에서 --skip-seed 로 재사용)
+- 조회 응답 캐시는 기본으로 끄고 핸들러 자체를 잼 (--response-cache 로 켬)
+
+사용법:
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/run_suite.py --students 50000 --weeks 16 --output before.json
+    STORAGE_BACKEND=memory python benchmarks/run_suite.py --students 2000 --weeks 16 --transport both
+    python benchmarks/run_suite.py --compare before.json after.json
+    MONGODB_URI=mongodb://localhost:27017 python benchmarks/run_suite.py --students 20000 --plan-audit --requests 0
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import index  # noqa: E402
+
+BENCH_DB = "attendance_bench"
+NEW_STUDENT_ID = 3000000000
+IMPORT_STUDENT_ID = 3500000000
+MAJORS = [major for major, _ in index.SEED_MAJORS]
+
+
+# ===== 시나리오 =====
+class Context:
+    """시나리오가 요청을 만들 때 쓰는 공유 상태 (스레드 안전한 연산만 사용)"""
+
+    def __init__(self, student_ids, weeks, seed_value):
+        self.student_ids = student_ids
+        self.weeks = weeks
+        self.rng = random.Random(seed_value)
+        self.new_ids = itertools.count(NEW_STUDENT_ID)
+        self.import_ids = itertools.count(IMPORT_STUDENT_ID, 100)
+        self.created = []
+
+    def student_id(self):
+        return self.rng.choice(self.student_ids)
+
+    def week(self):
+        return self.rng.randint(1, self.weeks)
+
+
+def create_student_request(ctx):
+    student_id = next(ctx.new_ids)
+    ctx.created.append(student_id)
+    return "POST", "/api/students", {"json": {"student_id": student_id, "name": "벤치학생", "major": MAJORS[0]}}
+
+
+def delete_student_request(ctx):
+    try:
+        student_id = ctx.created.pop()
+    except IndexError:
+        student_id = next(ctx.new_ids)
+    return "DELETE", f"/api/students/{student_id}", {}
+
+
+def import_students_request(ctx):
+    first = next(ctx.import_ids)
+    lines = ["student_id,name,major"] + [f"{first + i},가져온학생{i},{MAJORS[i % len(MAJORS)]}" for i in range(100)]
+    return "POST", "/api/students/import?format=csv", {"data": "\n".join(lines).encode(), "content_type": "text/csv"}
+
+
+def batch_checkin_request(ctx):
+    base = int(time.time() * 1000)
+    scans = [{"student_id": ctx.student_id(), "week": ctx.week(), "client_ts": base + i} for i in range(50)]
+    return "POST", "/api/attendance/check/batch", {"json": {"scans": scans}}
+
+
+# (라우트 이름, 요청 생성 함수, 무거운 라우트 여부) - 무거운 라우트는 --requests 의 1/10 만 호출
+SCENARIOS = [
+    ("GET /", lambda ctx: ("GET", "/", {}), False),
+    ("GET /health", lambda ctx: ("GET", "/health", {}), False),
+    ("GET /api/test-db", lambda ctx: ("GET", "/api/test-db", {}), False),
+    ("GET /api/students", lambda ctx: ("GET", f"/api/students?limit=100&page={ctx.rng.randint(1, 20)}", {}), False),
+    ("GET /api/students?sort=name", lambda ctx: ("GET", f"/api/students?sort=name&limit=100&page={ctx.rng.randint(1, 20)}&count=estimated", {}), False),
+    ("GET /api/students/{student_id}", lambda ctx: ("GET", f"/api/students/{ctx.student_id()}", {}), False),
+    ("POST /api/students", create_student_request, False),
+    ("PUT /api/students/{student_id}", lambda ctx: ("PUT", f"/api/students/{ctx.student_id()}", {"json": {"phone": "010-9999-9999"}}), False),
+    ("DELETE /api/students/{student_id}", delete_student_request, False),
+    ("POST /api/students/import", import_students_request, False),
+    ("GET /api/attendance", lambda ctx: ("GET", f"/api/attendance?week={ctx.week()}", {}), True),
+    ("POST /api/attendance/check", lambda ctx: ("POST", "/api/attendance/check", {"json": {"student_id": ctx.student_id(), "week": ctx.week(), "status": "출석"}}), False),
+    ("POST /api/attendance/check/batch", batch_checkin_request, False),
+    ("POST /api/attendance/process-auto-absent", lambda ctx: ("POST", "/api/attendance/process-auto-absent", {}), False),
+    ("GET /api/attendance/recheck-status/{student_id}/{week}", lambda ctx: ("GET", f"/api/attendance/recheck-status/{ctx.student_id()}/{ctx.week()}", {}), False),
+    ("GET /api/attendance/history/{student_id}/{week}", lambda ctx: ("GET", f"/api/attendance/history/{ctx.student_id()}/{ctx.week()}", {}), False),
+    ("POST /api/debug/timelock-test", lambda ctx: ("POST", "/api/debug/timelock-test", {"json": {"student_id": ctx.student_id(), "week": ctx.week()}}), False),
+    ("GET /api/debug/auto-process-status", lambda ctx: ("GET", "/api/debug/auto-process-status", {}), True),
+    ("GET /api/attendance/student/{student_id}", lambda ctx: ("GET", f"/api/attendance/student/{ctx.student_id()}", {}), False),
+    ("GET /api/attendance/week/{week}", lambda ctx: ("GET", f"/api/attendance/week/{ctx.week()}", {}), True),
+    ("GET /api/attendance/export", lambda ctx: ("GET", f"/api/attendance/export?format=csv&weeks={ctx.week()}", {}), True),
+    ("GET /api/attendance/matrix", lambda ctx: ("GET", f"/api/attendance/matrix?major={ctx.rng.choice(MAJORS)}", {}), True),
+    ("GET /api/stats/overview", lambda ctx: ("GET", "/api/stats/overview", {}), False),
+    ("GET /api/stats/weekly", lambda ctx: ("GET", "/api/stats/weekly", {}), False),
+    ("GET /api/stats/student/{student_id}", lambda ctx: ("GET", f"/api/stats/student/{ctx.student_id()}", {}), False),
+    ("GET /api/debug/query-plans", lambda ctx: ("GET", "/api/debug/query-plans", {}), True),
+    ("GET /metrics", lambda ctx: ("GET", "/metrics", {}), False),
+]
+
+
+# ===== 전송 =====
+class TestClientTransport:
+    name = "test"
+
+    def __init__(self):
+        self.client = index.app.test_client()
+
+    def send(self, method, path, options):
+        response = self.client.open(path, method=method, **options)
+        body = response.get_data()
+        response.close()
+        return response.status_code, len(body)
+
+
+class HttpTransport:
+    """같은 프로세스에서 띄운 werkzeug 서버로 실제 HTTP 요청 (요청마다 새 연결)"""
+    name = "http"
+
+    def __init__(self):
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        self.server = make_server("127.0.0.1", 0, index.app, threaded=True)
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def send(self, method, path, options):
+        headers = {}
+        body = options.get("data")
+        if "json" in options:
+            body = json.dumps(options["json"]).encode()
+            headers["Content-Type"] = "application/json"
+        elif "content_type" in options:
+            headers["Content-Type"] = options["content_type"]
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        try:
+            connection.request(method, urllib.parse.quote(path, safe="/?=&"), body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, len(response.read())
+        finally:
+            connection.close()
+
+    def close(self):
+        self.server.shutdown()
+
+
+# ===== 측정 =====
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    position = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def measure_latency(transport, make_request, ctx, requests, concurrency):
+    """요청별 지연(ms)과 전체 처리량 측정"""
+    prepared = [make_request(ctx) for _ in range(requests)]
+
+    def run(request_spec):
+        method, path, options = request_spec
+        start = time.perf_counter()
+        status, size = transport.send(method, path, options)
+        return (time.perf_counter() - start) * 1000, status, size
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(run, prepared))
+    else:
+        samples = [run(spec) for spec in prepared]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(sample[0] for sample in samples)
+    status_codes = {}
+    for _, status, _ in samples:
+        status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+    return {
+        "requests": requests,
+        "status_codes": status_codes,
+        "errors": sum(count for status, count in status_codes.items() if int(status) >= 500),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "response_bytes": round(sum(sample[2] for sample in samples) / len(samples)),
+    }
+
+
+def measure_allocations(transport, make_request, ctx, samples):
+    """요청 하나를 처리하는 동안의 최대 할당량과 남은 할당량 (KiB, 중앙값)"""
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            method, path, options = make_request(ctx)
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            transport.send(method, path, options)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    retained.sort()
+    return {
+        "alloc_peak_kib": round(percentile(peaks, 0.5) / 1024, 1),
+        "alloc_retained_kib": round(percentile(retained, 0.5) / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ===== 비교 =====
+def compare(before_path, after_path):
+    """두 결과 파일의 라우트별 지연/처리량 변화 출력"""
+    with open(before_path, encoding="utf-8") as f:
+        before = {(r["transport"], r["route"]): r for r in json.load(f)["results"]}
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)["results"]
+
+    def change(old, new):
+        if not old or new is None:
+            return "      -"
+        return f"{(new - old) / old * 100:>+6.1f}%"
+
+    print(f"{'transport':<9} {'route':<58} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8}")
+    for result in after:
+        old = before.get((result["transport"], result["route"]))
+        if old is None:
+            continue
+        print(f"{result['transport']:<9} {result['route']:<58} "
+              + " ".join(f"{change(old[key], result[key]):>8}" for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")))
+
+
+def print_plan_audit(report):
+    for case in report["cases"]:
+        if "error" in case:
+            print(f"plan  {case['name']:<28} FAIL  {case['error']}")
+            continue
+        print(f"plan  {case['name']:<28} {'ok  ' if case['ok'] else 'FAIL'}  examined {case['docs_examined']:>8} "
+              f"returned {case['returned']:>7}  x{case['examined_ratio']:<8} {' <- '.join(case['plan'])} "
+              f"[{','.join(case['indexes']) or '-'}]{'  hot' if case['hot'] else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--weeks", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42, help="데이터/요청 난수 시드")
+    parser.add_argument("--requests", type=int, default=200, help="라우트별 측정 요청 수")
+    parser.add_argument("--warmup", type=int, default=5, help="라우트별 측정 전 요청 수")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--alloc-samples", type=int, default=20, help="라우트별 할당 측정 요청 수 (0 이면 생략)")
+    parser.add_argument("--transport", choices=["test", "http", "both"], default="test")
+    parser.add_argument("--routes", nargs="+", help="이름에 이 문자열이 들어간 라우트만 실행")
+    parser.add_argument("--response-cache", action="store_true", help="조회 응답 캐시를 켠 채로 측정")
+    parser.add_argument("--skip-seed", action="store_true", help="이미 넣어 둔 벤치마크 데이터 재사용 (지우지 않음)")
+    parser.add_argument("--keep", action="store_true", help="끝난 뒤 벤치마크 DB를 지우지 않음")
+    parser.add_argument("--output", help="결과 JSON 파일 경로")
+    parser.add_argument("--plan-audit", action="store_true", help="쿼리 플랜 점검 (hot 경로가 기준을 넘으면 종료 코드 1)")
+    parser.add_argument("--max-examined-ratio", type=float, default=index.QUERY_PLAN_MAX_EXAMINED_RATIO,
+                        help="hot 경로의 반환 문서 1건당 허용 검사 문서 수")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="두 결과 파일 비교만 수행")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.plan_audit and not index.query_plan_audit_supported():
+        parser.error(index.QUERY_PLAN_UNSUPPORTED_MESSAGE)
+
+    client = index.get_mongo_client()
+    db = client[BENCH_DB]
+    if not args.skip_seed:
+        summary = index.seed_database(db, args.students, args.weeks, args.seed, reset=True)
+        print(f"seeded {summary['students']:,} students x {args.weeks} weeks "
+              f"({summary['attendance']:,} rows) in {summary['total_seconds']} s")
+    rows = db.attendance.estimated_document_count()
+    student_ids = db.students.distinct("student_id")
+    if not student_ids:
+        parser.error(f"{BENCH_DB} 에 학생이 없습니다 - --skip-seed 없이 실행하거나 이전 실행에 --keep 을 주세요")
+    weeks = len(db.weeks.distinct("week_id"))
+
+    # 앱이 벤치마크 DB를 보도록 연결 대상만 바꾸고 앱 로그는 버림
+    index.get_db = lambda: client[BENCH_DB]
+    index.roster_cache.invalidate(db)
+    if not args.response_cache:
+        index.response_cache = None
+    index.log_stream_handler.setStream(open(os.devnull, "w", encoding="utf-8"))
+
+    # 쓰기 라우트가 데이터를 바꾸기 전에 점검
+    plan_audit = index.audit_query_plans(db, args.max_examined_ratio) if args.plan_audit else None
+    if plan_audit:
+        print_plan_audit(plan_audit)
+
+    transports = {"test": [TestClientTransport], "http": [HttpTransport],
+                  "both": [TestClientTransport, HttpTransport]}[args.transport]
+    scenarios = [s for s in SCENARIOS if not args.routes or any(part in s[0] for part in args.routes)]
+    if not index.query_plan_audit_supported():
+        scenarios = [s for s in scenarios if s[0] != "GET /api/debug/query-plans"]
+    ctx = Context(student_ids, weeks, args.seed)
+    results = []
+
+    for transport_class in (transports if args.requests > 0 else []):
+        transport = transport_class()
+        for route, make_request, heavy in scenarios:
+            requests = max(5, args.requests // 10) if heavy else args.requests
+            for _ in range(args.warmup):
+                transport.send(*make_request(ctx))
+            result = {"transport": transport.name, "route": route}
+            result.update(measure_latency(transport, make_request, ctx, requests, args.concurrency))
+            if transport.name == "test" and args.alloc_samples:
+                result.update(measure_allocations(transport, make_request, ctx, args.alloc_samples))
+            results.append(result)
+            print(f"{transport.name:<5} {route:<58} p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+                  f"p99 {result['p99_ms']:>8.2f} ms  {result['throughput_rps']:>8.1f} req/s"
+                  + (f"  alloc {result['alloc_peak_kib']:>8.1f} KiB" if "alloc_peak_kib" in result else "")
+                  + (f"  status {result['status_codes']}" if set(result["status_codes"]) - {"200", "201"} else ""))
+        if hasattr(transport, "close"):
+            transport.close()
+
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "storage_backend": index.STORAGE_BACKEND,
+            "students": len(student_ids),
+            "weeks": weeks,
+            "attendance_rows": rows,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "response_cache": args.response_cache,
+        },
+        "results": results,
+    }
+    if plan_audit:
+        report["query_plans"] = plan_audit
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"results written to {args.output}")
+
+    if not args.skip_seed and not args.keep:
+        client.drop_database(BENCH_DB)
+    if plan_audit and plan_audit["failures"]:
+        print(f"query plan audit failed: {', '.join(plan_audit['failures'])}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()